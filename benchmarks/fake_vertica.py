@@ -0,0 +1,102 @@
+"""
+In-process stand-in for a vertica_python connection.
+
+Accepts the calls VerticaDB makes (``execute``, ``copy``, ``commit`` ...)
+without a server, and records the statements and bytes it receives so the
+benchmarks measure the simulator and not the network.
+"""
+from threading import Lock
+
+
+class FakeStats:
+    """Totals shared by every connection of one benchmark case"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.connections = 0
+        self.statements = 0
+        self.copies = 0
+        self.bytes = 0
+
+    def as_dict(self):
+        return {'connections': self.connections, 'statements': self.statements,
+                'copies': self.copies, 'bytes': self.bytes}
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, query, parameters=None):
+        stats = self.connection.stats
+        with stats.lock:
+            stats.statements += 1
+        # Reference key and rejected-row lookups get plausible answers
+        if 'GET_NUM_REJECTED_ROWS' in query:
+            self._rows = [(0,)]
+        elif 'MAX(' in query:
+            self._rows = [(None,)]
+        elif query.lstrip().upper().startswith('SELECT'):
+            self._rows = [(value,) for value in range(1, 1001)]
+        else:
+            self._rows = []
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def iterate(self):
+        yield from self.fetchall()
+
+    def copy(self, sql, data, buffer_size=131072, **kwargs):
+        """Drain the COPY payload like the real client would, counting its bytes"""
+        size = 0
+        if hasattr(data, 'read'):
+            while True:
+                chunk = data.read(buffer_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+        else:
+            size = len(data)
+        stats = self.connection.stats
+        with stats.lock:
+            stats.copies += 1
+            stats.bytes += size
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, stats):
+        self.stats = stats
+        self.autocommit = True
+        self._closed = False
+        with stats.lock:
+            stats.connections += 1
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+
+def connection_factory(stats):
+    """Factory for ``VerticaDB(connection_factory=...)`` recording into ``stats``"""
+    return lambda: FakeConnection(stats)
@@ -0,0 +1,243 @@
+"""
+Throughput benchmarks for generation and COPY loading, without Vertica.
+
+Every case (table x batch size x worker count) runs in a fresh process
+against the in-process stand-in from fake_vertica.py, so peak RSS is
+measured per case. Results are written as JSON and can be compared with a
+previous run to catch regressions:
+
+    python benchmarks/run_benchmarks.py --rows 20000 --batch-sizes 1000 5000 --workers 1 4
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+
+With ``--sink csv`` (or ``jsonl``, ``parquet``) batches are written to files
+in a scratch directory instead of COPYed, which measures generation plus
+serialization with no database at all.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCHMARK_DIR.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+PACKAGE_DIR = PROJECT_ROOT / 'data_simulator'
+CONFIG_DIR = PACKAGE_DIR / 'config'
+
+# Throughput drops larger than this fraction count as regressions in --compare
+DEFAULT_THRESHOLD = 0.10
+
+
+def default_tables():
+    """Every CDR table defined in config/tables"""
+    tables = []
+    for table_file in sorted((CONFIG_DIR / 'tables').glob('*.yaml')):
+        with open(table_file) as f:
+            table_name = yaml.safe_load(f)['table_name']
+        if table_name.startswith('CDR_'):
+            tables.append(table_name)
+    return tables
+
+
+def write_case_config(case, work_dir):
+    """config.yaml for one case: the bundled config with the case's settings and scratch state paths"""
+    with open(CONFIG_DIR / 'config.yaml') as f:
+        config = yaml.safe_load(f)
+
+    config['yaml_path'] = {key: str(PACKAGE_DIR / path) for key, path in config['yaml_path'].items()}
+    config['vertica']['max_workers'] = case['workers']
+    config['vertica']['pool_warmup'] = 0
+    generation = config.setdefault('generation', {})
+    generation.update({'workers': case['workers'], 'engine': case['engine'], 'mode': case['mode'],
+                       'streaming': False, 'seed': 0})
+    config.setdefault('sharding', {})['enabled'] = False
+    config.setdefault('sequences', {})['state_path'] = str(work_dir / 'sequences.json')
+    config.setdefault('references', {})['snapshot_path'] = None
+    config.setdefault('config_cache', {})['path'] = str(work_dir / 'config_cache.pickle')
+    config['sink'] = {'type': case.get('sink', 'vertica'), 'output_dir': str(work_dir / 'output'), 'partition_by': None}
+
+    config_path = work_dir / 'config.yaml'
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(config, f)
+    return config_path
+
+
+def run_case(case):
+    """Run one case in this process and return its measurements"""
+    from data_simulator import DataSimulator
+    from fake_vertica import FakeStats, connection_factory
+
+    stats = FakeStats()
+    with tempfile.TemporaryDirectory(prefix='data-simulator-bench-') as work_dir:
+        config_path = write_case_config(case, Path(work_dir))
+
+        started = time.perf_counter()
+        simulator = DataSimulator(str(config_path), connection_factory=connection_factory(stats))
+        init_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        simulator.get_table_plan(case['table'])
+        simulator.pre_fetch_references(case['table'])
+        compile_seconds = time.perf_counter() - started
+
+        # Median of the repeats, to keep regressions checks above the noise
+        generate_times, load_times = [], []
+        for _ in range(case.get('repeat', 1)):
+            started = time.perf_counter()
+            data = simulator.generate_data_parallel(case['table'], case['rows'], batch_size=case['batch_size'])
+            generate_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            loaded = simulator.sink.write(case['table'], data, batch_size=case['batch_size'])
+            load_times.append(time.perf_counter() - started)
+        generate_seconds = statistics.median(generate_times)
+        load_seconds = statistics.median(load_times)
+        # COPY payload or file bytes, as counted by the sink
+        bytes_per_load = simulator.metrics.summary()['totals'].get('bytes_loaded', 0) // len(load_times)
+
+        simulator.shutdown_workers()
+        simulator.db.close()
+
+    total_seconds = generate_seconds + load_seconds
+    return dict(
+        case,
+        columns=len(data.columns),
+        rows_loaded=loaded,
+        bytes=bytes_per_load,
+        copies=stats.copies // len(load_times),
+        stages={
+            'init': init_seconds,
+            'compile': compile_seconds,
+            'generate': generate_seconds,
+            'load': load_seconds
+        },
+        rows_per_sec=loaded / total_seconds if total_seconds else 0.0,
+        generate_rows_per_sec=case['rows'] / generate_seconds if generate_seconds else 0.0,
+        bytes_per_sec=bytes_per_load / load_seconds if load_seconds else 0.0,
+        # ru_maxrss is in kilobytes on Linux
+        peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    )
+
+
+def run_case_subprocess(case):
+    completed = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), '--case', json.dumps(case)],
+        capture_output=True, text=True, cwd=str(BENCHMARK_DIR)
+    )
+    if completed.returncode != 0:
+        return dict(case, error=completed.stderr.strip().splitlines()[-1] if completed.stderr else 'failed')
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def case_key(result):
+    return (result['table'], result['rows'], result['batch_size'], result['workers'], result['engine'], result['mode'],
+            result.get('sink', 'vertica'))
+
+
+def compare(results, baseline_path, threshold):
+    """Cases whose rows/sec dropped by more than ``threshold`` against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = {case_key(result): result for result in json.load(f)['results'] if 'error' not in result}
+    regressions = []
+    for result in results:
+        previous = baseline.get(case_key(result))
+        if previous is None or 'error' in result or not previous['rows_per_sec']:
+            continue
+        change = result['rows_per_sec'] / previous['rows_per_sec'] - 1
+        if change < -threshold:
+            regressions.append({'case': case_key(result), 'baseline_rows_per_sec': previous['rows_per_sec'],
+                                'rows_per_sec': result['rows_per_sec'], 'change': change})
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=str(PROJECT_ROOT)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generation and COPY loading against a fake Vertica")
+    parser.add_argument('--tables', nargs='+', help="Tables to benchmark (default: every CDR table in config/tables)")
+    parser.add_argument('--rows', type=int, default=10000, help="Rows generated per case")
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1000, 5000])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--engine', default='python', choices=['python', 'numpy'])
+    parser.add_argument('--mode', default='thread', choices=['thread', 'process'])
+    parser.add_argument('--sink', default='vertica', choices=['vertica', 'csv', 'jsonl', 'parquet'],
+                        help="Load into the fake Vertica, or write files to a scratch directory")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case; the median is reported")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="Previous results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative rows/sec drop reported as a regression")
+    parser.add_argument('--case', help=argparse.SUPPRESS)  # internal: run one case and print its JSON
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case))))
+        return 0
+
+    cases = [
+        {'table': table, 'rows': args.rows, 'batch_size': batch_size, 'workers': workers,
+         'engine': args.engine, 'mode': args.mode, 'sink': args.sink, 'repeat': args.repeat}
+        for table in (args.tables or default_tables())
+        for batch_size in args.batch_sizes
+        for workers in args.workers
+    ]
+
+    results = []
+    for number, case in enumerate(cases, start=1):
+        result = run_case_subprocess(case)
+        results.append(result)
+        if 'error' in result:
+            print(f"[{number}/{len(cases)}] {case['table']} batch={case['batch_size']} "
+                  f"workers={case['workers']}: ERROR {result['error']}")
+        else:
+            print(f"[{number}/{len(cases)}] {case['table']} batch={case['batch_size']} workers={case['workers']}: "
+                  f"{result['rows_per_sec']:,.0f} rows/s, {result['bytes_per_sec'] / 1e6:,.1f} MB/s, "
+                  f"peak RSS {result['peak_rss_mb']:.0f} MB")
+
+    timestamp = datetime.now(timezone.utc)
+    report = {
+        'timestamp': timestamp.isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {'rows': args.rows, 'batch_sizes': args.batch_sizes, 'workers': args.workers,
+                     'engine': args.engine, 'mode': args.mode, 'sink': args.sink, 'repeat': args.repeat},
+        'results': results
+    }
+
+    exit_code = 0
+    if args.compare:
+        report['regressions'] = compare(results, args.compare, args.threshold)
+        for regression in report['regressions']:
+            print(f"REGRESSION {regression['case']}: {regression['baseline_rows_per_sec']:,.0f} -> "
+                  f"{regression['rows_per_sec']:,.0f} rows/s ({regression['change']:+.0%})")
+        exit_code = 1 if report['regressions'] else 0
+
+    output = Path(args.output) if args.output else BENCHMARK_DIR / 'results' / f"{timestamp:%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
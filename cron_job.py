@@ -1,14 +1,163 @@
+import json
+import signal
+import argparse
+from datetime import datetime, timezone
 from data_simulator import DataSimulator
 from data_simulator.utils import get_config_path
+from data_simulator.scheduler import Scheduler
+from data_simulator.rate_control import ContinuousRunner
+from data_simulator.table_scheduler import TableScheduler
+from data_simulator.metrics import MetricsServer
+from data_simulator.backfill import Backfill
+from data_simulator.sharding import LeaseLost
 from tqdm import tqdm
 
-config_path = get_config_path("config.yaml")
-simulator = DataSimulator(config_path)
 
-tables = simulator.config.get('tables')
-
-for table in tqdm(tables, desc="Processing tables", unit="table"):
-    generated_data = simulator.generate_data_parallel(table, simulator.config.get('generate_rows'))
+def load_table(simulator, table, generate_rows):
+    """Generate ``generate_rows`` rows for one table and load them into the configured sink"""
+    if simulator.streaming:
+        # Batches are COPYed as they are generated, with bounded memory
+        if not simulator.generate_and_load(table, generate_rows):
+            print(f"No data generated for table: {table}")
+        return
+    generated_data = simulator.generate_data_parallel(table, generate_rows)
     if not generated_data:
         print(f"No data generated for table: {table}")
-    simulator.db.batch_insert(table, generated_data)
\ No newline at end of file
+    simulator.sink.write(table, generated_data)
+
+
+def report_metrics(simulator, since=None):
+    """Print the structured metrics summary of a run, and append it to metrics.summary_path if set"""
+    summary = simulator.metrics.summary(since=since)
+    summary['finished_at'] = datetime.now(timezone.utc).isoformat()
+    line = json.dumps(summary, default=str, sort_keys=True)
+    print(f"Run summary: {line}")
+    summary_path = simulator.config.get('metrics', {}).get('summary_path')
+    if summary_path:
+        with open(summary_path, 'a') as f:
+            f.write(line + '\n')
+    return summary
+
+
+def run_tick(simulator):
+    """Generate and load ``generate_rows`` rows into every configured table"""
+    metrics_start = simulator.metrics.snapshot()
+
+    # Pick up edited table/column YAMLs; compiled plans are kept otherwise
+    simulator.refresh_configs()
+    simulator.shard.renew()
+
+    tables = simulator.config.get('tables')
+    # Each replica generates only its shard's share of the rows
+    generate_rows = simulator.shard.rows_for(simulator.config.get('generate_rows'))
+
+    # Independent tables load concurrently; a table waits for the tables its foreign keys reference
+    scheduler = TableScheduler.from_config(simulator, lambda table: load_table(simulator, table, generate_rows))
+    with tqdm(total=len(tables), desc="Processing tables", unit="table") as progress:
+        scheduler.run(tables, on_done=lambda table: progress.update())
+
+    report = scheduler.report()
+    print(f"Tables loaded in {report['wall_seconds']:.1f}s ({report['speedup']:.1f}x over serial), "
+          f"critical path {' -> '.join(report['critical_path'])} took {report['critical_path_seconds']:.1f}s")
+    if report['failed']:
+        print(f"Failed tables: {report['failed']}, skipped dependents: {report['skipped']}")
+
+    # Persist sequence high-water marks and reference keys so the next run never
+    # reissues keys and starts with a warm cache
+    simulator.save_state()
+    # Per-table rows, bytes and stage timings of this run, plus pool and cache statistics
+    report_metrics(simulator, since=metrics_start)
+    if simulator.profiler is not None:
+        print(simulator.profiler.format_report())
+
+
+def run_backfill(simulator, args):
+    """Load the history between the two --backfill dates, skipping partitions a previous run completed"""
+    metrics_start = simulator.metrics.snapshot()
+    simulator.shard.renew()
+    backfill = Backfill.from_config(
+        simulator, args.backfill[0], args.backfill[1], rate=args.rate, interval=args.interval,
+        partition=args.partition, tables=args.tables, workers=args.workers
+    )
+    with tqdm(total=len(backfill.partitions) * len(backfill.tables), desc="Backfilling partitions",
+              unit="partition") as progress:
+        progress.update(sum(len(backfill.partitions) - len(backfill.pending(table)) for table in backfill.tables))
+        report = backfill.run(on_partition=lambda table: progress.update())
+
+    print(f"Backfill {report['start']} .. {report['end']}: {report['loaded']} partitions loaded "
+          f"({report['rows']} rows) in {report['seconds']:.1f}s, {report['skipped']} already done")
+    if report['failed']:
+        print(f"Failed partitions (rerun to retry): {report['failed']}, skipped tables: {report['skipped_tables']}")
+    simulator.save_state()
+    report_metrics(simulator, since=metrics_start)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate simulated data and load it into Vertica")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Stay resident and run on cron_schedule, keeping connections and caches warm")
+    parser.add_argument('--continuous', action='store_true',
+                        help="Stream every table continuously at the rates under 'continuous' in config.yaml")
+    parser.add_argument('--duration', type=float, help="Stop continuous mode after this many seconds")
+    parser.add_argument('--backfill', nargs=2, metavar=('START', 'END'),
+                        help="Load history from START to END (ISO dates, local time) by time partition "
+                             "(see 'backfill' in config.yaml), then exit")
+    parser.add_argument('--rate', type=int, help="Backfill rows per table per --interval")
+    parser.add_argument('--interval', help="Duration --rate is given for, e.g. 1h")
+    parser.add_argument('--partition', help="Backfill partition length, e.g. 1d")
+    parser.add_argument('--tables', nargs='+', help="Tables to backfill (default: the tables in config.yaml)")
+    parser.add_argument('--workers', type=int, help="Backfill partitions loaded at once")
+    parser.add_argument('--profile', action='store_true',
+                        help="Report the generation cost of every column (see 'profiling' in config.yaml)")
+    parser.add_argument('--config', default=get_config_path("config.yaml"), help="Path to config.yaml")
+    args = parser.parse_args()
+
+    simulator = DataSimulator(args.config)
+    if args.profile and simulator.profiler is None:
+        simulator.enable_profiling()
+    # Long-running modes expose Prometheus metrics; one-shot runs only print the summary
+    server = MetricsServer.from_config(simulator.metrics, simulator.config) if args.continuous or args.daemon else None
+    try:
+        if server:
+            server.start()
+        if args.continuous:
+            runner = ContinuousRunner.from_config(simulator)
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda signum, frame: runner.stop())
+            runner.run(duration=args.duration)
+            runner.log_report()
+            report_metrics(simulator)
+            if simulator.profiler is not None:
+                print(simulator.profiler.format_report())
+        elif args.backfill:
+            run_backfill(simulator, args)
+        elif args.daemon:
+            lease_lost = []
+
+            def tick(scheduled):
+                try:
+                    run_tick(simulator)
+                except LeaseLost as e:
+                    # Another replica may own the shard now; exit so a restart claims a free one
+                    lease_lost.append(e)
+                    scheduler.stop()
+                    raise
+
+            scheduler = Scheduler.from_config(tick, simulator.config)
+            scheduler.install_signal_handlers()
+            scheduler.run_forever()
+            print(f"Scheduler: {scheduler.stats()}")
+            if lease_lost:
+                raise lease_lost[0]
+        else:
+            run_tick(simulator)
+    finally:
+        # Save state, hand a leased shard back and close connections
+        simulator.close()
+        if server:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+CREATE TABLE IF NOT EXISTS {{schema}}.{{lease_table}} (
+	shard_index INT NOT NULL PRIMARY KEY,
+	owner VARCHAR(255),
+	expires_at TIMESTAMP
+)
\ No newline at end of file
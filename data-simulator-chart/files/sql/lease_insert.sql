@@ -0,0 +1,3 @@
+INSERT INTO {{schema}}.{{lease_table}} (shard_index)
+SELECT {{shard_index}} FROM dual
+WHERE NOT EXISTS (SELECT 1 FROM {{schema}}.{{lease_table}} WHERE shard_index = {{shard_index}})
\ No newline at end of file
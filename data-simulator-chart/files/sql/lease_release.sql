@@ -0,0 +1,3 @@
+UPDATE {{schema}}.{{lease_table}}
+SET owner = NULL, expires_at = NULL
+WHERE shard_index = {{shard_index}} AND owner = :owner
\ No newline at end of file
@@ -0,0 +1,4 @@
+SELECT DISTINCT {{column}}
+	FROM {{schema}}.{{table_name}}
+WHERE {{column}} IS NOT NULL{% if after %} AND {{column}} > :after{% endif %}
+ORDER BY {{column}}{% if limit %} limit {{limit}}{% endif %}
\ No newline at end of file
@@ -0,0 +1,2 @@
+SELECT MAX({{column}})
+	FROM {{schema}}.{{table_name}}
\ No newline at end of file
@@ -2,5 +2,6 @@ from data_simulator.generate_data import DataSimulator
 from data_simulator.db_operations import VerticaDB
 from data_simulator.xml_to_yaml import ConfigGenerator
 from data_simulator.utils import get_config_path
+from data_simulator.batch import ColumnarBatch
 
-__all__ = ["DataSimulator", "VerticaDB", "ConfigGenerator", "get_config_path"]
\ No newline at end of file
+__all__ = ["DataSimulator", "VerticaDB", "ConfigGenerator", "ColumnarBatch", "get_config_path"]
\ No newline at end of file
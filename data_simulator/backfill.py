@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from data_simulator.sinks import VerticaSink
+from data_simulator.table_scheduler import TableScheduler
+from data_simulator.timestamps import parse_bound
+
+logger = logging.getLogger(__name__)
+
+
+def parse_duration(spec) -> timedelta:
+    """Positive duration such as "1d", "6h", "15m" or a number of seconds"""
+    relative, seconds = parse_bound(spec)
+    if not relative or seconds <= 0:
+        raise ValueError(f"Expected a positive duration such as '1d' or '6h', got {spec!r}")
+    return timedelta(seconds=seconds)
+
+
+def parse_time(spec) -> datetime:
+    """Naive local datetime from an ISO date or datetime, as the timestamp columns are written in local time"""
+    return spec if isinstance(spec, datetime) else datetime.fromisoformat(str(spec))
+
+
+def time_partitions(start: datetime, end: datetime, size: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Consecutive [start, end) windows of ``size`` covering the range; the last one may be shorter"""
+    if end <= start:
+        raise ValueError(f"Backfill end {end} is not after its start {start}")
+    partitions = []
+    while start < end:
+        partitions.append((start, min(start + size, end)))
+        start += size
+    return partitions
+
+
+class BackfillState:
+    """
+    Completed partitions of a backfill, persisted as JSON so a rerun skips them.
+
+    A partition is recorded only after its rows are committed (or its files
+    renamed into place), so an interrupted run resumes with the partitions
+    that were in flight.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: JSON state file; None keeps the state in memory only
+        """
+        self.path = Path(path) if path else None
+        self._lock = Lock()
+        self.partitions = self._load()
+
+    @staticmethod
+    def key(table: str, start: datetime, end: datetime) -> str:
+        return f"{table}/{start:%Y-%m-%dT%H:%M:%S}/{end:%Y-%m-%dT%H:%M:%S}"
+
+    def is_done(self, table: str, start: datetime, end: datetime) -> bool:
+        return self.key(table, start, end) in self.partitions
+
+    def mark_done(self, table: str, start: datetime, end: datetime, rows: int):
+        with self._lock:
+            self.partitions[self.key(table, start, end)] = {
+                'rows': rows, 'finished_at': datetime.now().isoformat(timespec='seconds')
+            }
+            self._save()
+
+    def _save(self):
+        """Write the state atomically"""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'partitions': self.partitions}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> Dict[str, dict]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f).get('partitions', {})
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable backfill state {self.path}: {e}")
+            return {}
+
+
+class Backfill:
+    """
+    Loads history for a date range, one time partition at a time.
+
+    The range is split into partitions of ``partition`` (e.g. one day, to
+    match the partition expression of the Vertica projections). Each
+    partition of each table gets ``rate`` rows per ``interval``, with its
+    timestamp columns spread over the partition, and is loaded in one COPY
+    transaction on its own pooled connection (or written as its own files
+    into the partition's directory), so it either lands whole or not at all.
+
+    Tables are loaded in foreign key order by ``TableScheduler``; the
+    partitions of the tables being loaded run on ``workers`` threads.
+    Completed partitions are recorded in the state file and skipped when the
+    same backfill runs again.
+    """
+
+    def __init__(self, simulator, start, end, rate: int, interval='1h', partition='1d',
+                 tables: Optional[List[str]] = None, workers: int = 4, batch_size: int = 5000,
+                 state_path: Optional[str] = None):
+        """
+        Args:
+            simulator: DataSimulator generating and loading the rows
+            start: First moment of the range (date, datetime or ISO string, local time)
+            end: End of the range, exclusive
+            rate: Rows per table per ``interval``
+            interval: Duration ``rate`` is given for, e.g. "1h"
+            partition: Duration of one partition, e.g. "1d"
+            tables: Tables to backfill; defaults to the ``tables`` list of config.yaml
+            workers: Partitions loaded at once
+            batch_size: Rows per generated batch (and COPY statement)
+            state_path: JSON file recording the completed partitions
+        """
+        self.simulator = simulator
+        self.start = parse_time(start)
+        self.end = parse_time(end)
+        self.rate = rate
+        self.interval = parse_duration(interval)
+        self.partitions = time_partitions(self.start, self.end, parse_duration(partition))
+        self.tables = list(tables or simulator.config.get('tables', []))
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.state = BackfillState(state_path)
+        self.loaded = {}
+        self.partitions_loaded = 0
+        self.skipped = 0
+        self.failed = []
+        self._lock = Lock()
+        self._on_partition = None
+
+    @classmethod
+    def from_config(cls, simulator, start, end, **overrides) -> "Backfill":
+        """Backfill with the defaults of the ``backfill`` section of config.yaml; None overrides are ignored"""
+        backfill_config = simulator.config.get('backfill', {})
+        options = dict(
+            rate=backfill_config.get('rate', 1000),
+            interval=backfill_config.get('interval', '1h'),
+            partition=backfill_config.get('partition', '1d'),
+            tables=backfill_config.get('tables'),
+            workers=backfill_config.get('workers', 4),
+            batch_size=backfill_config.get('batch_size', 5000),
+            state_path=backfill_config.get('state_path')
+        )
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(simulator, start, end, **options)
+
+    def rows_for(self, start: datetime, end: datetime) -> int:
+        """This replica's rows of one partition"""
+        rows = round(self.rate * (end - start).total_seconds() / self.interval.total_seconds())
+        return self.simulator.shard.rows_for(rows)
+
+    def pending(self, table: str) -> List[Tuple[datetime, datetime]]:
+        return [(start, end) for start, end in self.partitions if not self.state.is_done(table, start, end)]
+
+    def _load_partition(self, table: str, start: datetime, end: datetime) -> int:
+        simulator = self.simulator
+        rows = self.rows_for(start, end)
+        batches = simulator.iter_batches(table, rows, self.batch_size, window=(start.timestamp(), end.timestamp()))
+        if isinstance(simulator.sink, VerticaSink):
+            # One transaction per partition, so a failed partition leaves no rows behind and is simply rerun
+            loaded = simulator.db.stream_insert(table, batches)
+        else:
+            loaded = simulator.sink.write(table, batches, self.batch_size, partition_time=start)
+        self.state.mark_done(table, start, end, loaded)
+        simulator.metrics.inc('partitions_loaded_total', table=table)
+        with self._lock:
+            self.partitions_loaded += 1
+        return loaded
+
+    def _load_table(self, executor: ThreadPoolExecutor, table: str) -> int:
+        """Load every pending partition of a table, raising if any of them failed"""
+        partitions = self.pending(table)
+        with self._lock:
+            self.skipped += len(self.partitions) - len(partitions)
+        futures = {executor.submit(self._load_partition, table, start, end): (start, end)
+                   for start, end in partitions}
+        wait(futures)
+
+        rows = 0
+        errors = []
+        for future, (start, end) in futures.items():
+            try:
+                rows += future.result()
+            except Exception as e:
+                errors.append(e)
+                with self._lock:
+                    self.failed.append(self.state.key(table, start, end))
+                logger.error(f"Backfill of {table} from {start} to {end} failed: {e}")
+            if self._on_partition:
+                self._on_partition(table)
+        with self._lock:
+            self.loaded[table] = self.loaded.get(table, 0) + rows
+        if errors:
+            # Tables referencing this one are skipped, as their keys could point at missing rows
+            raise RuntimeError(f"{len(errors)} of {len(partitions)} partitions of {table} failed") from errors[0]
+        return rows
+
+    def run(self, on_partition: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        Load every pending partition of every table.
+
+        Args:
+            on_partition: Called with the table name as each partition
+                finishes, loaded or failed
+
+        Returns:
+            dict: Partition and row counts, failed partitions and wall time
+        """
+        self._on_partition = on_partition
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backfill') as executor:
+            scheduler = TableScheduler.from_config(self.simulator, lambda table: self._load_table(executor, table))
+            scheduler.run(self.tables)
+        report = {
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'partitions': len(self.partitions) * len(self.tables),
+            'skipped': self.skipped,
+            'loaded': self.partitions_loaded,
+            'failed': sorted(self.failed),
+            'skipped_tables': sorted(scheduler.skipped),
+            'rows': sum(self.loaded.values()),
+            'seconds': time.monotonic() - started
+        }
+        logger.info(f"Backfill loaded {report['loaded']} partitions ({report['rows']} rows) in "
+                    f"{report['seconds']:.1f}s; {report['skipped']} already done, {len(report['failed'])} failed")
+        return report
@@ -0,0 +1,91 @@
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+class ColumnarBatch:
+    """
+    A batch of rows stored column by column.
+
+    Holds the column order once plus one value sequence per column, instead of
+    one dict per row. Indexing and iteration still yield dicts so code written
+    against ``list[dict]`` batches keeps working.
+    """
+
+    __slots__ = ("columns", "values", "_length")
+
+    def __init__(self, columns: Sequence[str], values: Sequence[Sequence]):
+        """
+        Args:
+            columns: Column names, in load order
+            values: One value sequence per column, all of the same length
+        """
+        if len(columns) != len(values):
+            raise ValueError(f"Got {len(values)} value sequences for {len(columns)} columns")
+        self.columns = list(columns)
+        self.values = list(values)
+        self._length = len(self.values[0]) if self.values else 0
+        if any(len(column_values) != self._length for column_values in self.values):
+            raise ValueError("All columns of a batch must have the same length")
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict]) -> "ColumnarBatch":
+        """Build a batch from a list of dicts, using the keys of the first record as column order"""
+        if not records:
+            return cls([], [])
+        columns = list(records[0].keys())
+        return cls(columns, [[record.get(col) for record in records] for col in columns])
+
+    @classmethod
+    def concat(cls, batches: Iterable["ColumnarBatch"]) -> "ColumnarBatch":
+        """Join batches with identical columns into one"""
+        batches = [batch for batch in batches if batch]
+        if not batches:
+            return cls([], [])
+        columns = batches[0].columns
+        values = [[] for _ in columns]
+        for batch in batches:
+            if batch.columns != columns:
+                raise ValueError("Cannot concatenate batches with different columns")
+            for merged, column_values in zip(values, batch.values):
+                merged.extend(column_values)
+        return cls(columns, values)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict]:
+        columns = self.columns
+        return (dict(zip(columns, row)) for row in self.rows())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ColumnarBatch(self.columns, [column_values[index] for column_values in self.values])
+        return self.record(index)
+
+    def __repr__(self):
+        return f"ColumnarBatch({len(self.columns)} columns, {self._length} rows)"
+
+    def rows(self) -> Iterator[Tuple]:
+        """Iterate rows as tuples in column order"""
+        return zip(*self.values)
+
+    def record(self, index: int) -> Dict:
+        """Dict view of one row"""
+        return {col: column_values[index] for col, column_values in zip(self.columns, self.values)}
+
+    def column(self, name: str) -> Sequence:
+        return self.values[self.columns.index(name)]
+
+    def slice(self, start: int, stop: int) -> "ColumnarBatch":
+        return self[start:stop]
+
+    def to_records(self) -> List[Dict]:
+        return list(self)
+
+
+def split_batches(data, batch_size: int = 1000) -> Iterable[ColumnarBatch]:
+    """Batches of ``data``: records or a ColumnarBatch are sliced, any other iterable is taken as batches"""
+    if isinstance(data, list):
+        data = ColumnarBatch.from_records(data)
+    if isinstance(data, ColumnarBatch):
+        return (data.slice(i, i + batch_size) for i in range(0, len(data), batch_size))
+    return data
@@ -0,0 +1,153 @@
+import os
+import pickle
+import hashlib
+import logging
+from collections.abc import Mapping
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, Iterable, Optional
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# libyaml's loader is several times faster than the pure-Python one
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+SNAPSHOT_VERSION = 1
+
+
+class LazyConfigMap(Mapping):
+    """
+    Read-only mapping of config name -> config dict whose values stay
+    pickled until first accessed, so only the tables and columns a run
+    actually uses are deserialized.
+    """
+
+    def __init__(self, pickled: Dict[str, bytes]):
+        self._pickled = pickled
+        self._loaded = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._loaded[key]
+        except KeyError:
+            value = self._loaded[key] = pickle.loads(self._pickled[key])
+            return value
+
+    def __iter__(self):
+        return iter(self._pickled)
+
+    def __len__(self):
+        return len(self._pickled)
+
+    def __contains__(self, key):
+        return key in self._pickled
+
+
+class ConfigCache:
+    """
+    Compiled snapshot of the table and column YAMLs.
+
+    Every source file is parsed once into a pickled entry per table or
+    column, stored in ``snapshot_path`` together with the file's mtime, size
+    and SHA-1. On the next start a file whose mtime and size are unchanged is
+    taken from the snapshot without reading it; a file whose stamp changed is
+    hashed, and only re-parsed if its content changed too.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        """
+        Args:
+            snapshot_path: Snapshot file; None parses the YAMLs on every load
+        """
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._lock = Lock()
+        self._files = self._load_snapshot()
+        self.parsed = 0
+        self.reused = 0
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ConfigCache":
+        cache_config = config.get('config_cache', {})
+        if not cache_config.get('enabled', True):
+            return cls()
+        return cls(cache_config.get('path', '/tmp/data_simulator/config_cache.pickle'))
+
+    def _load_snapshot(self) -> Dict[str, dict]:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return {}
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable config snapshot {self.snapshot_path}: {e}")
+            return {}
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            return {}
+        return snapshot['files']
+
+    def _save_snapshot(self):
+        if self.snapshot_path is None:
+            return
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': SNAPSHOT_VERSION, 'files': self._files}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _entries(self, path: Path, kind: str, split: Callable[[dict], Dict[str, dict]]) -> Dict[str, bytes]:
+        """Pickled entries of one source file, from the snapshot when the file is unchanged"""
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        key = f"{kind}:{path.resolve()}"
+        cached = self._files.get(key)
+        if cached is not None and cached['stamp'] == stamp:
+            self.reused += 1
+            return cached['entries']
+
+        content = path.read_bytes()
+        digest = hashlib.sha1(content).hexdigest()
+        if cached is not None and cached['digest'] == digest:
+            # Touched but not edited
+            cached['stamp'] = stamp
+            self.reused += 1
+            return cached['entries']
+
+        data = yaml.load(content, Loader=YamlLoader) or {}
+        entries = {name: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                   for name, value in split(data).items()}
+        self._files[key] = {'stamp': stamp, 'digest': digest, 'entries': entries}
+        self.parsed += 1
+        return entries
+
+    def load(self, kind: str, paths: Iterable[Path], split: Callable[[dict], Dict[str, dict]]) -> LazyConfigMap:
+        """
+        Merge the entries of several YAML files into one lazy mapping.
+
+        Args:
+            kind: Namespace of the files in the snapshot ("tables", "columns")
+            paths: Source YAML files, merged in order (later files win)
+            split: Turns a parsed file into a dict of name -> config
+        """
+        paths = list(paths)
+        with self._lock:
+            parsed_before = self.parsed
+            stamps_before = {key: entry['stamp'] for key, entry in self._files.items()}
+            merged = {}
+            for path in paths:
+                merged.update(self._entries(Path(path), kind, split))
+            changed = self.parsed != parsed_before or any(
+                stamps_before.get(key) != entry['stamp'] for key, entry in self._files.items())
+
+            # Forget files that were removed from the config directory
+            current = {f"{kind}:{Path(path).resolve()}" for path in paths}
+            for key in [key for key in self._files if key.startswith(f"{kind}:") and key not in current]:
+                del self._files[key]
+                changed = True
+            if changed:
+                self._save_snapshot()
+        return LazyConfigMap(merged)
+
+    def stats(self) -> dict:
+        return {'files': len(self._files), 'parsed': self.parsed, 'reused': self.reused}
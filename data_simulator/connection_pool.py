@@ -0,0 +1,309 @@
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(TimeoutError):
+    """No connection became available within the acquire timeout"""
+
+
+class PoolClosed(RuntimeError):
+    """The pool was closed"""
+
+
+def is_closed(conn) -> bool:
+    """True if a connection is closed; vertica_python exposes ``closed()`` as a method"""
+    closed = getattr(conn, 'closed', False)
+    return closed() if callable(closed) else bool(closed)
+
+
+class _Pooled:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn, created_at):
+        self.conn = conn
+        self.created_at = created_at
+        self.last_used = created_at
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections with a hard size limit.
+
+    At most ``max_size`` connections exist at any time, whether idle, in use
+    or being opened. ``acquire`` hands out an idle connection, opens a new one
+    while under the limit, and otherwise blocks until one is released or
+    ``acquire_timeout`` expires. Connections are opened lazily; ``warmup``
+    opens a few of them in parallel in the background.
+
+    A connection idle for longer than ``validation_interval`` is checked with
+    ``validation_query`` before it is handed out. Closed, failing or expired
+    (``max_lifetime``) connections are evicted and transparently replaced,
+    so a database restart does not poison the pool.
+    """
+
+    def __init__(self, factory: Callable, max_size: int = 5, acquire_timeout: Optional[float] = 30.0,
+                 validation_query: str = 'SELECT 1', validation_interval: float = 30.0,
+                 max_lifetime: Optional[float] = None, warmup: int = 0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            factory: Zero-argument callable opening a new connection
+            max_size: Maximum number of connections, idle and in use
+            acquire_timeout: Seconds to wait for a connection (None waits forever)
+            validation_query: Query run to check an idle connection before reuse
+            validation_interval: Only validate connections idle for longer than this (0 always validates)
+            max_lifetime: Close connections older than this many seconds (None keeps them)
+            warmup: Connections to open in the background right away
+            clock: Monotonic clock, replaceable for testing
+        """
+        if max_size < 1:
+            raise ValueError("Connection pool size must be at least 1")
+        self.factory = factory
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.validation_query = validation_query
+        self.validation_interval = validation_interval
+        self.max_lifetime = max_lifetime
+        self.clock = clock
+
+        self._idle = deque()
+        self._in_use = {}
+        self._total = 0  # idle + in use + being opened
+        self._condition = Condition()
+        self._closed = False
+
+        self.created = 0
+        self.evicted = 0
+        self.validation_failures = 0
+        self.creation_failures = 0
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+        if warmup:
+            self.warmup(warmup)
+
+    @classmethod
+    def from_config(cls, factory: Callable, vertica_config: dict) -> "ConnectionPool":
+        return cls(
+            factory,
+            max_size=vertica_config.get('pool_size', 5),
+            acquire_timeout=vertica_config.get('pool_acquire_timeout', 30),
+            validation_interval=vertica_config.get('pool_validation_interval', 30),
+            max_lifetime=vertica_config.get('pool_max_lifetime'),
+            warmup=vertica_config.get('pool_warmup', 0)
+        )
+
+    def _open(self):
+        """Open a connection for a slot already counted in ``_total``"""
+        try:
+            conn = self.factory()
+        except Exception:
+            with self._condition:
+                self._total -= 1
+                self.creation_failures += 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.created += 1
+        return _Pooled(conn, self.clock())
+
+    def warmup(self, count: int):
+        """Open up to ``count`` idle connections in parallel, without blocking the caller"""
+        with self._condition:
+            count = min(count, self.max_size - self._total)
+            if count <= 0 or self._closed:
+                return
+            self._total += count
+
+        def open_idle():
+            try:
+                pooled = self._open()
+            except Exception as e:
+                logger.warning(f"Connection pool warmup failed: {e}")
+                return
+            with self._condition:
+                if self._closed:
+                    self._total -= 1
+                    _close_quietly(pooled.conn)
+                    return
+                self._idle.append(pooled)
+                self._condition.notify()
+
+        executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix='pool-warmup')
+        for _ in range(count):
+            executor.submit(open_idle)
+        executor.shutdown(wait=False)
+
+    def _healthy(self, pooled: _Pooled, now: float) -> bool:
+        if is_closed(pooled.conn):
+            return False
+        if self.max_lifetime is not None and now - pooled.created_at > self.max_lifetime:
+            return False
+        if now - pooled.last_used <= self.validation_interval:
+            return True
+        cursor = None
+        try:
+            cursor = pooled.conn.cursor()
+            cursor.execute(self.validation_query)
+            cursor.fetchall()
+            return True
+        except Exception as e:
+            self.validation_failures += 1
+            logger.warning(f"Evicting connection that failed validation: {e}")
+            return False
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def _evict(self, pooled: _Pooled):
+        _close_quietly(pooled.conn)
+        with self._condition:
+            self._total -= 1
+            self.evicted += 1
+            self._condition.notify()
+
+    def acquire(self, timeout: Optional[float] = -1):
+        """
+        Borrow a connection, opening or waiting for one as needed.
+
+        Args:
+            timeout: Seconds to wait; defaults to ``acquire_timeout``, None waits forever
+
+        Raises:
+            PoolTimeout: No connection became available in time
+        """
+        timeout = self.acquire_timeout if timeout == -1 else timeout
+        started = self.clock()
+        deadline = None if timeout is None else started + timeout
+        while True:
+            pooled = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolClosed("Connection pool is closed")
+                    if self._idle:
+                        pooled = self._idle.pop()  # most recently used first, so spare connections age out
+                        break
+                    if self._total < self.max_size:
+                        self._total += 1
+                        break
+                    remaining = None if deadline is None else deadline - self.clock()
+                    if remaining is not None and remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"No connection available within {timeout}s "
+                                          f"({self._total} of {self.max_size} in use)")
+                    self._condition.wait(remaining)
+
+            if pooled is None:
+                pooled = self._open()
+            elif not self._healthy(pooled, self.clock()):
+                self._evict(pooled)
+                continue
+
+            waited = self.clock() - started
+            with self._condition:
+                self._in_use[id(pooled.conn)] = pooled
+                self.acquisitions += 1
+                self.wait_time += waited
+                self.max_wait_time = max(self.max_wait_time, waited)
+            return pooled.conn
+
+    def acquire_many(self, count: int, timeout: Optional[float] = -1) -> list:
+        """
+        Borrow up to ``count`` connections without holding part of a set while waiting for the rest.
+
+        The first connection is waited for as in ``acquire``; the others are
+        taken only while one is idle or can be opened right away. Callers
+        sharing a bounded pool therefore cannot deadlock each other, each
+        holding some connections and waiting for more.
+
+        Raises:
+            PoolTimeout: Not even one connection became available in time
+        """
+        conns = [self.acquire(timeout)]
+        while len(conns) < count:
+            with self._condition:
+                available = self._idle or (self._total < self.max_size and not self._closed)
+            if not available:
+                break
+            try:
+                conns.append(self.acquire(0))
+            except PoolTimeout:
+                break  # Taken by another thread in the meantime
+            except Exception as e:
+                logger.warning(f"Continuing with {len(conns)} connection(s), opening another failed: {e}")
+                break
+        return conns
+
+    def release(self, conn, broken: bool = False):
+        """Return a borrowed connection; broken or closed connections are evicted instead"""
+        with self._condition:
+            pooled = self._in_use.pop(id(conn), None)
+        if pooled is None:
+            # Not ours (or released twice): just make sure it does not leak
+            if not broken and not is_closed(conn):
+                logger.warning("Closing a connection that was not borrowed from the pool")
+            _close_quietly(conn)
+            return
+        if broken or self._closed or is_closed(conn):
+            self._evict(pooled)
+            return
+        pooled.last_used = self.clock()
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = -1):
+        """Borrow a connection for the duration of a ``with`` block"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close idle connections; connections in use are closed when released"""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            _close_quietly(pooled.conn)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'total': self._total,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'created': self.created,
+                'evicted': self.evicted,
+                'validation_failures': self.validation_failures,
+                'creation_failures': self.creation_failures,
+                'acquisitions': self.acquisitions,
+                'timeouts': self.timeouts,
+                'avg_wait_seconds': self.wait_time / self.acquisitions if self.acquisitions else 0.0,
+                'max_wait_seconds': self.max_wait_time
+            }
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception as e:
+        logger.debug(f"Error closing connection: {e}")
@@ -0,0 +1,129 @@
+import re
+import time
+import zlib
+from typing import List, Sequence
+
+from data_simulator.batch import ColumnarBatch
+
+COMPRESSIONS = ('none', 'gzip')
+
+# Characters that force a text value to be enclosed, as csv.QUOTE_MINIMAL does
+_NEEDS_QUOTING = re.compile(r'[,"\r\n]')
+
+# Values that may need enclosing, so a column holding any of them is not encoded with a plain ``map(str)``
+_TEXT_TYPES = (str, bytes, bytearray)
+
+
+def encode_column(values: Sequence) -> List[str]:
+    """
+    Encode one column of values as COPY text fields.
+
+    The formatter is picked once per column from its first non-null value:
+    text columns are passed through untouched unless some value needs
+    enclosing, every other type goes through a single ``map(str)`` unless
+    the column also holds text, which is then encoded value by value. NULL
+    is written as an empty field, an empty string as ``""``.
+    """
+    first = next((value for value in values if value is not None), None)
+    if first is None:
+        return [''] * len(values)
+    if isinstance(first, str):
+        return _encode_text(values)
+    if any(issubclass(kind, _TEXT_TYPES) for kind in set(map(type, values))):
+        # Bytes, or text after a non-text first value, e.g. a choice of mixed values
+        return [_encode_value(value) for value in values]
+    if None in values:
+        return ['' if value is None else str(value) for value in values]
+    return list(map(str, values))
+
+
+def _encode_text(values):
+    try:
+        joined = ''.join(values)  # Fails fast on None or non-text values
+    except TypeError:
+        return [_encode_value(value) for value in values]
+    if _NEEDS_QUOTING.search(joined) is None and '' not in values:
+        return values
+    return [_quote_text(value) for value in values]
+
+
+def _quote_text(value):
+    if value == '' or _NEEDS_QUOTING.search(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _encode_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return _quote_text(value)
+    if isinstance(value, (bytes, bytearray)):
+        return _quote_text(value.decode('utf-8', 'replace'))
+    return str(value)
+
+
+def encode_rows(batch: ColumnarBatch, start: int = 0, stop: int = None) -> bytes:
+    """Encode rows ``start:stop`` of a batch as newline-terminated COPY records"""
+    stop = len(batch) if stop is None else stop
+    columns = [encode_column(values[start:stop]) for values in batch.values]
+    text = '\n'.join(map(','.join, zip(*columns)))
+    return (text + '\n').encode('utf-8') if text else b''
+
+
+class CopyStream:
+    """
+    File-like COPY payload for one batch.
+
+    Rows are encoded ``chunk_rows`` at a time into a single reusable
+    bytearray as ``cursor.copy`` reads, so the whole batch never exists as
+    one string plus one bytes object. With ``compression='gzip'`` the chunks
+    are gzip-compressed on the fly for ``COPY ... FROM STDIN GZIP``.
+    """
+
+    def __init__(self, batch: ColumnarBatch, chunk_rows: int = 4096, compression: str = 'none',
+                 compresslevel: int = 1):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported COPY compression: {compression}")
+        self.batch = batch
+        self.chunk_rows = chunk_rows
+        self._next_row = 0
+        self._buffer = bytearray()
+        self._compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31) if compression == 'gzip' else None
+        self._finished = False
+        self.raw_bytes = 0   # Encoded bytes before compression
+        self.bytes_sent = 0  # Bytes handed to the reader
+        self.encode_seconds = 0.0  # Time spent encoding and compressing, as opposed to waiting on the reader
+
+    def _fill(self):
+        started = time.perf_counter()
+        if self._next_row < len(self.batch):
+            stop = min(self._next_row + self.chunk_rows, len(self.batch))
+            chunk = encode_rows(self.batch, self._next_row, stop)
+            self._next_row = stop
+            self.raw_bytes += len(chunk)
+            self._buffer += self._compressor.compress(chunk) if self._compressor else chunk
+        else:
+            if self._compressor:
+                self._buffer += self._compressor.flush()
+            self._finished = True
+        self.encode_seconds += time.perf_counter() - started
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._finished and (size is None or size < 0 or len(self._buffer) < size):
+            self._fill()
+        if size is None or size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        self.bytes_sent += len(data)
+        return data
+
+    def readable(self):
+        return True
+
+    def close(self):
+        self._buffer.clear()
+        self._finished = True
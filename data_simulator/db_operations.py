@@ -2,18 +2,22 @@ import yaml
 from pathlib import Path
 from vertica_python import connect
 from threading import Lock
+from queue import Queue
 from jinja2 import Template
-from io import StringIO
-import csv
+import time
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from data_simulator.batch import ColumnarBatch, split_batches
+from data_simulator.copy_encoder import CopyStream
+from data_simulator.connection_pool import ConnectionPool, is_closed
+from data_simulator.metrics import MetricsRegistry
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class VerticaDB:
-    def __init__(self, config_path):
+    def __init__(self, config_path, connection_factory=None):
         """
         Initialize VerticaDB with flexible path handling.
         
@@ -22,16 +26,32 @@ class VerticaDB:
                 - Absolute path (/path/to/config.yaml)
                 - Relative path from project root (config/config.yaml)
                 - Relative path from calling script
+            connection_factory: Zero-argument callable opening a connection;
+                defaults to vertica_python.connect with the vertica settings
         """
         # Try multiple path resolution strategies
         self.config_path = self._resolve_config_path(config_path)
         self.config = self._load_config()
         self.schema = self.config['vertica'].get('schema', 'public')
-        self.connection_pool = []
         self.pool_lock = Lock()
-        self._init_pool()
+        # Bounded pool, connections are opened lazily (pool_warmup opens some in the background)
+        self.pool = ConnectionPool.from_config(connection_factory or self._create_connection, self.config['vertica'])
         self.sql_templates = self._load_sql_templates()
-        self.executor = ThreadPoolExecutor(max_workers=self.config['vertica'].get('max_workers', 4))
+        # Per-table stage timings and load counters, shared with DataSimulator
+        self.metrics = MetricsRegistry.from_config(self.config)
+        self.metrics.register_collector('pool', self.pool.stats)
+        self.max_workers = self.config['vertica'].get('max_workers', 4)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        # Parallel COPY settings (see parallel_batch_insert)
+        self.parallel_copy = self.config['vertica'].get('parallel_copy', False)
+        self.copy_commit_mode = self.config['vertica'].get('copy_commit_mode', 'connection')
+        self.reject_max = self.config['vertica'].get('reject_max', 0)
+
+        # COPY payload encoding (see copy_encoder.CopyStream)
+        self.copy_compression = self.config['vertica'].get('copy_compression', 'none')
+        self.copy_chunk_rows = self.config['vertica'].get('copy_chunk_rows', 4096)
+        self.copy_buffer_size = self.config['vertica'].get('copy_buffer_size', 128 * 1024)
 
     def _resolve_config_path(self, config_path):
         """Resolve config path using multiple strategies for installed packages"""
@@ -118,24 +138,21 @@ class VerticaDB:
             tlsmode='disable'
         )
 
-    def _init_pool(self):
-        with self.pool_lock:
-            for _ in range(self.config['vertica']['pool_size']):
-                self.connection_pool.append(self._create_connection())
-
-    def get_connection(self):
-        with self.pool_lock:
-            if not self.connection_pool:
-                return self._create_connection()
-            return self.connection_pool.pop()
-
-    def release_connection(self, conn):
-        with self.pool_lock:
-            if len(self.connection_pool) < self.config['vertica']['pool_size']:
-                self.connection_pool.append(conn)
-            else:
-                logger.info(f"Connection pool size: {len(self.connection_pool)}")
-                conn.close()
+    def get_connection(self, timeout=-1):
+        """Borrow a connection, blocking up to the pool's acquire timeout when all are in use"""
+        return self.pool.acquire(timeout)
+
+    def release_connection(self, conn, broken=False):
+        """Return a connection to the pool; broken connections are replaced on a later borrow"""
+        self.pool.release(conn, broken)
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    def close(self):
+        """Stop the executor and close every pooled connection"""
+        self.executor.shutdown(wait=True)
+        self.pool.close()
 
     def execute_query(self, template_name, params=None, data=None):
         conn = self.get_connection()
@@ -145,7 +162,7 @@ class VerticaDB:
             query = template.render(**(params or {}))
             # logger.info(f"Executing query: {query}")
             cursor.execute(query, data)
-            if template_name == 'read':
+            if template_name.startswith('read'):
                 return cursor.fetchall()
             else:
                 conn.commit()
@@ -158,6 +175,29 @@ class VerticaDB:
             cursor.close()
             self.release_connection(conn)
 
+    def stream_query(self, template_name, params=None, data=None):
+        """
+        Run a read template and yield its rows as the server sends them.
+
+        The connection is held until the generator is exhausted or closed,
+        so large results never have to fit in memory at once.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            template = self.sql_templates[template_name]
+            query = template.render(**(params or {}))
+            cursor.execute(query, data)
+            for row in cursor.iterate():
+                yield row
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error streaming query: {e}")
+            raise e
+        finally:
+            cursor.close()
+            self.release_connection(conn)
+
     def execute_parallel(self, queries):
         futures = []
         for query in queries:
@@ -187,6 +227,40 @@ class VerticaDB:
         }
         return self.execute_query('read', params)
 
+    def read_keys(self, table_name, column, after=None, limit=None, stream=False):
+        """
+        Read distinct non-null values of a key column in key order.
+
+        Args:
+            table_name (str): Referenced table
+            column (str): Key column
+            after: Only return keys greater than this value (keyset pagination)
+            limit (int): Maximum number of keys to return
+            stream (bool): Yield rows through one server-side cursor instead of
+                fetching them all
+        """
+        params = {
+            'schema': self.schema,  # Pass schema to the template
+            'table_name': table_name,
+            'column': column,
+            'after': after is not None,
+            'limit': limit
+        }
+        data = {'after': after} if after is not None else None
+        if stream:
+            return self.stream_query('read_keys', params, data)
+        return self.execute_query('read_keys', params, data)
+
+    def max_value(self, table_name, column):
+        """Current maximum of a column, or None for an empty table"""
+        params = {
+            'schema': self.schema,  # Pass schema to the template
+            'table_name': table_name,
+            'column': column
+        }
+        rows = self.execute_query('read_max', params)
+        return rows[0][0] if rows else None
+
     def update(self, table_name, data, condition):
         params = {
             'schema': self.schema,  # Pass schema to the template
@@ -209,7 +283,7 @@ class VerticaDB:
         Bulk insert data using Vertica's COPY command
         Args:
             table_name (str): Name of the table
-            data (list[dict]): List of dictionaries to insert
+            data (ColumnarBatch | list[dict]): Records to insert
             batch_size (int): Number of records per batch
         Returns:
             int: Total number of inserted rows
@@ -217,12 +291,31 @@ class VerticaDB:
         if not data:
             return 0
 
+        # Split data into batches
+        return self.stream_insert(table_name, split_batches(data, batch_size))
+
+    def stream_insert(self, table_name, batches, commit_every=None):
+        """
+        COPY batches into a table as they arrive from an iterable.
+
+        Only the batch currently being copied is held here, so a generator of
+        batches can be loaded with bounded memory.
+
+        Args:
+            table_name (str): Name of the table
+            batches (Iterable[ColumnarBatch | list[dict]]): Batches of records to insert
+            commit_every (int): Commit after this many batches; by default the
+                whole stream is loaded in one transaction
+        Returns:
+            int: Total number of inserted rows
+        """
         conn = self.get_connection()
         # if conn.closed:
         #     raise ValueError("Connection is closed")
             
         cursor = conn.cursor()
         total_rows = 0
+        committed_rows = 0
         
         try:
             # Check transaction state
@@ -230,54 +323,212 @@ class VerticaDB:
                 # Disable autocommit
                 conn.autocommit = False
             
-            # Split data into batches
-            for i in range(0, len(data), batch_size):
-                batch = data[i:i+batch_size]
-                columns = list(batch[0].keys())
-                
-                # Create in-memory CSV buffer
-                csv_buffer = StringIO()
-                writer = csv.writer(csv_buffer, delimiter=',', quoting=csv.QUOTE_MINIMAL)
-                
-                for record in batch:
-                    writer.writerow([record.get(col) for col in columns])
-                
-                csv_data = csv_buffer.getvalue()
-                csv_buffer.seek(0)
-
-                # Build COPY command with schema
-                copy_query = f"""
-                    COPY {self.schema}.{table_name} ({', '.join(columns)})
-                    FROM STDIN 
-                    DELIMITER ',' 
-                    ENCLOSED BY '"'
-                    NULL ''
-                    SKIP 0 
-                    REJECTMAX 0
-                    DIRECT
-                """
-                
-                # Execute COPY command
-                cursor.copy(copy_query, csv_data)
-                total_rows += len(batch)
-                csv_buffer.close()
+            for batch_number, batch in enumerate(batches, start=1):
+                if not batch:
+                    continue
+                total_rows += self._copy_batch(cursor, table_name, batch)
+                if commit_every and batch_number % commit_every == 0:
+                    self._commit(conn, table_name, total_rows - committed_rows)
+                    committed_rows = total_rows
                 
             # Explicitly commit the transaction
-            conn.commit()
+            self._commit(conn, table_name, total_rows - committed_rows)
             return total_rows
             
         except Exception as e:
             # Rollback on error
-            if not conn.closed:
+            if not is_closed(conn):
                 conn.rollback()
+            self.metrics.inc('load_errors_total', table=table_name)
             logger.error(f"Error during batch insert: {e}")
             raise e
         finally:
             # Reset autocommit to default
-            if not conn.closed:
+            if not is_closed(conn):
                 conn.autocommit = True
                 cursor.close()
-                self.release_connection(conn)
+            self.release_connection(conn)
+
+    def parallel_batch_insert(self, table_name, data, batch_size=1000, connections=None,
+                              commit_mode=None, reject_max=None):
+        """
+        Bulk insert data by fanning COPY batches out across pooled connections.
+
+        Batches are loaded on the executor, each one on whichever of the
+        borrowed connections is free, so a multi-node cluster ingests on
+        several sessions at once.
+
+        Args:
+            table_name (str): Name of the table
+            data (ColumnarBatch | list[dict] | Iterable[ColumnarBatch]): Records,
+                or an iterable of batches
+            batch_size (int): Number of records per batch when ``data`` holds records
+            connections (int): Most connections to load on; defaults to the pool
+                size, capped by the executor's worker count. Only the first one is
+                waited for, the load continues on those free at the time
+            commit_mode (str): "connection" commits every batch on its own
+                connection, so a failure only loses that batch; "atomic" commits
+                all connections only if every batch succeeded
+            reject_max (int): Maximum rejected rows across all connections;
+                0 means unlimited, as in Vertica's REJECTMAX
+        Returns:
+            dict: ``rows`` and ``rejected`` totals, plus per-connection
+                ``connections`` row counts
+        """
+        commit_mode = commit_mode or self.copy_commit_mode
+        if commit_mode not in ('connection', 'atomic'):
+            raise ValueError(f"Unsupported commit mode: {commit_mode}")
+        reject_max = self.reject_max if reject_max is None else reject_max
+
+        if isinstance(data, (list, ColumnarBatch)):
+            batches = split_batches(data, batch_size)
+        else:
+            batches = data
+
+        # Take the connections that are free now (waiting only for the first), so that tables loading
+        # concurrently never each hold part of a set and wait on one another
+        num_connections = min(connections or self.pool.max_size, self.max_workers, self.pool.max_size)
+        conns = self.pool.acquire_many(max(1, num_connections))
+        if len(conns) < num_connections:
+            logger.debug(f"Loading {table_name} on {len(conns)} of {num_connections} connections")
+        cursors = []
+        try:
+            for conn in conns:
+                if conn.autocommit:
+                    conn.autocommit = False
+                cursors.append(conn.cursor())
+        except Exception:
+            for conn in conns:
+                self.release_connection(conn, broken=True)
+            raise
+
+        idle = Queue()
+        for index in range(len(conns)):
+            idle.put(index)
+        loaded = [0] * len(conns)
+        rejected = [0] * len(conns)
+        errors = []
+
+        def load(batch):
+            # Only one task holds a connection index at a time, so its counters need no lock
+            index = idle.get()
+            try:
+                cursor = cursors[index]
+                self._copy_batch(cursor, table_name, batch, reject_max)
+                batch_rejected = self._rejected_rows(cursor)
+                if batch_rejected:
+                    self.metrics.inc('rows_rejected_total', batch_rejected, table=table_name)
+                if commit_mode == 'connection':
+                    self._commit(conns[index], table_name, len(batch) - batch_rejected)
+                loaded[index] += len(batch) - batch_rejected
+                rejected[index] += batch_rejected
+            except Exception as e:
+                if commit_mode == 'connection':
+                    conns[index].rollback()
+                self.metrics.inc('load_errors_total', table=table_name)
+                errors.append(e)
+                raise
+            finally:
+                idle.put(index)
+
+        def over_limit():
+            return reject_max and sum(rejected) > reject_max
+
+        pending = set()
+        try:
+            for batch in batches:
+                if (errors and commit_mode == 'atomic') or over_limit():
+                    break  # The load will fail, stop queueing work
+                if not batch:
+                    continue
+                pending.add(self.executor.submit(load, batch))
+                # Keep at most two batches per connection in memory
+                if len(pending) >= 2 * len(conns):
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            wait(pending)
+
+            if errors and commit_mode == 'atomic':
+                raise errors[0]
+            if over_limit():
+                raise ValueError(f"Rejected {sum(rejected)} rows loading {table_name}, more than REJECTMAX {reject_max}")
+            if commit_mode == 'atomic':
+                for conn in conns:
+                    self._commit(conn, table_name)
+                self.metrics.inc('rows_loaded_total', sum(loaded), table=table_name)
+            if errors:
+                raise errors[0]
+
+            return {
+                'rows': sum(loaded),
+                'rejected': sum(rejected),
+                'connections': dict(enumerate(loaded))
+            }
+
+        except Exception as e:
+            for future in pending:
+                future.cancel()
+            for conn in conns:
+                if not is_closed(conn):
+                    conn.rollback()
+            logger.error(f"Error during parallel batch insert: {e}")
+            raise e
+        finally:
+            for conn, cursor in zip(conns, cursors):
+                try:
+                    if not is_closed(conn):
+                        conn.autocommit = True
+                        cursor.close()
+                except Exception as e:
+                    logger.warning(f"Discarding connection that failed to reset: {e}")
+                    self.release_connection(conn, broken=True)
+                else:
+                    self.release_connection(conn)
+
+    def _commit(self, conn, table_name, rows=0):
+        """Commit a load transaction, counting its ``rows`` as loaded"""
+        started = time.perf_counter()
+        conn.commit()
+        self.metrics.stage(table_name, 'commit', time.perf_counter() - started)
+        if rows:
+            self.metrics.inc('rows_loaded_total', rows, table=table_name)
+
+    def _rejected_rows(self, cursor):
+        """Number of rows rejected by the last COPY on this cursor's session"""
+        cursor.execute("SELECT GET_NUM_REJECTED_ROWS()")
+        row = cursor.fetchone()
+        return row[0] if row and row[0] else 0
+
+    def _copy_batch(self, cursor, table_name, batch, reject_max=0):
+        """COPY one batch of records through an open cursor and return its row count"""
+        if not isinstance(batch, ColumnarBatch):
+            batch = ColumnarBatch.from_records(batch)
+        columns = batch.columns
+        
+        # Rows are encoded chunk by chunk while cursor.copy reads the stream
+        stream = CopyStream(batch, chunk_rows=self.copy_chunk_rows, compression=self.copy_compression)
+        compression = ' GZIP' if self.copy_compression == 'gzip' else ''
+
+        # Build COPY command with schema
+        copy_query = f"""
+            COPY {self.schema}.{table_name} ({', '.join(columns)})
+            FROM STDIN{compression}
+            DELIMITER ',' 
+            ENCLOSED BY '"'
+            NULL ''
+            SKIP 0 
+            REJECTMAX {reject_max}
+            DIRECT
+        """
+        
+        # Execute COPY command; encoding happens inside it, so it is timed separately
+        started = time.perf_counter()
+        cursor.copy(copy_query, stream, buffer_size=self.copy_buffer_size)
+        elapsed = time.perf_counter() - started
+        stream.close()
+        self.metrics.stage(table_name, 'encode', stream.encode_seconds)
+        self.metrics.stage(table_name, 'copy', elapsed - stream.encode_seconds)
+        self.metrics.inc('bytes_loaded_total', stream.bytes_sent, table=table_name)
+        return len(batch)
 
 # Example Usage
 if __name__ == "__main__":
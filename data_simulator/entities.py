@@ -0,0 +1,249 @@
+import random
+import logging
+from array import array
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # only needed for vectorized sampling
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Context key of the session indexes drawn for the current batch
+SESSION_INDEX = ('entity', 'session')
+
+# Entity attributes and the level they are stored at
+ATTRIBUTES = {
+    'imsi': 'subscriber',
+    'msisdn': 'subscriber',
+    'imei': 'subscriber',
+    'session_id': 'session',
+    'apn': 'session',
+    'mcc': 'cell',
+    'mnc': 'cell',
+    'lac': 'cell',
+    'tac': 'cell',
+    'cell_id': 'cell',
+    'cgi': 'cell',
+}
+
+# Column types that take the numeric form of an attribute; every other type gets text
+NUMERIC_TYPES = ('numeric', 'int', 'integer', 'bigint', 'float')
+
+
+def _luhn_digit(number: int) -> int:
+    """Check digit completing ``number`` (the first 14 digits of an IMEI)"""
+    total = 0
+    for position, digit in enumerate(reversed(str(number))):
+        if position % 2 == 0:
+            digit = int(digit) * 2
+            total += digit - 9 if digit > 9 else digit
+        else:
+            total += int(digit)
+    return (10 - total % 10) % 10
+
+
+class EntityPool:
+    """
+    Subscriber and session population shared by every table of a run.
+
+    Subscribers (IMSI, MSISDN, IMEI), their sessions (session id, APN,
+    serving cell) and cells (MCC, MNC, LAC, TAC, cell id, CGI) are generated
+    once into flat arrays. A batch draws one session index per row, and every
+    identity column of the row is looked up from it, so the same IMSI,
+    session id and cell appear together in every CDR table and joins across
+    tables hit.
+    """
+
+    def __init__(self, subscribers: int = 2000, sessions_per_subscriber: int = 2, cells: int = 500,
+                 plmns: Optional[List] = None, msisdn_prefix: str = '91', apns: Optional[List[str]] = None,
+                 session_id_start: int = 1, skew: float = 0.0, seed: Optional[int] = 0,
+                 columns: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            subscribers: Number of subscribers
+            sessions_per_subscriber: Sessions opened by each subscriber
+            cells: Number of cells, spread over the PLMNs
+            plmns: [MCC, MNC] pairs; each subscriber belongs to one and attaches to its cells
+            msisdn_prefix: Country code the MSISDNs start with
+            apns: Access point names sessions are opened on
+            session_id_start: First session id
+            skew: 0 draws sessions uniformly, > 0 favours the first sessions (Zipf-like)
+            seed: Seed of the population; a fixed seed gives every replica and run
+                the same subscribers. None draws a new population
+            columns: Column name -> entity attribute, for the columns drawn from the pool
+        """
+        plmns = plmns or [[404, 10], [404, 45], [405, 854]]
+        apns = apns or ['internet', 'ims', 'mms']
+        unknown = set((columns or {}).values()) - set(ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Unknown entity attributes: {sorted(unknown)}")
+        if subscribers < 1 or sessions_per_subscriber < 1 or cells < len(plmns):
+            raise ValueError("Entity pool needs at least one subscriber, one session each and one cell per PLMN")
+        self.columns = dict(columns or {})
+        self.skew = skew
+        rng = random.Random(seed)
+
+        # Cells, dealt round-robin over the PLMNs
+        self.cells = {'mcc': array('l'), 'mnc': array('l'), 'lac': array('l'), 'tac': array('l'),
+                      'cell_id': array('q')}
+        plmn_cells = [[] for _ in plmns]
+        for cell in range(cells):
+            plmn = cell % len(plmns)
+            plmn_cells[plmn].append(cell)
+            self.cells['mcc'].append(plmns[plmn][0])
+            self.cells['mnc'].append(plmns[plmn][1])
+            self.cells['lac'].append(rng.randint(1, 65533))
+            self.cells['tac'].append(rng.randint(1, 65533))
+            self.cells['cell_id'].append(rng.randint(1, 268435455))
+        self.cells['cgi'] = [
+            f"{mcc}-{mnc:02d}-{lac}-{cell_id}" for mcc, mnc, lac, cell_id
+            in zip(self.cells['mcc'], self.cells['mnc'], self.cells['lac'], self.cells['cell_id'])
+        ]
+
+        # Subscribers, with 15 digit IMSIs (MCC + MNC + MSIN) and IMEIs (TAC + serial + Luhn digit)
+        self.subscribers = {'imsi': array('q'), 'msisdn': array('q'), 'imei': array('q')}
+        subscriber_plmn = array('l')
+        msisdn_base = int(msisdn_prefix) * 10 ** 10
+        device_models = [rng.randint(35000000, 99999999) for _ in range(64)]
+        for number, msin in enumerate(rng.sample(range(10 ** 9), subscribers)):
+            plmn = number % len(plmns)
+            mcc, mnc = plmns[plmn]
+            mnc_digits = 3 if mnc >= 100 else 2
+            subscriber_plmn.append(plmn)
+            self.subscribers['imsi'].append(int(f"{mcc}{mnc:0{mnc_digits}d}{msin:0{12 - mnc_digits}d}"))
+            self.subscribers['msisdn'].append(msisdn_base + 6000000000 + msin)
+            body = rng.choice(device_models) * 10 ** 6 + rng.randrange(10 ** 6)
+            self.subscribers['imei'].append(body * 10 + _luhn_digit(body))
+
+        # Sessions, each on a cell of its subscriber's PLMN
+        session_count = subscribers * sessions_per_subscriber
+        self.session_subscriber = array('l', (session % subscribers for session in range(session_count)))
+        self.session_cell = array('l', (rng.choice(plmn_cells[subscriber_plmn[subscriber]])
+                                        for subscriber in self.session_subscriber))
+        self.sessions = {
+            'session_id': array('q', range(session_id_start, session_id_start + session_count)),
+            'apn': [rng.choice(apns) for _ in range(session_count)]
+        }
+
+        self._indexes = range(session_count)
+        self.cum_weights = list(accumulate(1.0 / (rank + 1) ** skew for rank in range(session_count))) if skew else None
+        self._np_probabilities = None
+        self._text = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional["EntityPool"]:
+        """Pool for the ``entities`` section of config.yaml, or None if disabled"""
+        entity_config = config.get('entities', {})
+        if not entity_config.get('enabled', False):
+            return None
+        pool = cls(
+            subscribers=entity_config.get('subscribers', 2000),
+            sessions_per_subscriber=entity_config.get('sessions_per_subscriber', 2),
+            cells=entity_config.get('cells', 500),
+            plmns=entity_config.get('plmns'),
+            msisdn_prefix=str(entity_config.get('msisdn_prefix', '91')),
+            apns=entity_config.get('apns'),
+            session_id_start=entity_config.get('session_id_start', 1),
+            skew=entity_config.get('skew', 0.0),
+            seed=entity_config.get('seed', 0),
+            columns=entity_config.get('columns')
+        )
+        logger.info(f"Entity pool: {len(pool.subscribers['imsi'])} subscribers, {len(pool)} sessions, "
+                    f"{len(pool.cells['cgi'])} cells")
+        return pool
+
+    def __len__(self):
+        return len(self.session_subscriber)
+
+    def stats(self) -> dict:
+        return {'subscribers': len(self.subscribers['imsi']), 'sessions': len(self), 'cells': len(self.cells['cgi'])}
+
+    def attribute_for(self, column_name: str) -> Optional[str]:
+        """Entity attribute a column is drawn from, or None if it is generated independently"""
+        return self.columns.get(column_name)
+
+    def draw(self, count: int, rng=random, np_rng=None) -> List[int]:
+        """
+        Draw ``count`` session indexes.
+
+        Args:
+            count: Number of rows
+            rng: Object exposing the ``random`` module API
+            np_rng: ``numpy.random.Generator`` to draw with instead, if given
+        """
+        size = len(self)
+        if np_rng is not None:
+            if self.cum_weights is None:
+                return np_rng.integers(0, size, count).tolist()
+            if self._np_probabilities is None:
+                weights = np.diff(np.asarray(self.cum_weights), prepend=0.0)
+                self._np_probabilities = weights / weights.sum()
+            return np_rng.choice(size, size=count, p=self._np_probabilities).tolist()
+        return rng.choices(self._indexes, cum_weights=self.cum_weights, k=count)
+
+    def values(self, attribute: str, sessions: List[int], text: bool = False) -> List:
+        """
+        Values of ``attribute`` for each of ``sessions``.
+
+        Args:
+            attribute: One of ``ATTRIBUTES``
+            sessions: Session indexes from ``draw``
+            text: Return strings rather than numbers
+        """
+        level = ATTRIBUTES[attribute]
+        source = self._text_values(level, attribute) if text else self._level(level)[attribute]
+        if level == 'session':
+            return [source[session] for session in sessions]
+        mapping = self.session_subscriber if level == 'subscriber' else self.session_cell
+        return [source[mapping[session]] for session in sessions]
+
+    def _level(self, level: str) -> dict:
+        return {'subscriber': self.subscribers, 'session': self.sessions, 'cell': self.cells}[level]
+
+    def _text_values(self, level, attribute):
+        values = self._text.get(attribute)
+        if values is None:
+            values = self._text[attribute] = [str(value) for value in self._level(level)[attribute]]
+        return values
+
+
+class EntityColumnGenerator:
+    """
+    Batch generator of one identity column.
+
+    The first entity column of a batch draws the session of every row into
+    the batch context; the other entity columns of the table reuse it, so all
+    identity values of a row belong to the same session.
+    """
+
+    depends_on = ()
+
+    def __init__(self, pool: EntityPool, attribute: str, column_type: Optional[str] = None,
+                 null_probability: float = 0, rng=random):
+        """
+        Args:
+            pool: Shared entity pool
+            attribute: Entity attribute of the column
+            column_type: Database type of the column; numeric types get numbers, others text
+            null_probability: Probability of a null value
+            rng: Object exposing the ``random`` module API
+        """
+        self.pool = pool
+        self.attribute = attribute
+        self.text = not str(column_type or '').lower().startswith(NUMERIC_TYPES)
+        self.null_probability = null_probability
+        self.rng = rng
+
+    def __call__(self, count: int, context: Dict, rng=None) -> List:
+        sessions = context.get(SESSION_INDEX)
+        if sessions is None or len(sessions) != count:
+            sessions = context[SESSION_INDEX] = self.pool.draw(count, self.rng, rng)
+        values = self.pool.values(self.attribute, sessions, self.text)
+        if self.null_probability > 0:
+            random_value = self.rng.random
+            threshold = self.null_probability
+            values = [None if random_value() < threshold else value for value in values]
+        return values
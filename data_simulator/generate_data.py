@@ -1,9 +1,25 @@
-import yaml
 from pathlib import Path
 from faker import Faker
+import os
+import time
 import random
+import logging
+from threading import Lock, local, get_ident
 from data_simulator.db_operations import VerticaDB
-from concurrent.futures import as_completed
+from data_simulator.batch import ColumnarBatch
+from data_simulator.config_cache import ConfigCache
+from data_simulator.reference_loader import ReferenceLoader
+from data_simulator.reference_cache import ReferenceCache
+from data_simulator.value_pools import ValuePoolRegistry
+from data_simulator.entities import EntityPool
+from data_simulator.sequences import SequenceService
+from data_simulator.sharding import resolve_shard
+from data_simulator.profiler import ColumnProfiler
+from data_simulator.sinks import Sink
+from data_simulator.schema_plan import SchemaCompiler, TablePlan
+from data_simulator.vectorized import ENGINES, VectorizedTablePlan, make_rng
+from data_simulator.workers import MODES, ProcessGenerationPool
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
 from typing import List, Dict, Iterable
 
 class DataSimulator:
@@ -29,7 +45,7 @@ class DataSimulator:
         }
         
         
-    def __init__(self, config_path: dict):
+    def __init__(self, config_path: dict, connection_factory=None):
         """
         Initialize DataSimulator with flexible path handling.
         
@@ -38,21 +54,88 @@ class DataSimulator:
                 - Absolute path (/path/to/config.yaml)
                 - Relative path from project root (config/config.yaml)
                 - Relative path from calling script
+            connection_factory: Optional callable opening database connections,
+                passed on to VerticaDB
         """
         self.faker = Faker()
+        self.logger = logging.getLogger(__name__)
         abs_config_path = str(Path(__file__).parent.parent / config_path)
-        self.db = VerticaDB(abs_config_path)  # Central resource hub
+        self.db = VerticaDB(abs_config_path, connection_factory=connection_factory)  # Central resource hub
         
         # Reuse resources from VerticaDB instance
         self.config = self.db.config
         self.executor = self.db.executor
         self.pool_lock = self.db.pool_lock
+        self.metrics = self.db.metrics
         
-        # Load configurations using VerticaDB's path resolution
+        # Load configurations using VerticaDB's path resolution, through the compiled snapshot
+        self.config_cache = ConfigCache.from_config(self.config)
         self.tables = self._load_table_configs()
         self.columns = self._load_column_configs()
         self.generated_data = {}
-        self.reference_cache = {}
+
+        # Shard of this replica: its share of the rows, its sequence slice and its RNG substream
+        generation_config = self.config.get('generation', {})
+        self.shard = resolve_shard(self.config, self.db)
+        self.seed = self.shard.seed(generation_config.get('seed'))
+        self.rng = random.Random(self.seed)
+        if self.seed is not None:
+            self.faker.seed_instance(self.seed)
+
+        self.reference_loader = ReferenceLoader.from_config(self.db, self.config, rng=self.rng)
+        self.reference_cache = ReferenceCache.from_config(self.reference_loader, self.config)
+
+        # Per (table, column) sequences with thread-local blocks and persisted high-water marks
+        self.sequences = SequenceService.from_config(self.config, seed_source=self.db.max_value, shard=self.shard)
+
+        # Pre-generated Faker value pools, shared by columns with the same spec
+        self.value_pools = ValuePoolRegistry.from_config(self.config)
+
+        # Subscriber/session population shared by the identity columns of every table (entities section)
+        self.entities = EntityPool.from_config(self.config)
+
+        # Opt-in per-column cost profiler (profiling section of config.yaml, or enable_profiling)
+        self.profiler = ColumnProfiler.from_config(self.config)
+
+        # Compiled per-table plans, built once and shared by every batch
+        self.compiler = SchemaCompiler(
+            self.faker,
+            rng=self.rng,
+            reference_cache=self.reference_cache,
+            sequence_factory=self._sequence_generator,
+            value_pools=self.value_pools,
+            profiler=self.profiler,
+            fast_timestamps=generation_config.get('fast_timestamps', True),
+            entities=self.entities
+        )
+        self._plans = {}
+        self._vector_plans = {}
+        self._plan_lock = Lock()
+        self._config_fingerprint = self._compute_config_fingerprint()
+
+        # Cache statistics are read only when metrics are scraped or summarized
+        self.metrics.register_collector('reference_cache', self.reference_cache.stats)
+        self.metrics.register_collector('config_cache', self.config_cache.stats)
+        self.metrics.register_collector('value_pools', self.value_pools.stats)
+        if self.entities is not None:
+            self.metrics.register_collector('entities', self.entities.stats)
+
+        # Generation engine: "python" (row by row) or "numpy" (column at a time)
+        self.engine = generation_config.get('engine', 'python')
+        self._thread_state = local()
+
+        # Execution mode: "thread" (VerticaDB.executor) or "process" (worker processes)
+        self.mode = generation_config.get('mode', 'thread')
+        self.workers = generation_config.get('workers') or os.cpu_count()
+        self._process_pool = None
+        self._process_pool_lock = Lock()  # tables loading concurrently share the pool
+
+        # Where generated batches go: Vertica COPY, or CSV/Parquet/JSONL files (sink section of config.yaml)
+        self.sink = Sink.from_config(self.db, self.config)
+
+        # Streaming mode: batches flow into the sink as they complete, bounded by max_in_flight
+        self.streaming = generation_config.get('streaming', False)
+        self.max_in_flight = generation_config.get('max_in_flight', 4)
 
     def _load_config(self, config_path: str):
         """Config already loaded by VerticaDB"""
@@ -62,30 +145,157 @@ class DataSimulator:
         """Reuse VerticaDB's path resolution strategy"""
         return self.db._resolve_config_path(self.config['yaml_path'][path_key])
 
+    def _yaml_files(self, path_key: str):
+        """YAML files of a config directory; a file path stands for its whole directory"""
+        path = self._resolve_path(path_key)
+        if path.is_file():
+            path = path.parent
+        return sorted(path.glob('*.yaml'))
+
     def _load_table_configs(self):
         """Load table configurations using shared path resolution"""
-        tables_dir = self._resolve_path('tables')
-        table_configs = {}
-        
-        for table_file in tables_dir.glob('*.yaml'):
-            with open(table_file) as f:
-                table_data = yaml.safe_load(f)
-                table_name = table_data['table_name']
-                table_configs[table_name] = table_data
-                
-        return table_configs
-        
+        return self.config_cache.load(
+            'tables', self._yaml_files('tables'), lambda table_data: {table_data['table_name']: table_data}
+        )
+
     def _load_column_configs(self):
         """Load column configurations using shared path resolution"""
-        columns_dir = self._resolve_path('columns')
-        column_configs = {}
+        return self.config_cache.load(
+            'columns', self._yaml_files('columns'), lambda column_data: column_data.get('columns', {})
+        )
+
+    def _compute_config_fingerprint(self):
+        """Modification times of every table and column YAML, used to detect edits"""
+        fingerprint = []
+        for path_key in ('tables', 'columns'):
+            for yaml_file in self._yaml_files(path_key):
+                fingerprint.append((str(yaml_file), yaml_file.stat().st_mtime_ns))
+        return tuple(fingerprint)
+
+    def refresh_configs(self, force=False):
+        """
+        Reload table and column YAMLs if any of them changed on disk.
+
+        Compiled plans are invalidated whenever the configs are reloaded.
 
-        for column_file in columns_dir.glob('*.yaml'):
-            with open(column_file) as f:
-                column_data = yaml.safe_load(f)
-                column_configs.update(column_data.get('columns', {}))
+        Returns:
+            bool: True if the configurations were reloaded
+        """
+        fingerprint = self._compute_config_fingerprint()
+        if not force and fingerprint == self._config_fingerprint:
+            return False
+        with self._plan_lock:
+            self.tables = self._load_table_configs()
+            self.columns = self._load_column_configs()
+            self._config_fingerprint = fingerprint
+            self._plans.clear()
+        self.shutdown_workers()  # Worker processes hold schemas compiled from the old configs
+        return True
 
-        return column_configs
+    def enable_profiling(self, profiler=None):
+        """
+        Profile the generation cost of every column from now on.
+
+        Plans are recompiled so bounded distributions count their retries.
+        While profiling, batches are generated on threads even in process
+        mode, so that every column is observed.
+
+        Returns:
+            ColumnProfiler: The active profiler
+        """
+        self.profiler = profiler or ColumnProfiler.from_config(self.config, enabled=True)
+        self.compiler.profiler = self.profiler
+        self.invalidate_plans()
+        return self.profiler
+
+    def invalidate_plans(self, table_name=None):
+        """Drop the compiled plan of one table, or of all tables"""
+        with self._plan_lock:
+            if table_name is None:
+                self._plans.clear()
+            else:
+                self._plans.pop(table_name, None)
+
+    def get_table_plan(self, table_name) -> TablePlan:
+        """Return the compiled generation plan for a table, compiling it on first use"""
+        plan = self._plans.get(table_name)
+        if plan is None:
+            with self._plan_lock:
+                plan = self._plans.get(table_name)
+                if plan is None:
+                    started = time.perf_counter()
+                    plan = self.compiler.compile(table_name, self.get_table_schema(table_name))
+                    self.metrics.stage(table_name, 'schema', time.perf_counter() - started)
+                    self._plans[table_name] = plan
+        return plan
+
+    def get_vectorized_plan(self, table_name) -> VectorizedTablePlan:
+        """Return the vectorized plan for a table, rebuilt whenever its compiled plan changes"""
+        plan = self.get_table_plan(table_name)
+        vector_plan = self._vector_plans.get(table_name)
+        if vector_plan is None or vector_plan.plan is not plan:
+            vector_plan = VectorizedTablePlan(plan, self.reference_cache, profiler=self.profiler)
+            self._vector_plans[table_name] = vector_plan
+        return vector_plan
+
+    def _numpy_rng(self):
+        """Per-thread numpy Generator, since Generators must not be shared across threads"""
+        rng = getattr(self._thread_state, 'numpy_rng', None)
+        if rng is None:
+            rng = self._thread_state.numpy_rng = make_rng(None if self.seed is None else [self.seed, get_ident()])
+        return rng
+
+    def _get_process_pool(self, table_name) -> ProcessGenerationPool:
+        """
+        Return a worker pool able to generate the table, replacing it if it lacks the schema or references
+        or its copy of the reference cache is out of date.
+
+        Must be called with ``_process_pool_lock`` held. The replaced pool is
+        shut down without waiting: batches other tables already submitted to
+        it still complete, and its workers exit once they have.
+        """
+        plan = self.get_table_plan(table_name)
+        pool = self._process_pool
+        # Read before the new pool copies the cache: a change in between only costs one more restart
+        reference_version = self.reference_cache.version
+        if pool is None or not pool.covers(table_name, plan.references, reference_version):
+            # The new pool serves every table the old one did, so concurrent tables do not keep replacing it
+            schemas = dict(pool.schemas) if pool else {}
+            schemas[table_name] = {column.name: column.config for column in plan.columns}
+            if pool:
+                pool.shutdown(wait=False)
+            pool = self._process_pool = ProcessGenerationPool(
+                self.workers, schemas, self.reference_cache, seed=self.seed,
+                value_pools=self.value_pools.settings(), fast_timestamps=self.compiler.fast_timestamps,
+                entities=self.entities, reference_version=reference_version
+            )
+        return pool
+
+    def shutdown_workers(self):
+        """Stop the worker processes of the process generation mode, if any"""
+        with self._process_pool_lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def save_state(self):
+        """Persist sequence high-water marks and the reference cache so a new process starts where this one left off"""
+        self.sequences.save()
+        self.reference_cache.save_snapshot()
+
+    def close(self):
+        """Persist state, give up the shard lease and release worker processes and connections"""
+        self.save_state()
+        if self.profiler is not None:
+            self.profiler.save()
+        self.shard.release()
+        self.shutdown_workers()
+        self.sink.close()
+        self.db.close()
+
+    def _sequence_generator(self, table_name, column_name, col_config):
+        sim_config = col_config.get('simulation', {})
+        return self.sequences.generator(table_name, column_name, sim_config.get('start', 0), sim_config.get('step', 1))
         
     def get_table_schema(self, table_name):
         if table_name not in self.tables:
@@ -150,244 +360,191 @@ class DataSimulator:
        
         return schema
     
-    def _fetch_reference_data(self, ref_table, ref_column, chunk_size=1000):
-        cache_key = (ref_table, ref_column)
-        
-        # Check cache first
-        if cache_key in self.reference_cache:
-            return self.reference_cache[cache_key]
-        
-        # Fetch data in chunks and store as a list
-        data = []
-        last_id = None
-        while True:
-            condition = None if not last_id else f"rowid > {last_id} and rowid < {chunk_size}" if last_id <= chunk_size else "rowid IS NULL"
-            chunk = [
-                row[0] for row in self.db.read(
-                    ref_table, 
-                    columns=ref_column, 
-                    condition=condition, 
-                    limit=chunk_size
-                )
-            ]
-            if not chunk:
-                break
-            data.extend(chunk)
-            if not last_id:
-                last_id = len(chunk) - 1
-            else:
-                last_id += len(chunk)
-        
-        # Cache the full list
-        self.reference_cache[cache_key] = data
-        return data  # Return a list, not a generator!
-
-    def generate_data_parallel(self, table_name, num_records, batch_size=1000):
-        # Pre-fetch all reference data first
-        self.pre_fetch_references(table_name)
-
-        # Calculate the number of full batches and the remaining records
-        full_batches = num_records // batch_size
-        remaining_records = num_records % batch_size
-        
-        # Parallel generation
-        futures = []
-        
-        # Submit full batches
-        for _ in range(full_batches):
-            futures.append(
-                self.executor.submit(
-                    self._generate_batch,
-                    table_name,
-                    batch_size
-                )
-            )
-        
-        # Submit remaining records if any
-        if remaining_records > 0:
-           futures.append(
-                self.executor.submit(
-                    self._generate_batch,
-                    table_name,
-                    remaining_records
-                )
-            )
-        results = []
-        for future in as_completed(futures):
-            results.extend(future.result())
-        return results
-    
-    def pre_fetch_references(self, table_name):
-        schema = self.get_table_schema(table_name)
-        for col_config in schema.values():
-            if col_config['simulation'].get('type') == 'reference':
-                ref_table = col_config['simulation']['table']
-                ref_column = col_config['simulation']['column']
-                self._fetch_reference_data(ref_table, ref_column)
-    
-    def _generate_batch(self, table_name, batch_size):
-        # Reuse pre-fetched reference data
-        schema = self.get_table_schema(table_name)
-        return [self._generate_record(schema) for _ in range(batch_size)]
-    
-    def _generate_record(self, schema):
-        record = {}
-        for col, col_config in schema.items():
-            if col_config['simulation'].get('type') == 'reference':
-                ref_table = col_config['simulation']['table']
-                ref_column = col_config['simulation']['column']
-                ref_data = self.reference_cache[(ref_table, ref_column)]  # Get cached list
-                record[col] = random.choice(ref_data)  # Works with lists
-            else:
-                record[col] = self._generate_column_data(col_config)
-        return record
+    def _fetch_reference_data(self, ref_table, ref_column):
+        # Served from the bounded cache; loaded on a miss and refreshed incrementally once its TTL expires
+        return self.reference_cache.get_keys(ref_table, ref_column)
 
-    def _generate_column_data(self, col_config):
+    def generate_data_parallel(self, table_name, num_records, batch_size=1000, engine=None, mode=None):
         """
-        Generates data for a column with optional null values.
-        
+        Generate records for a table in parallel batches.
+
         Args:
-            col_config: Column configuration dictionary containing:
-                - simulation: Simulation configuration
-                - null_probability: Probability of generating null (0-1, default 0)
-                
+            table_name: Table to generate data for
+            num_records: Total number of records
+            batch_size: Number of records per batch
+            engine: "python" or "numpy"; defaults to generation.engine from config.yaml
+            mode: "thread" or "process"; defaults to generation.mode from config.yaml
+
         Returns:
-            Generated data or None (for null values)
+            ColumnarBatch: All generated records
         """
-        # Check for null probability (default to 0 if not specified)
-        null_prob = col_config.get('null_probability', 0)
+        # Every batch may be in flight at once, since the whole result is kept anyway
+        return ColumnarBatch.concat(self.iter_batches(
+            table_name, num_records, batch_size, engine, mode,
+            max_in_flight=max(1, -(-num_records // batch_size))
+        ))
 
-         # Generate null value if probability triggers
-        if null_prob > 0 and random.random() < null_prob:
-            return None
+    def iter_batches(self, table_name, num_records, batch_size=1000, engine=None, mode=None, max_in_flight=None,
+                     window=None):
+        """
+        Generate records in parallel and yield each batch as soon as it completes.
 
-        sim_config = col_config.get('simulation', {})
-        
-        if not sim_config:
-            raise ValueError(f"No simulation configuration found for the column: {col_config.get('field_name')}")
+        At most ``max_in_flight`` batches are generated or waiting to be consumed at
+        any time, so memory is bounded by batch count rather than by ``num_records``.
+
+        Args:
+            table_name: Table to generate data for
+            num_records: Total number of records
+            batch_size: Number of records per batch
+            engine: "python" or "numpy"; defaults to generation.engine from config.yaml
+            mode: "thread" or "process"; defaults to generation.mode from config.yaml
+            max_in_flight: Maximum number of outstanding batches; defaults to
+                generation.max_in_flight from config.yaml
+            window: (start, end) epoch seconds the timestamp columns are spread
+                over instead of their "-5m".."now" style windows; each batch
+                gets its consecutive share of it. Without one, event time
+                columns advance by each batch's share of ``num_records``
+
+        Yields:
+            ColumnarBatch: One generated batch
+        """
+        engine = engine or self.engine
+        if engine not in ENGINES:
+            raise ValueError(f"Unsupported generation engine: {engine}")
+        mode = mode or self.mode
+        if mode not in MODES:
+            raise ValueError(f"Unsupported generation mode: {mode}")
+        if mode == 'process' and self.profiler is not None:
+            mode = 'thread'  # Columns generated in worker processes cannot be profiled
+        max_in_flight = max_in_flight or self.max_in_flight
 
-        sim_type = sim_config.get('type')
+        # Pre-fetch all reference data first
+        self.pre_fetch_references(table_name)
 
+        pending = set()
+        generated = 0
+        total_rows = num_records
+        if mode == 'process':
+            # Every worker process keeps its own event clock, which only sees the batches sent to that worker
+            total_rows = -(-num_records // min(self.workers, -(-num_records // batch_size)))
         try:
-        
-            if sim_type == 'sequence':
-                return self._handle_sequence(col_config)
-                
-            elif sim_type == 'faker':
-                provider = sim_config.get('provider')
-                method = sim_config.get('method')
-                params = sim_config.get('params', {})
-                
-                if not method:
-                    raise ValueError(f"Faker configuration must include 'method' for column: {col_config.get('field_name')}")
-                
-                # Handle special cases like 'words'
-                if provider == 'word' and method == 'words':
-                    return ' '.join(self.faker.words(**params))
-
-                # Handle cases where the method is directly available on the Faker instance
-                if hasattr(self.faker, method):
-                    result = getattr(self.faker, method)(**params)
-                    return None if result is None else str(result)  # Convert to string unless None
-
-                # Handle cases where the method is part of a provider
-                if provider:
-                    faker_provider = getattr(self.faker, provider)
-                    if hasattr(faker_provider, method):
-                        result = getattr(faker_provider, method)(**params)
-                        return None if result is None else str(result)
-                    raise ValueError(f"Method '{method}' not found in provider '{provider}'")
-                raise ValueError(f"Method '{method}' not found in Faker instance")
-                    
-            elif sim_type == 'enum':
-                values = sim_config.get('values')
-                weights = sim_config.get('weights')
-                
-                if not values:
-                    raise ValueError("Enum configuration must include 'values'.")
-                
-                return random.choices(values, weights=weights, k=1)[0]
-                
-            elif sim_type == 'random':
-                return self._generate_random_value(sim_config)
-                
-            elif sim_type == 'date':
-                date_value = self._generate_date(sim_config)
-                return date_value.strftime('%Y-%m-%d %H:%M:%S') if date_value else None
+            for size in self._batch_sizes(num_records, batch_size):
+                batch_window = None
+                if window is not None:
+                    start, end = window
+                    span = (end - start) / num_records
+                    batch_window = (start + generated * span, start + (generated + size) * span)
+                    generated += size
+                # A batch with its own sub-window already covers just its share of the run
+                batch_rows = total_rows if batch_window is None else None
+                if mode == 'process':
+                    pending.add(self._submit_process_batch(table_name, size, engine, batch_window, batch_rows))
+                else:
+                    pending.add(self.executor.submit(self._generate_batch, table_name, size, engine, batch_window,
+                                                     batch_rows))
 
-            elif sim_type == 'constant':
-                return sim_config.get('value')
-                
-            else:
-                raise ValueError(f"Unsupported simulation type: {sim_type}")
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield self._batch_result(table_name, future, mode)
 
-        except Exception as e:
-            self.logger.error(f"Error generating data for {col_config.get('field_name')}: {str(e)}")
-            return None  # Fallback to null on error
+            for future in as_completed(pending):
+                pending.discard(future)
+                yield self._batch_result(table_name, future, mode)
+        finally:
+            # Consumer stopped early: drop batches that have not started yet
+            for future in pending:
+                future.cancel()
 
-    def _handle_sequence(self, col_config):
-        sim_config = col_config.get('simulation', {})
-        start = sim_config.get('start', 0)
-        step = sim_config.get('step', 1)
-        
-        if not hasattr(self, '_sequence_counter'):
-            self._sequence_counter = start
+    def _batch_result(self, table_name, future, mode):
+        if mode == 'process':
+            column_names, columns, seconds = future.result()
+            self.metrics.stage(table_name, 'generate', seconds)
+            batch = ColumnarBatch(column_names, columns)
         else:
-            self._sequence_counter += step
-        
-        return self._sequence_counter
+            batch = future.result()
+        self.metrics.inc('rows_generated_total', len(batch), table=table_name)
+        return batch
 
-    def _generate_random_value(self, sim_config):
-        distribution = sim_config.get('distribution')
-        params = sim_config.get('params', {})
-        
-        if distribution == 'normal':
-            mean = params.get('mean', 0)
-            std_dev = params.get('std_dev', 1)
-            min_val = params.get('min', float('-inf'))
-            max_val = params.get('max', float('inf'))
-            
-            # Generate values until we get one within bounds (with max attempts to prevent infinite loops)
-            max_attempts = 100
-            for _ in range(max_attempts):
-                value = random.normalvariate(mean, std_dev)
-                if min_val <= value <= max_val:
-                    break
-            else:
-                # If we can't get a value within bounds after max attempts, clip to nearest bound
-                value = max(min_val, min(max_val, mean))
-            
-            # Round to precision if provided
-            precision = params.get('precision')
-            if precision is not None:
-                value = round(value, precision)
-            return value
-            
-        elif distribution == 'uniform':
-            min_val = params.get('min', 0)
-            max_val = params.get('max', 1)
-            value = random.uniform(min_val, max_val)
-            # Round to precision if provided
-            precision = params.get('precision')
-            if precision is not None:
-                value = round(value, precision)
-            return value
-            
-        elif distribution == 'choice':
-            choices = params.get('choices', [])
-            return random.choice(choices)
-            
+    def generate_and_load(self, table_name, num_records, batch_size=1000, engine=None, mode=None,
+                          max_in_flight=None):
+        """
+        Stream generated batches straight into the sink.
+
+        Generation keeps running on the workers while each finished batch is
+        COPYed or written, so loading overlaps generation and peak memory stays
+        at roughly ``max_in_flight`` batches. With vertica.parallel_copy enabled
+        the batches are spread over several connections.
+
+        Returns:
+            int: Total number of inserted rows
+        """
+        batches = self.iter_batches(table_name, num_records, batch_size, engine, mode, max_in_flight)
+        return self.sink.write(table_name, batches)
+
+    def _batch_sizes(self, num_records, batch_size):
+        # Full batches followed by the remaining records, if any
+        full_batches, remaining_records = divmod(num_records, batch_size)
+        for _ in range(full_batches):
+            yield batch_size
+        if remaining_records > 0:
+            yield remaining_records
+
+    def _submit_process_batch(self, table_name, batch_size, engine, window=None, total_rows=None):
+        # Workers only get the sequence ranges reserved for their batch, stepping over other shards' values
+        sequence_starts = {
+            column.name: (self._reserve_sequence(table_name, column.name, column.config, batch_size),
+                          column.config['simulation'].get('step', 1) * self.shard.count)
+            for column in self.get_table_plan(table_name).columns
+            if column.sim_type == 'sequence'
+        }
+        # Submit under the lock, so no other table replaces the pool between choosing it and submitting
+        with self._process_pool_lock:
+            return self._get_process_pool(table_name).submit(table_name, batch_size, sequence_starts, engine, window,
+                                                             total_rows)
+    
+    def pre_fetch_references(self, table_name):
+        for ref_table, ref_column in self.get_table_plan(table_name).references:
+            self._fetch_reference_data(ref_table, ref_column)
+    
+    def _generate_batch(self, table_name, batch_size, engine='python', window=None, total_rows=None):
+        if self.profiler is not None:
+            with self.profiler.capture():
+                return self._generate_profiled_batch(table_name, batch_size, engine, window, total_rows)
+
+        # Reuse the compiled plan and pre-fetched reference data
+        if engine == 'numpy':
+            vector_plan = self.get_vectorized_plan(table_name)
+            started = time.perf_counter()
+            batch = ColumnarBatch(vector_plan.column_names,
+                                  vector_plan.generate_columns(batch_size, self._numpy_rng(), window, total_rows))
         else:
-            raise ValueError(f"Unsupported random distribution: {distribution}")
-            
-    def _generate_date(self, sim_config):
-        params = sim_config.get('params', {})
-        start_date = params.get('start_date', '-1y')
-        end_date = params.get('end_date', 'now')
-        
-        return self.faker.date_time_between(start_date=start_date, end_date=end_date)
+            plan = self.get_table_plan(table_name)
+            started = time.perf_counter()
+            batch = ColumnarBatch(plan.column_names, plan.generate_columns(batch_size, window, total_rows))
+        self.metrics.stage(table_name, 'generate', time.perf_counter() - started)
+        return batch
+
+    def _generate_profiled_batch(self, table_name, batch_size, engine, window=None, total_rows=None):
+        """_generate_batch timing each column into the profiler"""
+        if engine == 'numpy':
+            plan, args = self.get_vectorized_plan(table_name), (self._numpy_rng(),)
+        else:
+            plan, args = self.get_table_plan(table_name), ()
+        started = time.perf_counter()
+        columns = self.profiler.generate_columns(plan, batch_size, *args, window=window, total_rows=total_rows)
+        self.metrics.stage(table_name, 'generate', time.perf_counter() - started)
+        return ColumnarBatch(plan.column_names, columns)
+    
+    def _reserve_sequence(self, table_name, column_name, col_config, count):
+        """Reserve ``count`` consecutive sequence values and return the first one"""
+        sim_config = col_config.get('simulation', {})
+        return self.sequences.reserve(table_name, column_name, count, sim_config.get('start', 0), sim_config.get('step', 1))
 
     def convert_list_of_dicts_to_tuples(self, data: List[Dict]) -> Dict[str, Iterable]:
+        if isinstance(data, ColumnarBatch):
+            return list(data.columns), list(data.rows())
+
         # Extract column names from the first dictionary
         columns = list(data[0].keys())
         
@@ -0,0 +1,285 @@
+import json
+import time
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'data_simulator'
+
+# Metrics recorded on the hot path, with their Prometheus type and help text
+METRICS = {
+    'stage_seconds': ('summary', "Time spent per table and pipeline stage"),
+    'table_seconds': ('summary', "Wall time of generating and loading one table"),
+    'rows_generated_total': ('counter', "Rows generated"),
+    'rows_loaded_total': ('counter', "Rows loaded into the sink (Vertica or files)"),
+    'rows_rejected_total': ('counter', "Rows rejected by COPY"),
+    'bytes_loaded_total': ('counter', "COPY payload bytes sent to Vertica, or bytes written to files"),
+    'load_errors_total': ('counter', "Failed COPY batches"),
+    'partitions_loaded_total': ('counter', "Backfill time partitions loaded"),
+}
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and timing summaries, rendered in the Prometheus
+    text format.
+
+    Recording costs a dictionary update under a lock and is done once per
+    batch and stage, never per row. Statistics that components already keep
+    (connection pool, caches) are not copied on every change; ``collectors``
+    are called only when the metrics are rendered or summarized.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled: When False every recording call returns immediately
+        """
+        self.enabled = enabled
+        self._lock = Lock()
+        self._counters = {}
+        self._timings = {}  # (name, labels) -> [count, sum, max]
+        self._collectors = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "MetricsRegistry":
+        return cls(enabled=config.get('metrics', {}).get('enabled', True))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add ``value`` to a counter"""
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one duration in a timing summary"""
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                self._timings[key] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                if seconds > timing[2]:
+                    timing[2] = seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time a ``with`` block into a timing summary"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def stage(self, table: str, stage: str, seconds: float):
+        """Record the time one batch of ``table`` spent in a pipeline stage"""
+        self.observe('stage_seconds', seconds, table=table, stage=stage)
+
+    def register_collector(self, name: str, collect: Callable[[], dict]):
+        """
+        Publish a component's own statistics.
+
+        Args:
+            name: Section name, e.g. "pool"; numeric values become gauges named
+                ``data_simulator_<name>_<key>``
+            collect: Zero-argument callable returning a dict of statistics
+        """
+        self._collectors[name] = collect
+
+    def _collect(self) -> Dict[str, dict]:
+        sections = {}
+        for name, collect in list(self._collectors.items()):
+            try:
+                sections[name] = collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector {name} failed: {e}")
+        return sections
+
+    def snapshot(self) -> dict:
+        """Current counter and timing values, to summarize a run with ``summary(since=...)``"""
+        with self._lock:
+            return {'counters': dict(self._counters),
+                    'timings': {key: list(value) for key, value in self._timings.items()}}
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        by_name = {}
+        for (name, labels), value in snapshot['counters'].items():
+            by_name.setdefault(name, []).append((labels, value))
+        for (name, labels), value in snapshot['timings'].items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name in sorted(by_name):
+            kind, help_text = METRICS.get(name, ('untyped', name))
+            full_name = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            maximums = []
+            for labels, value in sorted(by_name[name]):
+                label_text = _format_labels(labels)
+                if kind == 'summary':
+                    count, total, maximum = value
+                    lines.append(f"{full_name}_count{label_text} {count}")
+                    lines.append(f"{full_name}_sum{label_text} {total:.6f}")
+                    maximums.append(f"{full_name}_max{label_text} {maximum:.6f}")
+                else:
+                    lines.append(f"{full_name}{label_text} {value}")
+            if maximums:
+                # Summaries carry no maximum, so the slowest observation is its own gauge
+                lines.append(f"# HELP {full_name}_max Slowest single observation of {full_name}")
+                lines.append(f"# TYPE {full_name}_max gauge")
+                lines.extend(maximums)
+
+        for section, stats in sorted(self._collect().items()):
+            for key, value in sorted(stats.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                full_name = f"{PREFIX}_{section}_{key}"
+                lines.append(f"# TYPE {full_name} gauge")
+                lines.append(f"{full_name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, since: Optional[dict] = None) -> dict:
+        """
+        Structured per-table summary.
+
+        Args:
+            since: A ``snapshot()`` taken earlier; counts and times are then
+                the difference since that snapshot (maximums stay cumulative)
+
+        Returns:
+            dict: ``tables`` with per-table row/byte counts and per-stage
+                timings, ``totals``, and one section per collector
+        """
+        snapshot = self.snapshot()
+        base_counters = since['counters'] if since else {}
+        base_timings = since['timings'] if since else {}
+        tables = {}
+
+        def table_entry(labels):
+            table = dict(labels).get('table')
+            if table is None:
+                return None
+            return tables.setdefault(table, {'stages': {}})
+
+        for key, value in snapshot['counters'].items():
+            value -= base_counters.get(key, 0)
+            entry = table_entry(key[1])
+            if entry is not None and value:
+                entry[key[0][:-len('_total')] if key[0].endswith('_total') else key[0]] = value
+
+        for key, (count, total, maximum) in snapshot['timings'].items():
+            base_count, base_total, _ = base_timings.get(key, (0, 0.0, 0.0))
+            count, total = count - base_count, total - base_total
+            entry = table_entry(key[1])
+            if entry is None or not count:
+                continue
+            timing = {'count': count, 'seconds': round(total, 6), 'max_seconds': round(maximum, 6)}
+            if key[0] == 'stage_seconds':
+                entry['stages'][dict(key[1])['stage']] = timing
+            else:
+                entry[key[0]] = timing
+
+        totals = {}
+        for entry in tables.values():
+            for name in ('rows_generated', 'rows_loaded', 'rows_rejected', 'bytes_loaded', 'load_errors'):
+                if name in entry:
+                    totals[name] = totals.get(name, 0) + entry[name]
+            for stage, timing in entry['stages'].items():
+                totals[f"{stage}_seconds"] = round(totals.get(f"{stage}_seconds", 0.0) + timing['seconds'], 6)
+
+        summary = {'tables': tables, 'totals': totals}
+        summary.update(self._collect())
+        return summary
+
+
+class MetricsServer:
+    """
+    Serves a registry over HTTP on a background thread.
+
+    ``/metrics`` returns the Prometheus text format, ``/summary`` the JSON
+    summary of everything recorded since the process started.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int = 8000, host: str = '0.0.0.0'):
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self._server = None
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, registry: MetricsRegistry, config: dict) -> Optional["MetricsServer"]:
+        """Server for the ``metrics`` section of config.yaml, or None if it has no port"""
+        metrics_config = config.get('metrics', {})
+        port = metrics_config.get('port', 8000)
+        if not registry.enabled or port is None:
+            return None
+        return cls(registry, port=port, host=metrics_config.get('host', '0.0.0.0'))
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body, content_type = registry.render(), 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/summary':
+                    body, content_type = json.dumps(registry.summary(), default=str), 'application/json'
+                elif path == '/healthz':
+                    body, content_type = 'ok\n', 'text/plain'
+                else:
+                    self.send_error(404)
+                    return
+                payload = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the log
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            # Losing the endpoint must not stop data generation
+            logger.warning(f"Could not serve metrics on {self.host}:{self.port}: {e}")
+            return self
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,227 @@
+import io
+import time
+import pstats
+import cProfile
+import logging
+import tracemalloc
+from contextlib import contextmanager
+from threading import Lock
+from typing import List, Optional
+
+from data_simulator.timestamps import TIME_TOTAL_ROWS, TIME_WINDOW
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnStats:
+    """Accumulated generation cost of one (table, column, simulation type)"""
+
+    __slots__ = ("table", "column", "sim_type", "strategy", "calls", "seconds", "nulls", "retries", "batches")
+
+    def __init__(self, table, column, sim_type, strategy='direct'):
+        self.table = table
+        self.column = column
+        self.sim_type = sim_type
+        self.strategy = strategy
+        self.calls = 0
+        self.seconds = 0.0
+        self.nulls = 0
+        # Rejected draws of bounded normal distributions; incremented by the
+        # generators themselves without a lock, so approximate under contention
+        self.retries = 0
+        self.batches = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'table': self.table,
+            'column': self.column,
+            'sim_type': self.sim_type,
+            'strategy': self.strategy,
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'us_per_call': self.seconds / self.calls * 1e6 if self.calls else 0.0,
+            'null_rate': self.nulls / self.calls if self.calls else 0.0,
+            'retries': self.retries,
+            'retries_per_call': self.retries / self.calls if self.calls else 0.0
+        }
+
+
+class ColumnProfiler:
+    """
+    Opt-in profiler of per-column generation cost.
+
+    Batches are generated column by column with one clock read per column and
+    batch, so the overhead stays small even for wide tables; the null count is
+    taken from the generated values. On request, ``capture`` also runs
+    ``_generate_batch`` under cProfile and tracemalloc traces allocations for
+    the whole run.
+    """
+
+    def __init__(self, top: int = 20, cprofile_path: Optional[str] = None, trace_memory: bool = False):
+        """
+        Args:
+            top: Number of columns in the ranked report
+            cprofile_path: Write the merged cProfile stats of the captured batches here
+            trace_memory: Trace allocations with tracemalloc and report the top sites
+        """
+        self.top = top
+        self.cprofile_path = cprofile_path
+        self.trace_memory = trace_memory
+        self._stats = {}
+        self._lock = Lock()
+        self._pstats = None
+        # cProfile cannot profile two threads at once on every Python version;
+        # batches generated while another one is being captured are not captured
+        self._capture_lock = Lock()
+        self.captured_batches = 0
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_config(cls, config: dict, enabled: Optional[bool] = None) -> Optional["ColumnProfiler"]:
+        """Profiler for the ``profiling`` section of config.yaml, or None unless enabled"""
+        profiling_config = config.get('profiling', {})
+        if not (profiling_config.get('enabled', False) if enabled is None else enabled):
+            return None
+        return cls(
+            top=profiling_config.get('top', 20),
+            cprofile_path=profiling_config.get('cprofile_path'),
+            trace_memory=profiling_config.get('tracemalloc', False)
+        )
+
+    def stats_for(self, table: str, column: str, sim_type: Optional[str]) -> ColumnStats:
+        """Accumulator of a column, created on first use and kept across plan recompilations"""
+        key = (table, column, sim_type)
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(key, ColumnStats(table, column, sim_type))
+        return stats
+
+    def generate_columns(self, plan, count: int, *args, window=None, total_rows=None) -> List[List]:
+        """
+        Generate a batch column by column, timing each column.
+
+        Args:
+            plan: ``TablePlan`` or ``VectorizedTablePlan``
+            count: Number of rows
+            *args: Passed on to ``plan.generate_column`` (the numpy Generator)
+            window: Fixed window of the timestamp columns, see ``TablePlan.generate_columns``
+            total_rows: Rows planned for the whole tick, see ``TablePlan.generate_columns``
+        """
+        columns = [None] * len(plan.columns)
+        timings = [0.0] * len(plan.columns)
+        context = {TIME_WINDOW: window, TIME_TOTAL_ROWS: total_rows}
+        clock = time.perf_counter
+        # Derived columns come after the columns they read from the context
+        for index in plan.order:
+            started = clock()
+            columns[index] = plan.generate_column(index, count, *args, context=context)
+            timings[index] = clock() - started
+
+        table = plan.table_name
+        with self._lock:
+            for column, values, seconds in zip(plan.columns, columns, timings):
+                key = (table, column.name, column.sim_type)
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = ColumnStats(table, column.name, column.sim_type)
+                stats.strategy = 'pool' if column.pool is not None else 'batch' if column.generate_batch else 'direct'
+                stats.calls += count
+                stats.seconds += seconds
+                stats.nulls += values.count(None)
+                stats.batches += 1
+        return columns
+
+    @contextmanager
+    def capture(self):
+        """Run a block under cProfile, if a cprofile_path is set and no other thread is being captured"""
+        if not self.cprofile_path or not self._capture_lock.acquire(blocking=False):
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+            with self._lock:
+                if self._pstats is None:
+                    self._pstats = pstats.Stats(profile)
+                else:
+                    self._pstats.add(profile)
+                self.captured_batches += 1
+        finally:
+            self._capture_lock.release()
+
+    def report(self, top: Optional[int] = None) -> List[dict]:
+        """Columns ranked by total generation time, with their share of their table's time"""
+        with self._lock:
+            rows = [stats.as_dict() for stats in self._stats.values() if stats.calls]
+        table_seconds = {}
+        for row in rows:
+            table_seconds[row['table']] = table_seconds.get(row['table'], 0.0) + row['seconds']
+        for row in rows:
+            total = table_seconds[row['table']]
+            row['table_share'] = row['seconds'] / total if total else 0.0
+        rows.sort(key=lambda row: row['seconds'], reverse=True)
+        return rows[:top or self.top]
+
+    def memory_report(self, top: int = 10) -> Optional[dict]:
+        """Current and peak traced memory with the largest allocation sites, if tracing"""
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        )).statistics('lineno')
+        return {
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top': [{'site': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count}
+                    for stat in statistics[:top]]
+        }
+
+    def format_report(self, top: Optional[int] = None) -> str:
+        """Human readable "most expensive columns" table"""
+        lines = ["Most expensive columns:",
+                 f"{'#':>3}  {'table.column':<48} {'type':<10} {'strategy':<8} {'calls':>9} {'total s':>9} "
+                 f"{'us/call':>9} {'share':>6} {'null %':>7} {'retries/call':>12}"]
+        for rank, row in enumerate(self.report(top), start=1):
+            name = f"{row['table']}.{row['column']}"
+            lines.append(
+                f"{rank:>3}  {name:<48.48} {str(row['sim_type']):<10} {row['strategy']:<8} {row['calls']:>9} "
+                f"{row['seconds']:>9.3f} {row['us_per_call']:>9.1f} {row['table_share']:>6.0%} "
+                f"{row['null_rate']:>7.1%} {row['retries_per_call']:>12.2f}"
+            )
+
+        if self._pstats is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(stream=stream)
+            stats.add(self._pstats)
+            stats.sort_stats('cumulative').print_stats(15)
+            lines.append(f"cProfile of {self.captured_batches} batches (top 15 by cumulative time):")
+            lines.append(stream.getvalue().rstrip())
+
+        memory = self.memory_report()
+        if memory is not None:
+            lines.append(f"Traced memory: {memory['current_bytes'] / 1e6:.1f} MB current, "
+                         f"{memory['peak_bytes'] / 1e6:.1f} MB peak; largest allocation sites:")
+            for site in memory['top']:
+                lines.append(f"  {site['bytes'] / 1e6:8.2f} MB  {site['blocks']:>8} blocks  {site['site']}")
+        return '\n'.join(lines)
+
+    def save(self):
+        """Write the merged cProfile stats to cprofile_path, for pstats or snakeviz"""
+        if self._pstats is None or not self.cprofile_path:
+            return
+        with self._lock:
+            self._pstats.dump_stats(self.cprofile_path)
+        logger.info(f"cProfile stats of {self.captured_batches} batches written to {self.cprofile_path}")
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._pstats = None
+            self.captured_batches = 0
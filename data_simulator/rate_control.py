@@ -0,0 +1,276 @@
+import math
+import time
+import logging
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILES = ('flat', 'diurnal')
+
+
+class RateProfile:
+    """
+    Target rate in rows per second as a function of wall-clock time.
+
+    ``flat`` holds ``rate`` constant. ``diurnal`` scales it over the day,
+    either along a cosine curve peaking at ``peak_hour`` and bottoming out at
+    ``trough_ratio * rate`` twelve hours later, or along 24 ``hourly``
+    multipliers interpolated linearly between hours.
+    """
+
+    def __init__(self, rate: float, profile: str = 'flat', peak_hour: float = 14, trough_ratio: float = 0.2,
+                 hourly: Optional[List[float]] = None):
+        if profile not in PROFILES:
+            raise ValueError(f"Unsupported rate profile: {profile}")
+        if hourly is not None and len(hourly) != 24:
+            raise ValueError("An hourly rate profile needs 24 multipliers")
+        self.rate = rate
+        self.profile = profile
+        self.peak_hour = peak_hour
+        self.trough_ratio = trough_ratio
+        self.hourly = hourly
+
+    def multiplier(self, moment: datetime) -> float:
+        if self.profile == 'flat':
+            return 1.0
+        hour = moment.hour + moment.minute / 60 + moment.second / 3600
+        if self.hourly:
+            low = int(hour) % 24
+            fraction = hour - int(hour)
+            return self.hourly[low] + (self.hourly[(low + 1) % 24] - self.hourly[low]) * fraction
+        wave = (1 + math.cos(2 * math.pi * (hour - self.peak_hour) / 24)) / 2
+        return self.trough_ratio + (1 - self.trough_ratio) * wave
+
+    def __call__(self, moment: Optional[datetime] = None) -> float:
+        return self.rate * self.multiplier(moment or datetime.now())
+
+
+class RateController:
+    """
+    Paces micro-batches of one table to a target rate.
+
+    Rows are credited continuously at the profile's current rate and a batch
+    is released once enough credit has built up. Batch size adapts to the
+    observed COPY latency: it grows while batches load faster than
+    ``target_latency`` and shrinks when they load slower, so each COPY stays
+    around that latency. When loading falls behind, batches grow to catch up
+    (up to ``max_batch``) and credit beyond ``max_backlog`` seconds of rows is
+    dropped, which shows up as achieved < target in the report.
+    """
+
+    def __init__(self, profile: Callable[[], float], min_batch: int = 100, max_batch: int = 50000,
+                 target_latency: float = 1.0, max_interval: float = 5.0, max_backlog: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            profile: Callable returning the current target rate in rows per second
+            min_batch: Smallest micro-batch
+            max_batch: Largest micro-batch
+            target_latency: COPY latency per micro-batch to aim for, in seconds
+            max_interval: Longest wait between micro-batches, so low rates are not bursty
+            max_backlog: Seconds worth of rows the controller may fall behind before dropping credit
+            clock: Monotonic clock, replaceable for testing
+        """
+        self.profile = profile
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_latency = target_latency
+        self.max_interval = max_interval
+        self.max_backlog = max_backlog
+        self.clock = clock
+        self.batch_size = min_batch
+        self.latency = None  # exponentially weighted COPY latency
+        self.credit = 0.0
+        self.started = self.last_update = clock()
+        self.target_rows = 0.0
+        self.rows = 0
+        self.batches = 0
+        self.dropped_rows = 0.0
+
+    def _accrue(self) -> float:
+        now = self.clock()
+        rate = self.profile()
+        earned = rate * (now - self.last_update)
+        self.last_update = now
+        self.target_rows += earned
+        self.credit += earned
+        backlog_limit = max(rate * self.max_backlog, self.max_batch)
+        if self.credit > backlog_limit:
+            self.dropped_rows += self.credit - backlog_limit
+            self.credit = backlog_limit
+        return rate
+
+    def next_batch(self, stop: Optional[Event] = None) -> int:
+        """Block until the next micro-batch is due and return its size (0 if stopped)"""
+        while True:
+            rate = self._accrue()
+            # Low rates use smaller batches so rows arrive at least every max_interval
+            size = max(1, min(self.batch_size, int(rate * self.max_interval)))
+            if self.credit >= size:
+                # Catch up in one larger batch when behind
+                size = min(self.max_batch, max(size, int(self.credit)))
+                self.credit -= size
+                return size
+            wait = (size - self.credit) / rate if rate > 0 else self.max_interval
+            wait = min(wait, 1.0)  # re-read the profile at least every second
+            if stop is not None:
+                if stop.wait(wait):
+                    return 0
+            else:
+                time.sleep(wait)
+
+    def observe(self, rows: int, latency: float):
+        """Record a loaded micro-batch and adapt the batch size to its latency"""
+        self.rows += rows
+        self.batches += 1
+        self.latency = latency if self.latency is None else 0.7 * self.latency + 0.3 * latency
+        if self.latency > 0:
+            # Scale towards the target latency, at most doubling or halving per batch
+            factor = min(2.0, max(0.5, self.target_latency / self.latency))
+            self.batch_size = int(min(self.max_batch, max(self.min_batch, self.batch_size * factor)))
+
+    def report(self) -> dict:
+        elapsed = max(self.clock() - self.started, 1e-9)
+        return {
+            'target_rate': self.target_rows / elapsed,
+            'achieved_rate': self.rows / elapsed,
+            'current_target_rate': self.profile(),
+            'rows': self.rows,
+            'batches': self.batches,
+            'batch_size': self.batch_size,
+            'copy_latency': self.latency,
+            'dropped_rows': int(self.dropped_rows)
+        }
+
+
+class ContinuousRunner:
+    """
+    Streams every table continuously at its target rate.
+
+    Each table gets its own pacing thread, which generates a micro-batch with
+    ``DataSimulator.generate_data_parallel`` and loads it with
+    the simulator's sink as soon as its controller releases it. With
+    sharding, each replica produces its shard's share of the target rate,
+    renews its shard lease every ``renew_interval`` seconds and stops if the
+    lease was lost.
+    """
+
+    def __init__(self, simulator, tables: List[str], rates: Dict[str, float], profile_settings: dict,
+                 controller_settings: dict, report_interval: float = 30.0, renew_interval: float = 200.0):
+        self.simulator = simulator
+        self.tables = tables
+        self.report_interval = report_interval
+        self.renew_interval = renew_interval
+        self._stop = Event()
+        self._lock = Lock()
+        shard_count = simulator.shard.count
+        self.controllers = {
+            table: RateController(RateProfile(rates[table] / shard_count, **profile_settings), **controller_settings)
+            for table in tables
+        }
+        self.errors = {table: 0 for table in tables}
+
+    @classmethod
+    def from_config(cls, simulator, tables: Optional[List[str]] = None) -> "ContinuousRunner":
+        continuous_config = simulator.config.get('continuous', {})
+        tables = tables or simulator.config.get('tables')
+        default_rate = continuous_config.get('rate', 100)
+        table_rates = continuous_config.get('table_rates') or {}
+        diurnal_config = continuous_config.get('diurnal') or {}
+        return cls(
+            simulator,
+            tables,
+            rates={table: table_rates.get(table, default_rate) for table in tables},
+            profile_settings={
+                'profile': continuous_config.get('profile', 'flat'),
+                'peak_hour': diurnal_config.get('peak_hour', 14),
+                'trough_ratio': diurnal_config.get('trough_ratio', 0.2),
+                'hourly': diurnal_config.get('hourly')
+            },
+            controller_settings={
+                'min_batch': continuous_config.get('min_batch', 100),
+                'max_batch': continuous_config.get('max_batch', 50000),
+                'target_latency': continuous_config.get('target_latency', 1.0),
+                'max_interval': continuous_config.get('max_interval', 5.0),
+                'max_backlog': continuous_config.get('max_backlog', 30.0)
+            },
+            report_interval=continuous_config.get('report_interval', 30),
+            # Renew well before the lease expires, as a cron tick would between runs
+            renew_interval=simulator.config.get('sharding', {}).get('lease_ttl_seconds', 600) / 3
+        )
+
+    def stop(self):
+        self._stop.set()
+
+    def _run_table(self, table_name):
+        controller = self.controllers[table_name]
+        simulator = self.simulator
+        while not self._stop.is_set():
+            size = controller.next_batch(self._stop)
+            if not size:
+                break
+            try:
+                data = simulator.generate_data_parallel(table_name, size)
+                started = time.monotonic()
+                rows = simulator.sink.write(table_name, data, batch_size=size)
+                controller.observe(rows, time.monotonic() - started)
+            except Exception as e:
+                with self._lock:
+                    self.errors[table_name] += 1
+                logger.error(f"Continuous load of {table_name} failed: {e}")
+                self._stop.wait(1.0)
+
+    def run(self, duration: Optional[float] = None):
+        """
+        Stream until ``stop`` is called or ``duration`` seconds have passed.
+
+        Raises:
+            LeaseLost: The shard lease could not be renewed; streaming stopped
+                so that this replica does not duplicate another one's shard
+        """
+        threads = [Thread(target=self._run_table, args=(table,), name=f"continuous-{table}", daemon=True)
+                   for table in self.tables]
+        for thread in threads:
+            thread.start()
+        now = time.monotonic()
+        deadline = now + duration if duration else None
+        next_report = now + self.report_interval
+        next_renewal = now + self.renew_interval
+        try:
+            while not self._stop.is_set():
+                wake = min(next_report, next_renewal) if deadline is None else min(next_report, next_renewal, deadline)
+                if self._stop.wait(max(0.0, wake - time.monotonic())):
+                    break
+                now = time.monotonic()
+                if now >= next_renewal:
+                    self.simulator.shard.renew()
+                    next_renewal = now + self.renew_interval
+                if now >= next_report:
+                    self.log_report()
+                    # Persist sequences and reference keys periodically, as each cron tick does
+                    self.simulator.save_state()
+                    next_report = now + self.report_interval
+                if deadline is not None and now >= deadline:
+                    self.stop()
+        except Exception as e:
+            logger.error(f"Stopping continuous mode: {e}")
+            raise
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+            self.simulator.save_state()
+
+    def report(self) -> Dict[str, dict]:
+        return {table: dict(controller.report(), errors=self.errors[table])
+                for table, controller in self.controllers.items()}
+
+    def log_report(self):
+        for table, stats in self.report().items():
+            logger.info(
+                f"{table}: target {stats['target_rate']:.1f} rows/s, achieved {stats['achieved_rate']:.1f} rows/s "
+                f"(now {stats['current_target_rate']:.1f}), batch {stats['batch_size']}, "
+                f"copy {stats['copy_latency'] or 0:.3f}s, dropped {stats['dropped_rows']}, errors {stats['errors']}"
+            )
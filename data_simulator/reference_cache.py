@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import pickle
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from threading import RLock
+from typing import List, Optional, Tuple
+
+from data_simulator.reference_loader import ReferenceLoader, Reservoir
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("values", "seen", "high_water", "loaded_at", "size")
+
+    def __init__(self, values, seen, high_water, loaded_at):
+        self.values = values
+        self.seen = seen
+        self.high_water = high_water
+        self.loaded_at = loaded_at
+        self.size = _estimate_size(values)
+
+
+class ReferenceCache(Mapping):
+    """
+    Size-bounded cache of referenced column keys, keyed by (table, column).
+
+    Entries are evicted least-recently-used first once the estimated memory
+    budget is exceeded. A column without keys (its table not loaded yet) is
+    neither cached nor saved, so the next lookup queries it again. An entry older than ``ttl`` is refreshed incrementally:
+    only keys greater than its high-water mark are fetched and merged in. The
+    cache can be saved to and restored from an on-disk snapshot so a new
+    process starts warm.
+
+    Reads through ``cache[key]`` are plain dict lookups for the generators;
+    ``get_keys`` is the accounted path that loads, refreshes and counts hits.
+    ``version`` changes whenever the keys of an entry may have changed, so
+    copies of the cache (in worker processes) can tell they are stale.
+    """
+
+    def __init__(self, loader: ReferenceLoader, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                 snapshot_path: Optional[str] = None):
+        """
+        Args:
+            loader: ReferenceLoader used to fetch keys
+            max_bytes: Approximate memory budget across all entries (None is unbounded)
+            ttl: Seconds after which an entry is refreshed (None never refreshes)
+            snapshot_path: File used by save_snapshot / load_snapshot
+        """
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._entries = OrderedDict()
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.version = 0
+
+    @classmethod
+    def from_config(cls, loader: ReferenceLoader, config: dict) -> "ReferenceCache":
+        reference_config = config.get('references', {})
+        max_mb = reference_config.get('cache_max_mb')
+        cache = cls(
+            loader,
+            max_bytes=int(max_mb * 1024 * 1024) if max_mb else None,
+            ttl=reference_config.get('ttl_seconds'),
+            snapshot_path=reference_config.get('snapshot_path')
+        )
+        cache.load_snapshot()
+        return cache
+
+    # Mapping interface used by the compiled generators and worker processes
+    def __getitem__(self, key: Tuple[str, str]) -> List:
+        entry = self._entries.get(key)
+        if entry is None:
+            # Evicted while in use: load it again rather than failing the batch
+            return self.get_keys(*key)
+        return entry.values
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_keys(self, table_name: str, column: str) -> List:
+        """Return the cached keys of a referenced column, loading or refreshing them as needed"""
+        key = (table_name, column)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                entry = self._load(key)
+            else:
+                self.hits += 1
+                if self.ttl is not None and time.time() - entry.loaded_at > self.ttl:
+                    self.refreshes += 1
+                    entry = self._load(key, entry)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._evict(keep=key)
+            return entry.values
+
+    def refresh(self, table_name: str, column: str) -> List:
+        """Fetch only keys newer than the entry's high-water mark"""
+        key = (table_name, column)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.refreshes += 1
+            entry = self._load(key, entry)
+            self._evict(keep=key)
+            return entry.values
+
+    def invalidate(self, table_name: Optional[str] = None, column: Optional[str] = None):
+        """Drop one entry, all entries of a table, or everything"""
+        with self._lock:
+            for key in list(self._entries):
+                if (table_name is None or key[0] == table_name) and (column is None or key[1] == column):
+                    del self._entries[key]
+                    self.version += 1
+
+    def clear(self):
+        self.invalidate()
+
+    def _load(self, key, entry=None) -> _Entry:
+        table_name, column = key
+        if entry is None:
+            reservoir = Reservoir(self.loader.sample_size, rng=self.loader.rng)
+            high_water = None
+        else:
+            reservoir = Reservoir(self.loader.sample_size, entry.values, entry.seen, rng=self.loader.rng)
+            high_water = entry.high_water
+
+        # Keys arrive in ascending order, so the last one is the new high-water mark
+        for value in self.loader.iter_keys(table_name, column, after=high_water):
+            reservoir.add(value)
+            high_water = value
+
+        new_entry = _Entry(reservoir.items, reservoir.seen, high_water, time.time())
+        if not new_entry.values:
+            # Retried on the next lookup rather than served empty for a whole TTL
+            return new_entry
+        self._entries[key] = new_entry
+        if entry is None or new_entry.seen != entry.seen:
+            self.version += 1
+        return new_entry
+
+    def _evict(self, keep=None):
+        if self.max_bytes is None:
+            return
+        total = sum(entry.size for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._entries.pop(key).size
+            self.evictions += 1
+        if total > self.max_bytes:
+            logger.warning(f"Reference cache holds {total} bytes, over its {self.max_bytes} byte budget")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(entry.size for entry in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'refreshes': self.refreshes,
+                'evictions': self.evictions
+            }
+
+    def save_snapshot(self, path: Optional[str] = None):
+        """Write all entries to disk atomically"""
+        path = Path(path) if path else self.snapshot_path
+        if path is None:
+            return
+        with self._lock:
+            state = {
+                key: (entry.values, entry.seen, entry.high_water, entry.loaded_at)
+                for key, entry in self._entries.items() if entry.values
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self, path: Optional[str] = None) -> int:
+        """Restore entries from disk; returns the number of entries loaded"""
+        path = Path(path) if path else self.snapshot_path
+        if path is None or not path.exists():
+            return 0
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable reference cache snapshot {path}: {e}")
+            return 0
+        with self._lock:
+            loaded = 0
+            for key, (values, seen, high_water, loaded_at) in state.items():
+                if values:  # Snapshots written before empty columns were skipped may hold some
+                    self._entries[key] = _Entry(values, seen, high_water, loaded_at)
+                    loaded += 1
+            self.version += 1
+            self._evict()
+        return loaded
+
+
+def _estimate_size(values: List, sample: int = 100) -> int:
+    """Approximate memory of a list of keys, extrapolated from its first items"""
+    size = sys.getsizeof(values)
+    if values:
+        head = values[:sample]
+        size += sum(sys.getsizeof(value) for value in head) * len(values) // len(head)
+    return size
@@ -0,0 +1,104 @@
+import random
+from typing import Iterator, List, Optional
+
+MODES = ('keyset', 'stream')
+
+
+class ReferenceLoader:
+    """
+    Loads the distinct keys of a referenced column for foreign key generation.
+
+    ``keyset`` mode pages through the keys in key order, each page starting
+    after the last key of the previous one, so every page is an index range
+    scan instead of a full scan and sort. ``stream`` mode reads all keys
+    through a single server-side cursor. Either way, ``sample_size`` keeps a
+    uniform reservoir sample rather than the whole column.
+    """
+
+    def __init__(self, db, mode: str = 'keyset', page_size: int = 10000,
+                 sample_size: Optional[int] = None, rng=random):
+        """
+        Args:
+            db: VerticaDB instance
+            mode: "keyset" or "stream"
+            page_size: Keys fetched per query in keyset mode
+            sample_size: Keep at most this many keys per column (None keeps all)
+            rng: Object exposing the ``random`` module API, used for sampling
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unsupported reference loading mode: {mode}")
+        self.db = db
+        self.mode = mode
+        self.page_size = page_size
+        self.sample_size = sample_size
+        self.rng = rng
+
+    @classmethod
+    def from_config(cls, db, config: dict, rng=random) -> "ReferenceLoader":
+        reference_config = config.get('references', {})
+        return cls(
+            db,
+            mode=reference_config.get('mode', 'keyset'),
+            page_size=reference_config.get('page_size', 10000),
+            sample_size=reference_config.get('sample_size'),
+            rng=rng
+        )
+
+    def iter_keys(self, table_name: str, column: str, after=None) -> Iterator:
+        """Yield the distinct keys of a column in ascending order, optionally only those after ``after``"""
+        if self.mode == 'stream':
+            for row in self.db.read_keys(table_name, column, after=after, stream=True):
+                yield row[0]
+            return
+
+        while True:
+            page = self.db.read_keys(table_name, column, after=after, limit=self.page_size)
+            for row in page:
+                yield row[0]
+            if len(page) < self.page_size:
+                break
+            after = page[-1][0]
+
+    def load(self, table_name: str, column: str, after=None) -> List:
+        """Return the keys of a column as a list, reservoir-sampled down to ``sample_size`` if set"""
+        keys = self.iter_keys(table_name, column, after=after)
+        if not self.sample_size:
+            return list(keys)
+        return reservoir_sample(keys, self.sample_size, self.rng)
+
+
+class Reservoir:
+    """
+    Uniform sample of at most ``size`` items from a stream of unknown length
+    (Algorithm R). Sampling can be resumed later with more items.
+    """
+
+    def __init__(self, size: Optional[int], items: Optional[List] = None, seen: int = 0, rng=random):
+        """
+        Args:
+            size: Maximum number of items kept (None keeps every item)
+            items: Previously sampled items to resume from
+            seen: Number of items the previous sample was drawn from
+            rng: Object exposing the ``random`` module API
+        """
+        self.size = size
+        self.items = list(items) if items else []
+        self.seen = seen or len(self.items)
+        self._randrange = rng.randrange
+
+    def add(self, item):
+        if not self.size or self.seen < self.size:
+            self.items.append(item)
+        else:
+            slot = self._randrange(self.seen + 1)
+            if slot < self.size:
+                self.items[slot] = item
+        self.seen += 1
+
+
+def reservoir_sample(items, size: int, rng=random) -> List:
+    """Uniform sample of at most ``size`` items from an iterable of unknown length"""
+    reservoir = Reservoir(size, rng=rng)
+    for item in items:
+        reservoir.add(item)
+    return reservoir.items
@@ -0,0 +1,215 @@
+import signal
+import logging
+from datetime import datetime, timedelta
+from threading import Event
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OVERLAP_POLICIES = ('skip', 'coalesce')
+
+# (minimum, maximum) of the five cron fields
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+_NAMES = [
+    {},
+    {},
+    {},
+    {name: month for month, name in enumerate(
+        ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)},
+    {name: day for day, name in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])},
+]
+
+
+class CronSchedule:
+    """
+    Standard five-field cron expression (minute, hour, day of month, month,
+    day of week) supporting ``*``, lists, ranges, steps and month/day names.
+
+    As in cron, when both day of month and day of week are restricted a day
+    matches if either field matches.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = [
+            _parse_field(field, index) for index, field in enumerate(fields)
+        ]
+        # Both 0 and 7 mean Sunday
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_match = moment.day in self.days
+        # datetime.weekday() is 0 for Monday, cron uses 0 for Sunday
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return weekday_match
+        if self.any_weekday:
+            return day_match
+        return day_match or weekday_match
+
+    def matches(self, moment: datetime) -> bool:
+        return (moment.minute in self.minutes and moment.hour in self.hours
+                and moment.month in self.months and self._day_matches(moment))
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after ``moment``"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Skip whole days and hours that cannot match before checking minutes
+        for _ in range(366 * 24 * 60 * 5):
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+def _parse_field(field: str, index: int) -> set:
+    low, high = _FIELD_RANGES[index]
+    names = _NAMES[index]
+
+    def value(token):
+        token = token.lower()
+        if token in names:
+            return names[token]
+        number = int(token)
+        if not low <= number <= high:
+            raise ValueError(f"Cron value {number} out of range {low}-{high}")
+        return number
+
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid cron step: '{field}'")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (value(token) for token in part.split('-', 1))
+        else:
+            start = value(part)
+            end = high if step > 1 else start
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class Scheduler:
+    """
+    Runs a job on a cron schedule inside a long-lived process.
+
+    A tick that comes due while the previous run is still going is never run
+    concurrently. With ``overlap='skip'`` the missed ticks are dropped and the
+    scheduler waits for the next future tick; with ``overlap='coalesce'`` all
+    missed ticks are folded into a single run started as soon as the previous
+    one finishes.
+
+    ``stop`` (also wired to SIGTERM / SIGINT by ``install_signal_handlers``)
+    lets the current run finish and then returns from ``run_forever``.
+    """
+
+    def __init__(self, job: Callable[[datetime], None], schedule: CronSchedule, overlap: str = 'skip',
+                 run_on_start: bool = False, now: Callable[[], datetime] = datetime.now):
+        """
+        Args:
+            job: Callable receiving the scheduled time of the tick
+            schedule: When to run the job
+            overlap: "skip" or "coalesce" ticks missed while a run was in progress
+            run_on_start: Run once immediately instead of waiting for the first tick
+            now: Clock, replaceable for testing
+        """
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"Unsupported overlap policy: {overlap}")
+        self.job = job
+        self.schedule = schedule
+        self.overlap = overlap
+        self.run_on_start = run_on_start
+        self.now = now
+        self._stop = Event()
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.coalesced = 0
+
+    @classmethod
+    def from_config(cls, job: Callable, config: dict) -> "Scheduler":
+        scheduler_config = config.get('scheduler', {})
+        return cls(
+            job,
+            CronSchedule(config.get('cron_schedule', '0 0 * * *')),
+            overlap=scheduler_config.get('overlap', 'skip'),
+            run_on_start=scheduler_config.get('run_on_start', False)
+        )
+
+    def install_signal_handlers(self, signals: Optional[List[int]] = None):
+        """Stop gracefully on SIGTERM / SIGINT (main thread only)"""
+        for signum in signals or [signal.SIGTERM, signal.SIGINT]:
+            signal.signal(signum, self._handle_signal)
+
+    def _handle_signal(self, signum, frame):
+        logger.info(f"Received signal {signum}, stopping after the current run")
+        self.stop()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def _missed_ticks(self, scheduled: datetime, finished: datetime) -> List[datetime]:
+        missed = []
+        tick = self.schedule.next_after(scheduled)
+        while tick <= finished:
+            missed.append(tick)
+            tick = self.schedule.next_after(tick)
+        return missed
+
+    def _run(self, scheduled: datetime):
+        self.runs += 1
+        try:
+            self.job(scheduled)
+        except Exception as e:
+            self.failures += 1
+            logger.exception(f"Scheduled run for {scheduled} failed: {e}")
+
+    def run_forever(self):
+        """Run the job on every tick until ``stop`` is called"""
+        logger.info(f"Scheduler started with {self.schedule} (overlap: {self.overlap})")
+        # With run_on_start the first run is due right away, as a tick scheduled for now
+        scheduled = self.now()
+        if not self.run_on_start:
+            scheduled = self.schedule.next_after(scheduled)
+
+        while not self.stopping:
+            delay = (scheduled - self.now()).total_seconds()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            self._run(scheduled)
+
+            missed = self._missed_ticks(scheduled, self.now())
+            if missed and self.overlap == 'coalesce':
+                self.coalesced += len(missed) - 1
+                scheduled = missed[-1]
+            else:
+                self.skipped += len(missed)
+                scheduled = self.schedule.next_after(missed[-1] if missed else scheduled)
+                if missed:
+                    logger.warning(f"Skipped {len(missed)} tick(s) that came due during the last run")
+        logger.info(f"Scheduler stopped after {self.runs} run(s)")
+
+    def stats(self) -> dict:
+        return {'runs': self.runs, 'failures': self.failures, 'skipped': self.skipped, 'coalesced': self.coalesced}
@@ -0,0 +1,469 @@
+import logging
+import random
+from functools import partial
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Tuple
+
+from data_simulator.entities import EntityColumnGenerator
+from data_simulator.timestamps import TIME_TOTAL_ROWS, TIME_WINDOW, DerivedTimestampGenerator, EventClock, TimestampGenerator
+from data_simulator.value_pools import ValuePoolRegistry, freeze
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnPlan:
+    """A single column with its generator resolved ahead of time."""
+
+    __slots__ = ("name", "config", "sim_type", "null_probability", "generate", "pool", "generate_batch")
+
+    def __init__(self, name, config, sim_type, null_probability, generate, pool=None, generate_batch=None):
+        self.name = name
+        self.config = config
+        self.sim_type = sim_type
+        self.null_probability = null_probability
+        self.generate = generate
+        self.pool = pool  # ValuePool the column samples from, if it uses the pool strategy
+        # Callable (count, context[, numpy rng]) generating a whole batch, for timestamp and entity columns
+        self.generate_batch = generate_batch
+
+    @property
+    def depends_on(self):
+        """Columns of the same row this column is computed from"""
+        return getattr(self.generate_batch, 'depends_on', ())
+
+    def __repr__(self):
+        return f"ColumnPlan({self.name!r}, {self.sim_type!r})"
+
+
+class TablePlan:
+    """
+    Compiled generation plan for one table.
+
+    Holds the column order and one pre-bound zero-argument callable per column,
+    so generating a row is a single pass over a list with no config lookups.
+    Timestamp columns generate a whole batch at once instead; columns derived
+    from others are generated after them (``order``), reading their values
+    from a per-batch context.
+    """
+
+    def __init__(self, table_name: str, columns: List[ColumnPlan]):
+        self.table_name = table_name
+        self.columns = columns
+        self.column_names = [column.name for column in columns]
+        self._generators = [(column.name, column.generate) for column in columns]
+        self.batch_columns = [column.name for column in columns if column.generate_batch is not None]
+        self.order = _dependency_order(columns)
+        self.references = [
+            (column.config['simulation']['table'], column.config['simulation']['column'])
+            for column in columns if column.sim_type == 'reference'
+        ]
+
+    def __len__(self):
+        return len(self.columns)
+
+    def generate_record(self) -> Dict:
+        return self.generate_records(1)[0]
+
+    def generate_records(self, count: int) -> List[Dict]:
+        if self.batch_columns:
+            names = self.column_names
+            return [dict(zip(names, row)) for row in zip(*self.generate_columns(count))]
+        generators = self._generators
+        return [{name: generate() for name, generate in generators} for _ in range(count)]
+
+    def generate_columns(self, count: int, window: Optional[Tuple[float, float]] = None,
+                         total_rows: Optional[int] = None) -> List[List]:
+        """
+        Generate ``count`` values per column, returned column by column in plan order.
+
+        Args:
+            count: Number of rows
+            window: (start, end) epoch seconds replacing the "-5m".."now" style
+                windows of the timestamp columns, e.g. for a backfill partition
+            total_rows: Rows planned for the whole tick this batch is part of,
+                so event times advance by the batch's share of the window
+        """
+        if not self.batch_columns:
+            return [[generate() for _ in range(count)] for _, generate in self._generators]
+        context = {TIME_WINDOW: window, TIME_TOTAL_ROWS: total_rows}
+        columns = [None] * len(self.columns)
+        for index in self.order:
+            columns[index] = self.generate_column(index, count, context)
+        return columns
+
+    def generate_column(self, index: int, count: int, context: Optional[Dict] = None) -> List:
+        """
+        Generate ``count`` values of the column at ``index``.
+
+        Args:
+            index: Column position in the plan
+            count: Number of values
+            context: Values of the columns generated earlier in the same batch,
+                filled in as columns are generated in ``order``
+        """
+        column = self.columns[index]
+        if column.generate_batch is not None:
+            values = column.generate_batch(count, {} if context is None else context)
+        else:
+            generate = column.generate
+            values = [generate() for _ in range(count)]
+        if context is not None:
+            context[column.name] = values
+        return values
+
+
+class SchemaCompiler:
+    """
+    Turns a table schema (as returned by ``DataSimulator.get_table_schema``) into
+    a ``TablePlan``.
+
+    All per-cell decisions -- simulation type dispatch, Faker method
+    resolution, parameter lookups and null thresholds -- are taken once here
+    instead of once per value.
+    """
+
+    def __init__(self, faker, rng=random, reference_cache: Optional[Dict] = None,
+                 sequence_factory: Optional[Callable] = None, value_pools: Optional[ValuePoolRegistry] = None,
+                 profiler=None, fast_timestamps: bool = True, entities=None):
+        """
+        Args:
+            faker: Faker instance used for ``faker`` and ``date`` columns
+            rng: Object exposing the ``random`` module API (module or ``random.Random``)
+            reference_cache: Mapping of (table, column) -> list of referenced values
+            sequence_factory: Callable (table_name, column_name, col_config) returning
+                a zero-argument callable that yields the next sequence value
+            value_pools: Registry of pre-generated value pools for columns using
+                the pool strategy
+            profiler: ``ColumnProfiler`` counting the retries of bounded
+                distributions while profiling
+            fast_timestamps: Generate Faker ``date_time_between`` and ``date``
+                columns with the batch timestamp engine
+            entities: ``EntityPool`` the identity columns listed in its
+                ``columns`` are drawn from
+        """
+        self.faker = faker
+        self.rng = rng
+        self.reference_cache = reference_cache if reference_cache is not None else {}
+        self.sequence_factory = sequence_factory or self._default_sequence
+        self.value_pools = value_pools
+        self.profiler = profiler
+        self.fast_timestamps = fast_timestamps
+        self.entities = entities
+        # Event time clocks per (table, column), kept across recompilations so event times never go back
+        self.event_clocks = {}
+
+    def compile(self, table_name: str, schema: Dict) -> TablePlan:
+        columns = [
+            self.compile_column(table_name, column_name, col_config)
+            for column_name, col_config in schema.items()
+        ]
+        # Derived timestamps whose base column is not in this table use their own window
+        for column in columns:
+            if isinstance(column.generate_batch, DerivedTimestampGenerator):
+                column.generate_batch = column.generate_batch.resolve(schema)
+                column.generate = _single(column.generate_batch)
+        return TablePlan(table_name, columns)
+
+    def compile_column(self, table_name: str, column_name: str, col_config: Dict) -> ColumnPlan:
+        sim_config = col_config.get('simulation', {})
+        sim_type = sim_config.get('type')
+        null_prob = col_config.get('null_probability', 0)
+
+        pool = None
+        generate_batch = None
+        try:
+            generate_batch = self._entity_generator(column_name, col_config) \
+                or self._timestamp_generator(table_name, column_name, col_config)
+            if generate_batch is not None:
+                generate = _single(generate_batch)
+            else:
+                generate = self._build_generator(table_name, column_name, col_config)
+                pool = self._value_pool(sim_config, col_config, generate)
+                if pool is not None:
+                    generate = pool.sampler(self.rng)
+        except Exception as e:
+            logger.error(f"Error compiling generator for {table_name}.{column_name}: {str(e)}")
+            generate = _constant(None)  # Fallback to null, as the interpreted path does
+
+        # Batch generators draw their own nulls
+        if generate_batch is None and sim_type != 'reference' and null_prob > 0:
+            generate = self._with_nulls(generate, null_prob)
+
+        return ColumnPlan(column_name, col_config, sim_type, null_prob, generate, pool, generate_batch)
+
+    def _entity_generator(self, column_name, col_config):
+        """Batch generator drawing the column from the shared entity pool, or None if it is not an entity column"""
+        if self.entities is None or col_config.get('simulation', {}).get('type') == 'reference':
+            return None
+        attribute = self.entities.attribute_for(column_name)
+        if attribute is None:
+            return None
+        return EntityColumnGenerator(self.entities, attribute, col_config.get('type'),
+                                     col_config.get('null_probability', 0), rng=self.rng)
+
+    def _timestamp_generator(self, table_name, column_name, col_config):
+        """
+        Batch generator for ``timestamp`` columns, and for Faker
+        ``date_time_between`` and ``date`` columns unless they use a value pool
+        or ``fast_timestamps`` is off. Returns None for every other column.
+        """
+        sim_config = col_config.get('simulation', {})
+        sim_type = sim_config.get('type')
+        params = dict(sim_config.get('params') or {})
+        null_prob = col_config.get('null_probability', 0)
+
+        if sim_type != 'timestamp':
+            if not self.fast_timestamps or (self.value_pools is not None and self.value_pools.spec_for(col_config)):
+                return None
+            if sim_type == 'date':
+                # Same window and second precision as _date_generator
+                params = {'start_date': params.get('start_date', '-1y'), 'end_date': params.get('end_date', 'now'),
+                          'precision': 0}
+            elif sim_type == 'faker' and sim_config.get('method') == 'date_time_between' \
+                    and set(params) <= {'start_date', 'end_date'}:
+                # str() of Faker's datetimes, with microseconds and Faker's default window
+                params = {'start_date': params.get('start_date', '-30y'), 'end_date': params.get('end_date', 'now'),
+                          'precision': 6}
+            else:
+                return None
+
+        window = TimestampGenerator(
+            column_name,
+            start=params.get('start_date', '-5m'),
+            end=params.get('end_date', 'now'),
+            mode=params.get('mode', 'random'),
+            interval=params.get('interval'),
+            jitter=params.get('jitter', 0.5),
+            precision=params.get('precision', 6),
+            null_probability=null_prob,
+            rng=self.rng,
+            clock=self.event_clocks.setdefault((table_name, column_name), EventClock())
+        )
+        if not params.get('derived_from'):
+            return window
+        return DerivedTimestampGenerator(
+            column_name,
+            params['derived_from'],
+            offset_column=params.get('offset_column'),
+            offset_unit=params.get('offset_unit', 'ms'),
+            offset=params.get('offset', 0.0),
+            precision=params.get('precision', 6),
+            null_probability=null_prob,
+            rng=self.rng,
+            fallback=window
+        )
+
+    def _value_pool(self, sim_config, col_config, generate):
+        """Shared pool of pre-generated values for Faker/date columns that opt into the pool strategy"""
+        if self.value_pools is None or sim_config.get('type') not in ('faker', 'date'):
+            return None
+        spec = self.value_pools.spec_for(col_config)
+        if spec is None:
+            return None
+        key = (
+            sim_config.get('type'),
+            sim_config.get('provider'),
+            sim_config.get('method'),
+            freeze(sim_config.get('params') or {})
+        )
+        return self.value_pools.get(key, generate, spec['size'], spec['skew'])
+
+    def _build_generator(self, table_name, column_name, col_config):
+        sim_config = col_config.get('simulation', {})
+        if not sim_config:
+            raise ValueError(f"No simulation configuration found for the column: {col_config.get('field_name')}")
+
+        sim_type = sim_config.get('type')
+        if sim_type == 'reference':
+            return self._reference_generator(sim_config)
+        elif sim_type == 'sequence':
+            return self.sequence_factory(table_name, column_name, col_config)
+        elif sim_type == 'faker':
+            return self._faker_generator(column_name, col_config)
+        elif sim_type == 'enum':
+            return _guarded(column_name, self._enum_generator(sim_config))
+        elif sim_type == 'random':
+            stats = self.profiler.stats_for(table_name, column_name, sim_type) if self.profiler else None
+            return _guarded(column_name, self._random_generator(sim_config, stats))
+        elif sim_type == 'date':
+            return self._date_generator(column_name, sim_config)
+        elif sim_type == 'constant':
+            return _constant(sim_config.get('value'))
+        raise ValueError(f"Unsupported simulation type: {sim_type}")
+
+    def _with_nulls(self, generate, null_prob):
+        rand = self.rng.random
+
+        def nullable():
+            if rand() < null_prob:
+                return None
+            return generate()
+        return nullable
+
+    def _reference_generator(self, sim_config):
+        cache = self.reference_cache
+        key = (sim_config['table'], sim_config['column'])
+        choice = self.rng.choice
+        return lambda: choice(cache[key])
+
+    def _default_sequence(self, table_name, column_name, col_config):
+        sim_config = col_config.get('simulation', {})
+        state = {'next': sim_config.get('start', 0)}
+        step = sim_config.get('step', 1)
+
+        def next_value():
+            value = state['next']
+            state['next'] = value + step
+            return value
+        return next_value
+
+    def _faker_generator(self, column_name, col_config):
+        sim_config = col_config['simulation']
+        provider = sim_config.get('provider')
+        method = sim_config.get('method')
+        params = dict(sim_config.get('params') or {})
+
+        if not method:
+            raise ValueError(f"Faker configuration must include 'method' for column: {col_config.get('field_name')}")
+
+        # Resolve the bound method: 'word.words' first, then the Faker instance, then the provider
+        if provider == 'word' and method == 'words':
+            words = partial(self.faker.words, **params)
+            join = ' '.join
+            return _guarded(column_name, lambda: join(words()))
+
+        if hasattr(self.faker, method):
+            bound = getattr(self.faker, method)
+        elif provider:
+            faker_provider = getattr(self.faker, provider)
+            if not hasattr(faker_provider, method):
+                raise ValueError(f"Method '{method}' not found in provider '{provider}'")
+            bound = getattr(faker_provider, method)
+        else:
+            raise ValueError(f"Method '{method}' not found in Faker instance")
+
+        call = partial(bound, **params)
+
+        def faker_value():
+            result = call()
+            return None if result is None else str(result)
+        return _guarded(column_name, faker_value)
+
+    def _enum_generator(self, sim_config):
+        values = sim_config.get('values')
+        weights = sim_config.get('weights')
+        if not values:
+            raise ValueError("Enum configuration must include 'values'.")
+        if weights is not None and len(weights) != len(values):
+            raise ValueError("The number of enum weights does not match the number of values")
+
+        if weights is None:
+            choice = self.rng.choice
+            return lambda: choice(values)
+        # Precomputed cumulative weights skip the per-call accumulation in random.choices
+        choices = self.rng.choices
+        cum_weights = list(accumulate(weights))
+        return lambda: choices(values, cum_weights=cum_weights, k=1)[0]
+
+    def _random_generator(self, sim_config, stats=None):
+        distribution = sim_config.get('distribution')
+        params = sim_config.get('params', {})
+        precision = params.get('precision')
+
+        if distribution == 'normal':
+            mean = params.get('mean', 0)
+            std_dev = params.get('std_dev', 1)
+            min_val = params.get('min', float('-inf'))
+            max_val = params.get('max', float('inf'))
+            fallback = max(min_val, min(max_val, mean))
+            normalvariate = self.rng.normalvariate
+            max_attempts = 100
+
+            def normal_value():
+                for attempt in range(max_attempts):
+                    value = normalvariate(mean, std_dev)
+                    if min_val <= value <= max_val:
+                        break
+                else:
+                    value = fallback
+                if attempt and stats is not None:
+                    stats.retries += attempt  # rejected draws, counted only while profiling
+                return value
+            return _rounded(normal_value, precision)
+
+        elif distribution == 'uniform':
+            min_val = params.get('min', 0)
+            max_val = params.get('max', 1)
+            uniform = self.rng.uniform
+            return _rounded(lambda: uniform(min_val, max_val), precision)
+
+        elif distribution == 'choice':
+            choices = params.get('choices')
+            if not choices:
+                raise ValueError("Random choice configuration must include 'choices'.")
+            choice = self.rng.choice
+            return lambda: choice(choices)
+
+        raise ValueError(f"Unsupported random distribution: {distribution}")
+
+    def _date_generator(self, column_name, sim_config):
+        params = sim_config.get('params', {})
+        between = partial(
+            self.faker.date_time_between,
+            start_date=params.get('start_date', '-1y'),
+            end_date=params.get('end_date', 'now')
+        )
+
+        def date_value():
+            value = between()
+            return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+        return _guarded(column_name, date_value)
+
+
+def _constant(value):
+    return lambda: value
+
+
+def _single(generate_batch):
+    """Per-cell generator of a batch generator, for callers that generate one value at a time"""
+    return lambda: generate_batch(1, {})[0]
+
+
+def _dependency_order(columns: List[ColumnPlan]) -> List[int]:
+    """Column indexes with every column after the columns it is derived from, otherwise in plan order"""
+    positions = {column.name: index for index, column in enumerate(columns)}
+    order = []
+    state = {}  # index -> False while visiting, True once ordered
+
+    def visit(index, path):
+        if state.get(index):
+            return
+        if index in state:
+            raise ValueError(f"Circular column dependency: {' -> '.join(path)}")
+        state[index] = False
+        for name in columns[index].depends_on:
+            if name in positions:
+                visit(positions[name], path + [name])
+        state[index] = True
+        order.append(index)
+
+    for index, column in enumerate(columns):
+        visit(index, [column.name])
+    return order
+
+
+def _rounded(generate, precision):
+    if precision is None:
+        return generate
+    return lambda: round(generate(), precision)
+
+
+def _guarded(column_name, generate):
+    """Log and return null on runtime errors, so one bad column does not fail the batch."""
+    def guarded():
+        try:
+            return generate()
+        except Exception as e:
+            logger.error(f"Error generating data for {column_name}: {str(e)}")
+            return None
+    return guarded
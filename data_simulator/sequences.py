@@ -0,0 +1,225 @@
+import os
+import json
+import logging
+from contextlib import ExitStack
+from pathlib import Path
+from threading import Lock, local
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Sequence:
+    __slots__ = ("next_value", "step", "persisted", "lock")
+
+    def __init__(self, next_value, step):
+        self.next_value = next_value
+        self.step = step
+        self.persisted = next_value  # high-water mark known to be in the state file
+        self.lock = Lock()
+
+
+class SequenceService:
+    """
+    Hands out sequence values per (table, column).
+
+    Each thread draws from a private block of ``block_size`` values, so the hot
+    path is lock-free; the shared counter is only locked to hand out a new
+    block. The state file at ``state_path`` always holds a mark above every
+    value handed out: when a reservation passes the persisted mark, the mark
+    is moved ``reserve_ahead`` blocks further and written, so the file is
+    rewritten once per ``reserve_ahead`` blocks rather than on every block.
+    ``save`` (at shutdown or after each run) writes the exact high-water
+    marks, so a new process never reissues values of a previous one and only
+    skips values after a crash. When there is no saved state, the counter
+    can be seeded once from ``MAX(column)`` in the database.
+
+    With ``gap_free`` every value is taken from the shared counter under its
+    lock, so no values are lost to partially used blocks; the state file is
+    kept ahead of the counter the same way.
+
+    When several replicas generate the same tables, shard ``i`` of ``n`` only
+    hands out values ``start + (i + k * n) * step``, so replicas never collide
+    without coordinating. A mark saved under another shard layout still
+    bounds the values handed out before, so after a change of replica count
+    the highest saved mark of the column is used.
+    """
+
+    def __init__(self, block_size: int = 1000, gap_free: bool = False, state_path: Optional[str] = None,
+                 seed_source: Optional[Callable] = None, shard_index: int = 0, shard_count: int = 1,
+                 reserve_ahead: int = 100):
+        """
+        Args:
+            block_size: Values reserved per thread at a time
+            gap_free: Allocate values one by one instead of in blocks
+            state_path: JSON file holding the high-water marks
+            reserve_ahead: Blocks persisted ahead of the values handed out; the
+                state file is rewritten once per this many blocks
+            seed_source: Callable (table, column) returning the current maximum
+                value in the database, or None
+            shard_index: Index of this replica among ``shard_count`` replicas
+            shard_count: Number of replicas sharing each sequence
+        """
+        self.block_size = block_size
+        self.gap_free = gap_free
+        self.state_path = Path(state_path) if state_path else None
+        self.seed_source = seed_source
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.reserve_ahead = max(1, reserve_ahead)
+        self._sequences: Dict[Tuple[str, str], _Sequence] = {}
+        self._lock = Lock()
+        self._blocks = local()
+        self._saved_state = self._load_state()
+
+    @classmethod
+    def from_config(cls, config: dict, seed_source: Optional[Callable] = None, shard=None) -> "SequenceService":
+        sequence_config = config.get('sequences', {})
+        return cls(
+            block_size=sequence_config.get('block_size', 1000),
+            gap_free=sequence_config.get('gap_free', False),
+            state_path=sequence_config.get('state_path'),
+            seed_source=seed_source if sequence_config.get('seed_from_db') else None,
+            shard_index=shard.index if shard else 0,
+            shard_count=shard.count if shard else 1,
+            reserve_ahead=sequence_config.get('reserve_ahead', 100)
+        )
+
+    def shard_stride(self, start: int = 0, step: int = 1) -> Tuple[int, int]:
+        """First value and step of this shard's slice of a sequence"""
+        return start + self.shard_index * step, step * self.shard_count
+
+    def _sequence(self, table_name, column, start, step) -> _Sequence:
+        key = (table_name, column)
+        sequence = self._sequences.get(key)
+        if sequence is None:
+            with self._lock:
+                sequence = self._sequences.get(key)
+                if sequence is None:
+                    start, step = self.shard_stride(start, step)
+                    sequence = self._sequences[key] = _Sequence(self._initial_value(key, start, step), step)
+        return sequence
+
+    def _initial_value(self, key, start, step):
+        saved = self._saved_state.get(self._state_key(key))
+        if saved is None:
+            saved = self._saved_mark_any_layout(key)
+        if saved is not None:
+            return _align(max(start, saved), start, step)
+        if self.seed_source is not None:
+            try:
+                current_max = self.seed_source(*key)
+            except Exception as e:
+                logger.warning(f"Could not seed sequence {self._state_key(key)} from the database: {e}")
+                current_max = None
+            if current_max is not None:
+                return _align(max(start, int(current_max) + 1), start, step)
+        return start
+
+    def _saved_mark_any_layout(self, key) -> Optional[int]:
+        """Highest mark saved for a column under any shard layout, or None"""
+        name = f"{key[0]}.{key[1]}"
+        marks = [mark for state_key, mark in self._saved_state.items()
+                 if state_key == name or state_key.startswith(name + '@')]
+        return max(marks) if marks else None
+
+    def _state_key(self, key):
+        if self.shard_count > 1:
+            return f"{key[0]}.{key[1]}@{self.shard_index}/{self.shard_count}"
+        return f"{key[0]}.{key[1]}"
+
+    def reserve(self, table_name: str, column: str, count: int, start: int = 0, step: int = 1) -> int:
+        """Reserve ``count`` consecutive values and return the first one"""
+        sequence = self._sequence(table_name, column, start, step)
+        with sequence.lock:
+            first = sequence.next_value
+            sequence.next_value = first + count * sequence.step
+            self._persist_ahead((table_name, column), sequence, count)
+        return first
+
+    def _persist_ahead(self, key, sequence: _Sequence, count: int):
+        """Write a mark ``reserve_ahead`` blocks past the counter once it passes the persisted one; call under ``sequence.lock``"""
+        if self.state_path is not None and sequence.next_value > sequence.persisted:
+            # Rare: the values are only handed out once a mark above them is on disk
+            headroom = max(count, self.block_size) * self.reserve_ahead * sequence.step
+            sequence.persisted = sequence.next_value + headroom
+            self._write_state({self._state_key(key): sequence.persisted})
+
+    def generator(self, table_name: str, column: str, start: int = 0, step: int = 1) -> Callable:
+        """Zero-argument callable returning the next value of the sequence"""
+        sequence = self._sequence(table_name, column, start, step)
+        step = sequence.step
+        key = (table_name, column)
+        if self.gap_free:
+            persist_ahead = self._persist_ahead
+
+            def next_gap_free():
+                with sequence.lock:
+                    value = sequence.next_value
+                    sequence.next_value = value + step
+                    persist_ahead(key, sequence, 1)
+                return value
+            return next_gap_free
+
+        blocks = self._blocks
+        block_size = self.block_size
+
+        def next_value():
+            thread_blocks = getattr(blocks, 'blocks', None)
+            if thread_blocks is None:
+                thread_blocks = blocks.blocks = {}
+            block = thread_blocks.get(key)
+            if block is None or block[0] >= block[1]:
+                first = self.reserve(table_name, column, block_size, start, step)
+                block = thread_blocks[key] = [first, first + block_size * step]
+            value = block[0]
+            block[0] = value + step
+            return value
+        return next_value
+
+    def high_water_marks(self) -> Dict[str, int]:
+        with self._lock:
+            sequences = list(self._sequences.items())
+        return {self._state_key(key): sequence.next_value for key, sequence in sequences}
+
+    def save(self):
+        """Persist the exact high-water marks, e.g. at shutdown; values reserved ahead but not handed out are freed"""
+        if self.state_path is None:
+            return
+        with ExitStack() as stack:
+            # Hold every sequence so that no reservation writes a higher mark in the meantime
+            with self._lock:
+                sequences = sorted(self._sequences.items())
+            for _, sequence in sequences:
+                stack.enter_context(sequence.lock)
+            for _, sequence in sequences:
+                sequence.persisted = sequence.next_value
+            self._write_state({self._state_key(key): sequence.next_value for key, sequence in sequences})
+
+    def _write_state(self, marks: Dict[str, int]):
+        """Merge ``marks`` into the state file, atomically"""
+        with self._lock:
+            self._saved_state.update(marks)
+            state = dict(self._saved_state)
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.state_path)
+
+    def _load_state(self) -> Dict[str, int]:
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable sequence state {self.state_path}: {e}")
+            return {}
+
+
+def _align(value, start, step):
+    """Smallest value >= ``value`` of the form ``start + k * step``"""
+    if value <= start:
+        return start
+    return start + -(-(value - start) // step) * step
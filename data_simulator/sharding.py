@@ -0,0 +1,224 @@
+import os
+import re
+import socket
+import logging
+from pathlib import Path
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+COORDINATIONS = ('env', 'file', 'vertica')
+
+
+class LeaseLost(RuntimeError):
+    """The shard lease expired and may have been taken over by another replica"""
+
+# StatefulSet pods are named <statefulset>-<ordinal>
+_ORDINAL = re.compile(r'-(\d+)$')
+
+
+class ShardInfo:
+    """
+    Position of this replica among ``count`` replicas sharing the load.
+
+    Each shard generates a disjoint slice of the rows, draws sequence values
+    from its own residue class (see ``SequenceService``) and seeds its RNGs
+    from its own substream.
+    """
+
+    def __init__(self, index: int = 0, count: int = 1, source: str = 'default', coordinator=None):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index} of {count}")
+        self.index = index
+        self.count = count
+        self.source = source
+        self.coordinator = coordinator
+
+    def __repr__(self):
+        return f"ShardInfo({self.index}/{self.count}, source={self.source!r})"
+
+    @property
+    def enabled(self) -> bool:
+        return self.count > 1
+
+    def rows_for(self, total_rows: int) -> int:
+        """This shard's share of ``total_rows``; the shares of all shards add up to the total"""
+        base, remainder = divmod(total_rows, self.count)
+        return base + (1 if self.index < remainder else 0)
+
+    def seed(self, base_seed: Optional[int]) -> Optional[int]:
+        """Independent seed for this shard, or None to seed from OS entropy"""
+        if base_seed is None:
+            return None
+        return hash((base_seed, self.index, self.count)) & 0xFFFFFFFFFFFFFFFF
+
+    def renew(self):
+        """
+        Extend a lease so it does not expire between runs of a long-lived process.
+
+        Raises:
+            LeaseLost: The lease could not be renewed; another replica may be
+                generating this shard, so this one must stop
+        """
+        if self.coordinator is not None and not self.coordinator.renew():
+            raise LeaseLost(f"Lost the lease on shard {self.index} of {self.count}")
+
+    def release(self):
+        if self.coordinator is not None:
+            self.coordinator.release()
+
+
+class FileLeaseCoordinator:
+    """
+    Claims a shard by taking an exclusive ``flock`` on ``shard-<n>.lock`` in a
+    directory shared by the replicas. The lock lives as long as the process.
+    """
+
+    def __init__(self, lease_dir: str, count: int):
+        self.lease_dir = Path(lease_dir)
+        self.count = count
+        self._handle = None
+
+    def claim(self) -> Optional[int]:
+        import fcntl
+
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        for index in range(self.count):
+            handle = open(self.lease_dir / f"shard-{index}.lock", 'a+')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                continue
+            handle.seek(0)
+            handle.truncate()
+            handle.write(f"{_owner_id()}\n")
+            handle.flush()
+            self._handle = handle
+            return index
+        return None
+
+    def renew(self) -> bool:
+        return self._handle is not None  # The flock is held until release or process exit
+
+    def release(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class VerticaLeaseCoordinator:
+    """
+    Claims a shard through a lease table in Vertica.
+
+    A replica takes the first shard whose lease it already owns or whose lease
+    has expired. Owners are identified by host name, so a replica that
+    restarts (or a new cron run in the same pod) takes back its own shard.
+
+    Whether a claim or renewal succeeded is read back from the lease table
+    rather than from the UPDATE's row count, which vertica_python reports as
+    -1 until a result is fetched.
+    """
+
+    def __init__(self, db, count: int, lease_table: str = 'simulator_shard_leases', ttl: int = 600):
+        self.db = db
+        self.count = count
+        self.lease_table = lease_table
+        self.ttl = ttl
+        self.owner = _owner_id()
+        self.index = None
+
+    def _params(self, **extra):
+        params = {'schema': self.db.schema, 'lease_table': self.lease_table, 'ttl': self.ttl}
+        params.update(extra)
+        return params
+
+    def claim(self) -> Optional[int]:
+        self.db.execute_query('lease_create', self._params())
+        for index in range(self.count):
+            self.db.execute_query('lease_insert', self._params(shard_index=index))
+
+        # Prefer the shard this owner already holds
+        for owned_only in (True, False):
+            for index in range(self.count):
+                self.db.execute_query(
+                    'lease_claim',
+                    self._params(shard_index=index, owned_only=owned_only),
+                    {'owner': self.owner}
+                )
+                if self._holds(index):
+                    self.index = index
+                    return index
+        return None
+
+    def _holds(self, index: int) -> bool:
+        """True if this owner holds an unexpired lease on shard ``index``"""
+        rows = self.db.execute_query('read_lease', self._params(shard_index=index))
+        return bool(rows) and rows[0][0] == self.owner
+
+    def renew(self) -> bool:
+        """Extend the lease; False if it was lost in the meantime"""
+        if self.index is None:
+            return False
+        self.db.execute_query('lease_claim', self._params(shard_index=self.index, owned_only=True),
+                              {'owner': self.owner})
+        if self._holds(self.index):
+            return True
+        logger.error(f"Lease on shard {self.index} expired and was taken over")
+        self.index = None
+        return False
+
+    def release(self):
+        if self.index is not None:
+            self.db.execute_query('lease_release', self._params(shard_index=self.index), {'owner': self.owner})
+            self.index = None
+
+
+def resolve_shard(config: dict, db=None, env: Mapping[str, str] = os.environ) -> ShardInfo:
+    """
+    Work out this replica's shard from config.yaml and the environment.
+
+    ``SHARD_INDEX`` / ``SHARD_COUNT`` / ``SHARD_COORDINATION`` win when set.
+    Otherwise a StatefulSet ordinal at the end of ``POD_NAME`` (or the host
+    name) is used with ``coordination: env``, and a shard is claimed from a
+    lease file or lease table with ``coordination: file`` / ``vertica``.
+    Deployment pods have no ordinal, so they need a lease coordination.
+    """
+    shard_config = config.get('sharding', {})
+    if not shard_config.get('enabled', False):
+        return ShardInfo()
+
+    count = int(env.get('SHARD_COUNT') or shard_config.get('count') or 1)
+    if count == 1:
+        return ShardInfo(source='single')
+    if env.get('SHARD_INDEX') not in (None, ''):
+        return ShardInfo(int(env['SHARD_INDEX']), count, source='env')
+
+    coordination = env.get('SHARD_COORDINATION') or shard_config.get('coordination', 'env')
+    if coordination not in COORDINATIONS:
+        raise ValueError(f"Unsupported shard coordination: {coordination}")
+
+    if coordination == 'env':
+        pod_name = env.get('POD_NAME') or socket.gethostname()
+        match = _ORDINAL.search(pod_name)
+        if not match:
+            raise ValueError(f"Cannot derive a shard index from pod name '{pod_name}'; set SHARD_INDEX")
+        return ShardInfo(int(match.group(1)) % count, count, source='ordinal')
+
+    if coordination == 'file':
+        coordinator = FileLeaseCoordinator(shard_config.get('lease_dir', '/tmp/data_simulator/shards'), count)
+    else:
+        coordinator = VerticaLeaseCoordinator(
+            db, count,
+            lease_table=shard_config.get('lease_table', 'simulator_shard_leases'),
+            ttl=shard_config.get('lease_ttl_seconds', 600)
+        )
+    index = coordinator.claim()
+    if index is None:
+        raise RuntimeError(f"All {count} shards are leased by other replicas")
+    logger.info(f"Claimed shard {index} of {count} through {coordination} lease")
+    return ShardInfo(index, count, source=coordination, coordinator=coordinator)
+
+
+def _owner_id():
+    return os.environ.get('POD_NAME') or socket.gethostname()
@@ -0,0 +1,370 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from queue import Queue
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only required by the parquet sink
+    pa = pq = None
+
+from data_simulator.batch import ColumnarBatch, split_batches
+from data_simulator.copy_encoder import encode_rows
+
+logger = logging.getLogger(__name__)
+
+SINK_TYPES = ('vertica', 'csv', 'parquet', 'jsonl')
+PARTITIONS = (None, 'date', 'hour')
+
+# Suffix of part files still being written; they are renamed once complete
+IN_PROGRESS_SUFFIX = '.inprogress'
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The 'parquet' sink requires pyarrow: pip install pyarrow")
+
+
+class Sink(ABC):
+    """
+    Destination of generated batches.
+
+    ``write`` takes records, a ColumnarBatch or an iterable of batches (such
+    as ``DataSimulator.iter_batches``) and returns the number of rows written.
+    ``partition_time`` is the time the rows belong to, when it is not now
+    (backfills).
+    """
+
+    @classmethod
+    def from_config(cls, db, config: dict) -> "Sink":
+        """Sink selected by the ``sink`` section of config.yaml; Vertica COPY by default"""
+        sink_config = config.get('sink', {})
+        sink_type = sink_config.get('type', 'vertica')
+        if sink_type not in SINK_TYPES:
+            raise ValueError(f"Unsupported sink type: {sink_type}")
+        if sink_type == 'vertica':
+            return VerticaSink(db)
+
+        sink_class = {'csv': CsvSink, 'parquet': ParquetSink, 'jsonl': JsonlSink}[sink_type]
+        options = dict(
+            output_dir=sink_config.get('output_dir', '/tmp/data_simulator/output'),
+            partition_by=sink_config.get('partition_by', 'date'),
+            max_file_mb=sink_config.get('max_file_mb', 256),
+            writers=sink_config.get('writers', 4),
+            buffer_kb=sink_config.get('buffer_kb', 1024),
+            metrics=db.metrics
+        )
+        compression = sink_config.get('compression')
+        if compression is not None:
+            options['compression'] = compression
+        if sink_type == 'csv':
+            options['header'] = sink_config.get('header', True)
+        if sink_type != 'parquet':
+            options['compresslevel'] = sink_config.get('compresslevel', 1)
+        return sink_class(**options)
+
+    @abstractmethod
+    def write(self, table_name: str, data, batch_size: int = 1000, partition_time: Optional[datetime] = None) -> int:
+        """Write all rows of ``data`` and return how many were written"""
+
+    def close(self):
+        pass
+
+
+class VerticaSink(Sink):
+    """Loads batches with COPY through ``VerticaDB``, on several connections if vertica.parallel_copy is set"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def write(self, table_name: str, data, batch_size: int = 1000, partition_time: Optional[datetime] = None) -> int:
+        if self.db.parallel_copy:
+            return self.db.parallel_batch_insert(table_name, data, batch_size)['rows']
+        if isinstance(data, (list, ColumnarBatch)):
+            return self.db.batch_insert(table_name, data, batch_size)
+        return self.db.stream_insert(table_name, data)
+
+
+class _PartFile(ABC):
+    """One part file being written; ``size`` is the number of bytes written to disk so far"""
+
+    def __init__(self, path: Path, buffer_size: int):
+        self.path = path
+        self._file = open(path, 'wb', buffering=buffer_size)
+
+    @property
+    def size(self) -> int:
+        return self._file.tell()
+
+    @abstractmethod
+    def write(self, batch: ColumnarBatch):
+        """Append the rows of a batch"""
+
+    def close(self):
+        self._file.close()
+
+
+class _TextPart(_PartFile):
+    """Part file of encoded text records, gzip-compressed on the fly if requested"""
+
+    def __init__(self, path: Path, buffer_size: int, encode, header: bytes = b'', compresslevel: Optional[int] = None):
+        super().__init__(path, buffer_size)
+        self._encode = encode
+        # wbits=31 writes a gzip member, as gzip.open would, without its per-write overhead
+        self._compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31) if compresslevel is not None else None
+        if header:
+            self._write(header)
+
+    def _write(self, data: bytes):
+        self._file.write(self._compressor.compress(data) if self._compressor else data)
+
+    def write(self, batch: ColumnarBatch):
+        self._write(self._encode(batch))
+
+    def close(self):
+        if self._compressor:
+            self._file.write(self._compressor.flush())
+        super().close()
+
+
+class _ParquetPart(_PartFile):
+    """Part file holding one Parquet row group per batch"""
+
+    def __init__(self, path: Path, buffer_size: int, compression: str):
+        super().__init__(path, buffer_size)
+        self._compression = compression
+        self._writer = None
+
+    def write(self, batch: ColumnarBatch):
+        table = _arrow_table(batch, self._writer.schema if self._writer else None)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._file, table.schema, compression=self._compression)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        super().close()
+
+
+def _arrow_table(batch: ColumnarBatch, schema=None):
+    """Arrow table of a batch; all-null columns are typed as strings so later batches can fill them"""
+    arrays = [pa.array(values) for values in batch.values]
+    arrays = [pa.nulls(len(array), pa.string()) if pa.types.is_null(array.type) else array for array in arrays]
+    table = pa.Table.from_arrays(arrays, names=batch.columns)
+    if schema is not None and not table.schema.equals(schema):
+        table = table.cast(schema)
+    return table
+
+
+class _RollingWriter:
+    """Writes batches to numbered part files, starting a new one once a file reaches the size limit"""
+
+    def __init__(self, sink: "FileSink", directory: Path, prefix: str):
+        self.sink = sink
+        self.directory = directory
+        self.prefix = prefix
+        self.part = None
+        self.parts = 0
+        self.rows = 0
+        self.paths = []
+
+    def _open(self, columns):
+        path = self.directory / f"{self.prefix}-{self.parts:05d}{self.sink.extension}{IN_PROGRESS_SUFFIX}"
+        self.parts += 1
+        self.part = self.sink.open_part(path, columns)
+
+    def _finish(self):
+        part, self.part = self.part, None
+        part.close()
+        final_path = part.path.with_name(part.path.name[:-len(IN_PROGRESS_SUFFIX)])
+        os.replace(part.path, final_path)
+        self.paths.append(final_path)
+
+    def write(self, batch: ColumnarBatch) -> int:
+        """Write a batch and return the bytes it added to disk"""
+        if self.part is None:
+            self._open(batch.columns)
+        before = self.part.size
+        self.part.write(batch)
+        written = self.part.size - before
+        self.rows += len(batch)
+        if self.part.size >= self.sink.max_file_bytes:
+            self._finish()
+        return written
+
+    def close(self):
+        if self.part is not None:
+            self._finish()
+
+    def abort(self):
+        """Drop the part being written, keeping the completed ones"""
+        if self.part is not None:
+            part, self.part = self.part, None
+            try:
+                part.close()
+            finally:
+                part.path.unlink(missing_ok=True)
+
+
+class FileSink(Sink):
+    """
+    Writes each table to rolling part files under ``output_dir``.
+
+    Files go to ``<output_dir>/<table>/`` plus a ``date=`` (and ``hour=``)
+    directory of the write (or of its ``partition_time``) when partitioned. Every ``write`` spreads its
+    batches over ``writers`` threads, each appending to its own part file
+    through a large buffer, so encoding and compression of several batches
+    overlap. A part is written under an ``.inprogress`` name and renamed once
+    it reaches ``max_file_mb`` or the write ends, so readers only ever see
+    complete files.
+    """
+
+    extension = ''
+
+    def __init__(self, output_dir: str, partition_by: Optional[str] = 'date', max_file_mb: float = 256,
+                 writers: int = 4, buffer_kb: int = 1024, metrics=None):
+        """
+        Args:
+            output_dir: Root directory of the output
+            partition_by: None, "date" or "hour" of the write
+            max_file_mb: Start a new part file once one reaches this size on disk
+            writers: Parallel writers, and open part files, per table
+            buffer_kb: Write buffer of every part file
+            metrics: MetricsRegistry receiving write timings and row/byte counts
+        """
+        if partition_by not in PARTITIONS:
+            raise ValueError(f"Unsupported sink partitioning: {partition_by}")
+        self.output_dir = Path(output_dir)
+        self.partition_by = partition_by
+        self.max_file_bytes = int(max_file_mb * 1024 * 1024)
+        self.writers = max(1, writers)
+        self.buffer_size = buffer_kb * 1024
+        self.metrics = metrics
+
+    @abstractmethod
+    def open_part(self, path: Path, columns) -> _PartFile:
+        """Open a new part file at ``path`` for rows with ``columns``"""
+
+    def partition_dir(self, table_name: str, moment: Optional[datetime] = None) -> Path:
+        moment = moment or datetime.now()
+        directory = self.output_dir / table_name
+        if self.partition_by in ('date', 'hour'):
+            directory = directory / f"date={moment:%Y-%m-%d}"
+        if self.partition_by == 'hour':
+            directory = directory / f"hour={moment:%H}"
+        return directory
+
+    def write(self, table_name: str, data, batch_size: int = 1000, partition_time: Optional[datetime] = None) -> int:
+        directory = self.partition_dir(table_name, partition_time)
+        directory.mkdir(parents=True, exist_ok=True)
+        # Unique per write, so concurrent runs and shards never append to each other's files
+        prefix = f"part-{datetime.now():%H%M%S}-{uuid.uuid4().hex[:8]}"
+        writers = [_RollingWriter(self, directory, f"{prefix}-{index:02d}") for index in range(self.writers)]
+
+        idle = Queue()
+        for index in range(len(writers)):
+            idle.put(index)
+
+        def write_batch(batch):
+            # Only one task holds a writer index at a time
+            index = idle.get()
+            try:
+                started = time.perf_counter()
+                written = writers[index].write(batch)
+                if self.metrics is not None:
+                    self.metrics.stage(table_name, 'write', time.perf_counter() - started)
+                    self.metrics.inc('rows_loaded_total', len(batch), table=table_name)
+                    self.metrics.inc('bytes_loaded_total', written, table=table_name)
+            finally:
+                idle.put(index)
+
+        pending = set()
+        executor = ThreadPoolExecutor(max_workers=len(writers), thread_name_prefix=f"sink-{table_name}")
+        try:
+            for batch in split_batches(data, batch_size):
+                if not batch:
+                    continue
+                pending.add(executor.submit(write_batch, batch))
+                # Keep at most two batches per writer in memory
+                if len(pending) >= 2 * len(writers):
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+            for future in pending:
+                future.result()
+        except Exception as e:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for writer in writers:
+                writer.abort()
+            if self.metrics is not None:
+                self.metrics.inc('load_errors_total', table=table_name)
+            logger.error(f"Error writing {table_name} to {directory}: {e}")
+            raise
+        executor.shutdown(wait=True)
+        for writer in writers:
+            writer.close()
+        return sum(writer.rows for writer in writers)
+
+
+class CsvSink(FileSink):
+    """Comma separated files with the same quoting and NULL encoding as the COPY payload"""
+
+    def __init__(self, output_dir: str, compression: str = 'gzip', compresslevel: int = 1, header: bool = True,
+                 **kwargs):
+        if compression not in ('gzip', 'none'):
+            raise ValueError(f"Unsupported CSV compression: {compression}")
+        super().__init__(output_dir, **kwargs)
+        self.compresslevel = compresslevel if compression == 'gzip' else None
+        self.header = header
+        self.extension = '.csv.gz' if compression == 'gzip' else '.csv'
+
+    def open_part(self, path: Path, columns) -> _PartFile:
+        header = (','.join(columns) + '\n').encode('utf-8') if self.header else b''
+        return _TextPart(path, self.buffer_size, encode_rows, header, self.compresslevel)
+
+
+class JsonlSink(FileSink):
+    """One JSON object per line; values JSON cannot represent are written as strings"""
+
+    def __init__(self, output_dir: str, compression: str = 'gzip', compresslevel: int = 1, **kwargs):
+        if compression not in ('gzip', 'none'):
+            raise ValueError(f"Unsupported JSONL compression: {compression}")
+        super().__init__(output_dir, **kwargs)
+        self.compresslevel = compresslevel if compression == 'gzip' else None
+        self.extension = '.jsonl.gz' if compression == 'gzip' else '.jsonl'
+        self._encode_object = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+
+    def _encode(self, batch: ColumnarBatch) -> bytes:
+        columns = batch.columns
+        encode_object = self._encode_object
+        lines = [encode_object(dict(zip(columns, row))) for row in batch.rows()]
+        return ('\n'.join(lines) + '\n').encode('utf-8') if lines else b''
+
+    def open_part(self, path: Path, columns) -> _PartFile:
+        return _TextPart(path, self.buffer_size, self._encode, compresslevel=self.compresslevel)
+
+
+class ParquetSink(FileSink):
+    """Columnar Parquet files with one row group per batch (needs pyarrow)"""
+
+    extension = '.parquet'
+
+    def __init__(self, output_dir: str, compression: str = 'snappy', **kwargs):
+        _require_pyarrow()
+        super().__init__(output_dir, **kwargs)
+        self.compression = compression
+
+    def open_part(self, path: Path, columns) -> _PartFile:
+        return _ParquetPart(path, self.buffer_size, self.compression)
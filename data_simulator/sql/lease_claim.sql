@@ -0,0 +1,4 @@
+UPDATE {{schema}}.{{lease_table}}
+SET owner = :owner, expires_at = TIMESTAMPADD(SECOND, {{ttl}}, NOW())
+WHERE shard_index = {{shard_index}}
+{% if owned_only %}AND owner = :owner{% else %}AND (owner IS NULL OR owner = :owner OR expires_at < NOW()){% endif %}
\ No newline at end of file
@@ -0,0 +1,3 @@
+SELECT owner
+	FROM {{schema}}.{{lease_table}}
+WHERE shard_index = {{shard_index}} AND expires_at > NOW()
@@ -0,0 +1,199 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TableGraph:
+    """
+    Dependency graph of tables built from their foreign keys.
+
+    A table depends on every other table in the run that one of its reference
+    columns points to. References to tables outside the run are served from
+    whatever is already in Vertica and impose no ordering.
+    """
+
+    def __init__(self, parents: Dict[str, Set[str]]):
+        self.parents = parents
+        self.children = {table: set() for table in parents}
+        for table, table_parents in parents.items():
+            for parent in table_parents:
+                self.children[parent].add(table)
+        self._check_acyclic()
+
+    @classmethod
+    def from_simulator(cls, simulator, tables: List[str]) -> "TableGraph":
+        run_tables = set(tables)
+        parents = {}
+        for table in tables:
+            references = simulator.get_table_plan(table).references
+            parents[table] = {ref_table for ref_table, _ in references
+                              if ref_table in run_tables and ref_table != table}
+        return cls(parents)
+
+    def _check_acyclic(self):
+        remaining = {table: len(table_parents) for table, table_parents in self.parents.items()}
+        ready = [table for table, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            table = ready.pop()
+            visited += 1
+            for child in self.children[table]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if visited < len(self.parents):
+            cycle = sorted(table for table, count in remaining.items() if count > 0)
+            raise ValueError(f"Foreign keys form a cycle between tables: {', '.join(cycle)}")
+
+    def descendants(self, table: str) -> Set[str]:
+        found = set()
+        pending = [table]
+        while pending:
+            for child in self.children[pending.pop()]:
+                if child not in found:
+                    found.add(child)
+                    pending.append(child)
+        return found
+
+
+class TableScheduler:
+    """
+    Loads tables concurrently in foreign key order.
+
+    Independent tables run side by side on up to ``concurrency`` threads. A
+    table starts only once all of its parent tables have loaded and the
+    reference keys it draws from them have been refreshed in the cache, so its
+    foreign keys point at rows that exist. If a table fails, the tables that
+    depend on it are skipped.
+    """
+
+    def __init__(self, simulator, load_table: Callable[[str], object], concurrency: int = 4):
+        """
+        Args:
+            simulator: DataSimulator providing the table plans and reference cache
+            load_table: Callable generating and loading one table
+            concurrency: Maximum number of tables loaded at once
+        """
+        self.simulator = simulator
+        self.load_table = load_table
+        self.concurrency = max(1, concurrency)
+        self.timings = {}
+        self.errors = {}
+        self.skipped = set()
+        self.graph = None
+        self.started = None
+        self.finished = None
+
+    @classmethod
+    def from_config(cls, simulator, load_table: Callable[[str], object]) -> "TableScheduler":
+        generation_config = simulator.config.get('generation', {})
+        return cls(simulator, load_table, concurrency=generation_config.get('table_concurrency', 4))
+
+    def _prepare_references(self, table: str):
+        """Pull the keys that parent tables of this run just loaded into the reference cache"""
+        cache = self.simulator.reference_cache
+        for ref_table, ref_column in self.simulator.get_table_plan(table).references:
+            if ref_table in self.graph.parents.get(table, ()):
+                cache.refresh(ref_table, ref_column)
+            else:
+                cache.get_keys(ref_table, ref_column)
+
+    def _run_table(self, table: str):
+        started = time.monotonic()
+        self._prepare_references(table)
+        result = self.load_table(table)
+        finished = time.monotonic()
+        self.timings[table] = (started, finished)
+        self.simulator.metrics.observe('table_seconds', finished - started, table=table)
+        return result
+
+    def run(self, tables: List[str], on_done: Optional[Callable[[str], None]] = None) -> Dict[str, object]:
+        """
+        Load all tables, returning each table's ``load_table`` result.
+
+        Args:
+            tables: Tables to load
+            on_done: Called with each table name as it finishes, loaded or not
+        """
+        self.graph = graph = TableGraph.from_simulator(self.simulator, tables)
+        self.timings.clear()
+        self.errors.clear()
+        self.skipped.clear()
+        results = {}
+        remaining = {table: len(parents) for table, parents in graph.parents.items()}
+        # Keep the configured order among tables that are ready at the same time
+        ready = [table for table in tables if remaining[table] == 0]
+        self.started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='table') as executor:
+            futures = {}
+            while ready or futures:
+                while ready:
+                    table = ready.pop(0)
+                    futures[executor.submit(self._run_table, table)] = table
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    table = futures.pop(future)
+                    try:
+                        results[table] = future.result()
+                    except Exception as e:
+                        self.errors[table] = e
+                        logger.error(f"Loading table {table} failed: {e}")
+                        blocked = graph.descendants(table) - self.skipped
+                        if blocked:
+                            logger.warning(f"Skipping tables that depend on {table}: {', '.join(sorted(blocked))}")
+                            self.skipped |= blocked
+                            if on_done:
+                                for blocked_table in blocked:
+                                    on_done(blocked_table)
+                    else:
+                        for child in sorted(graph.children[table], key=tables.index):
+                            remaining[child] -= 1
+                            if remaining[child] == 0 and child not in self.skipped:
+                                ready.append(child)
+                    if on_done:
+                        on_done(table)
+        self.finished = time.monotonic()
+        return results
+
+    def critical_path(self) -> List[str]:
+        """Chain of tables that determined the total run time, first to last"""
+        if not self.timings:
+            return []
+        path = [max(self.timings, key=lambda table: self.timings[table][1])]
+        while True:
+            parents = [parent for parent in self.graph.parents[path[-1]] if parent in self.timings]
+            if not parents:
+                break
+            path.append(max(parents, key=lambda parent: self.timings[parent][1]))
+        return path[::-1]
+
+    def report(self) -> dict:
+        """Per-table timings and the critical path of the last run"""
+        critical = self.critical_path()
+        tables = {}
+        for table, (started, finished) in self.timings.items():
+            ready_at = max((self.timings[parent][1] for parent in self.graph.parents[table]
+                            if parent in self.timings), default=self.started)
+            tables[table] = {
+                'start': started - self.started,
+                'duration': finished - started,
+                # Time spent ready but waiting for a free slot
+                'queued': max(0.0, started - ready_at),
+                'critical_path_seconds': finished - started if table in critical else 0.0
+            }
+        wall = (self.finished or time.monotonic()) - self.started
+        serial = sum(stats['duration'] for stats in tables.values())
+        return {
+            'wall_seconds': wall,
+            'serial_seconds': serial,
+            'speedup': serial / wall if wall else 0.0,
+            'critical_path': critical,
+            'critical_path_seconds': sum(stats['critical_path_seconds'] for stats in tables.values()),
+            'tables': tables,
+            'failed': sorted(self.errors),
+            'skipped': sorted(self.skipped)
+        }
@@ -0,0 +1,338 @@
+import re
+import time
+import random
+from datetime import date, datetime
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only used with the numpy engine's Generators
+    np = None
+
+MODES = ('random', 'event_time')
+
+# Context key of a fixed (start, end) epoch window overriding the relative windows of a batch, see ``TimestampGenerator.window``
+TIME_WINDOW = ('time', 'window')
+
+# Context key of the number of rows planned for the whole tick a batch belongs to, see ``TimestampGenerator.epochs``
+TIME_TOTAL_ROWS = ('time', 'total_rows')
+
+# Units of the values an offset column holds
+OFFSET_UNITS = {'s': 1.0, 'ms': 1e-3, 'us': 1e-6}
+
+# Shortest gap between consecutive event times once a batch has caught up with the window end; kept
+# tiny so that fast generation does not push event times ahead of the clock
+MIN_INTERVAL = 1e-6
+
+_RELATIVE = re.compile(r'^([+-]?)((?:\d+(?:\.\d+)?[yMwdhms])+)$')
+_RELATIVE_PART = re.compile(r'(\d+(?:\.\d+)?)([yMwdhms])')
+_UNIT_SECONDS = {'y': 365.25 * 86400, 'M': 30 * 86400, 'w': 7 * 86400, 'd': 86400, 'h': 3600, 'm': 60, 's': 1}
+
+
+def parse_bound(spec) -> Tuple[bool, float]:
+    """
+    Parse a window bound given the way Faker's ``date_time_between`` takes it.
+
+    Args:
+        spec: "now", a relative offset such as "-5m" or "-1d12h", a number of
+            seconds relative to now, or an absolute date/datetime/ISO string
+
+    Returns:
+        tuple: (relative, seconds) -- an offset from now if ``relative``,
+            otherwise epoch seconds
+    """
+    if spec is None or spec == 'now':
+        return True, 0.0
+    if isinstance(spec, (int, float)):
+        return True, float(spec)
+    if isinstance(spec, datetime):
+        return False, spec.timestamp()
+    if isinstance(spec, date):
+        return False, datetime(spec.year, spec.month, spec.day).timestamp()
+    text = str(spec).strip()
+    if text == 'today':
+        return False, datetime.combine(date.today(), datetime.min.time()).timestamp()
+    match = _RELATIVE.match(text)
+    if match:
+        seconds = sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in _RELATIVE_PART.findall(match.group(2)))
+        return True, -seconds if match.group(1) == '-' else seconds
+    try:
+        return False, datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise ValueError(f"Unsupported timestamp bound: {spec!r}")
+
+
+class TimestampFormatter:
+    """
+    Formats epoch seconds as local ``YYYY-MM-DD HH:MM:SS[.fff]`` text, as
+    ``str(datetime)`` of Faker's naive datetimes would.
+
+    The date-and-minute prefix is cached per minute, so formatting a value is
+    integer arithmetic plus one string interpolation instead of building a
+    datetime and calling strftime.
+    """
+
+    def __init__(self, precision: int = 3, cache_size: int = 4096):
+        """
+        Args:
+            precision: Fractional second digits (0 to 6)
+            cache_size: Minutes whose prefix is cached
+        """
+        if not 0 <= precision <= 6:
+            raise ValueError(f"Timestamp precision must be between 0 and 6, got {precision}")
+        self.precision = precision
+        self.scale = 10 ** precision
+        self.cache_size = cache_size
+        self._template = f"%s%02d.%0{precision}d" if precision else "%s%02d"
+        self._prefixes = {}
+
+    def _prefix(self, minute: int) -> str:
+        prefix = self._prefixes.get(minute)
+        if prefix is None:
+            if len(self._prefixes) >= self.cache_size:
+                self._prefixes.clear()
+            prefix = self._prefixes[minute] = time.strftime('%Y-%m-%d %H:%M:', time.localtime(minute * 60))
+        return prefix
+
+    def format(self, epoch: Optional[float]) -> Optional[str]:
+        return self.format_many([epoch])[0]
+
+    def format_many(self, epochs: Sequence[Optional[float]]) -> List[Optional[str]]:
+        scale = self.scale
+        ticks_per_minute = 60 * scale
+        template = self._template
+        prefixes = self._prefixes
+        prefix_for = self._prefix
+        values = []
+        append = values.append
+        for epoch in epochs:
+            if epoch is None:
+                append(None)
+                continue
+            ticks = round(epoch * scale)
+            minute, ticks = divmod(ticks, ticks_per_minute)
+            prefix = prefixes.get(minute) or prefix_for(minute)
+            if scale == 1:
+                append(template % (prefix, ticks))
+            else:
+                append(template % ((prefix,) + divmod(ticks, scale)))
+        return values
+
+
+class EventClock:
+    """Last event time emitted for one column, shared by every batch so event times keep increasing"""
+
+    def __init__(self):
+        self.last = None
+        self.lock = Lock()
+
+
+class TimestampGenerator:
+    """
+    Generates a whole batch of timestamps for one column.
+
+    In ``random`` mode values are uniform in the window, as with
+    ``date_time_between``. In ``event_time`` mode rows follow each other in
+    time: every gap is ``interval`` seconds (by default the window divided over
+    the rows of the tick, or the rest of the window over the batch) scaled by a
+    random factor in ``1 +/- jitter``, and the next batch continues from the
+    last value of the previous one.
+    """
+
+    depends_on = ()
+
+    def __init__(self, name: str, start='-5m', end='now', mode: str = 'random', interval: Optional[float] = None,
+                 jitter: float = 0.5, precision: int = 3, null_probability: float = 0, rng=random,
+                 clock: Optional[EventClock] = None, now: Callable[[], float] = time.time):
+        """
+        Args:
+            name: Column name
+            start: Window start (see ``parse_bound``)
+            end: Window end (see ``parse_bound``)
+            mode: "random" or "event_time"
+            interval: Mean seconds between consecutive event times; None spreads
+                the rows of a tick over the window
+            jitter: Relative spread of the event time gaps (0 spaces rows evenly)
+            precision: Fractional second digits of the text values
+            null_probability: Probability of a null value
+            rng: Object exposing the ``random`` module API
+            clock: Event time state shared across batches (and recompilations)
+            now: Clock returning epoch seconds
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unsupported timestamp mode: {mode}")
+        if not 0 <= jitter <= 1:
+            raise ValueError(f"Timestamp jitter must be between 0 and 1, got {jitter}")
+        self.name = name
+        self.start = parse_bound(start)
+        self.end = parse_bound(end)
+        self.mode = mode
+        self.interval = interval
+        self.jitter = jitter
+        self.null_probability = null_probability
+        self.rng = rng
+        self.clock = clock or EventClock()
+        self.now = now
+        self.formatter = TimestampFormatter(precision)
+
+    def window(self, override: Optional[Tuple[float, float]] = None) -> Tuple[float, float]:
+        """
+        (start, end) epoch seconds of the next batch.
+
+        Args:
+            override: Fixed window replacing a window relative to now, e.g. a
+                backfill partition; windows with an absolute bound are kept
+        """
+        if override is not None and self.start[0] and self.end[0]:
+            return override
+        now = self.now()
+        start = now + self.start[1] if self.start[0] else self.start[1]
+        end = now + self.end[1] if self.end[0] else self.end[1]
+        return start, end
+
+    def epochs(self, count: int, rng=None, window: Optional[Tuple[float, float]] = None,
+               total_rows: Optional[int] = None) -> List[float]:
+        """
+        Epoch seconds of one batch.
+
+        Args:
+            count: Number of values
+            rng: ``numpy.random.Generator`` to draw the whole batch with numpy;
+                None draws from the generator's ``random`` module API
+            window: Fixed window of the batch (see ``window``). Event times
+                then spread over it from its start, leaving the column's clock
+                untouched
+            total_rows: Rows planned for the whole tick, split into several
+                batches. Without ``interval`` each batch then takes its share
+                of the window instead of spreading over all that is left of it
+        """
+        start, end = self.window(window)
+        if self.mode == 'random':
+            span = end - start
+            if rng is not None:
+                return (start + span * rng.random(count)).tolist()
+            random_value = self.rng.random
+            return [start + span * random_value() for _ in range(count)]
+
+        if window is not None and self.start[0] and self.end[0]:
+            # One gap more than values, scaled so that the gaps add up to the window exactly
+            steps = self._steps(0.0, 1.0, count + 1, rng)
+            scale = (end - start) / steps[-1]
+            return [start + step * scale for step in steps[:-1]]
+        with self.clock.lock:
+            # Jump forward if the previous batch fell out of the window, never back
+            moment = start if self.clock.last is None else max(self.clock.last, start)
+            gap = self.interval
+            if not gap:
+                # The batch's share of the tick, but never past the window end when the clock runs late
+                gap = (end - moment) / max(count, 1)
+                if total_rows:
+                    gap = min((end - start) / total_rows, gap)
+                gap = max(gap, MIN_INTERVAL)
+            values = self._steps(moment, gap, count, rng)
+            if values:
+                self.clock.last = values[-1]
+        return values
+
+    def _steps(self, moment: float, gap: float, count: int, rng=None) -> List[float]:
+        """``count`` increasing event times after ``moment``, ``gap`` +/- jitter apart"""
+        low = 1.0 - self.jitter
+        width = 2.0 * self.jitter
+        if rng is not None:
+            return (moment + np.cumsum(gap * (low + width * rng.random(count)))).tolist()
+        values = []
+        append = values.append
+        random_value = self.rng.random
+        for _ in range(count):
+            moment += gap * (low + width * random_value())
+            append(moment)
+        return values
+
+    def __call__(self, count: int, context: Dict, rng=None) -> List[Optional[str]]:
+        """Generate ``count`` values, leaving their epoch seconds in ``context`` for derived columns"""
+        epochs = self.epochs(count, rng, context.get(TIME_WINDOW), context.get(TIME_TOTAL_ROWS))
+        epochs = _with_nulls(epochs, self.null_probability, self.rng, rng)
+        context[('epoch', self.name)] = epochs
+        return self.formatter.format_many(epochs)
+
+
+class DerivedTimestampGenerator:
+    """
+    Timestamps computed from another timestamp column of the same row, e.g.
+    ``END_TIME = START_TIME + PROCEDURE_DURATION``, without random draws.
+
+    The value is null when the base timestamp is null. If the table lacks the
+    base column the column falls back to ``fallback``.
+    """
+
+    def __init__(self, name: str, base: str, offset_column: Optional[str] = None, offset_unit: str = 'ms',
+                 offset: float = 0.0, precision: int = 3, null_probability: float = 0, rng=random,
+                 fallback: Optional[TimestampGenerator] = None):
+        """
+        Args:
+            name: Column name
+            base: Timestamp column the value is derived from
+            offset_column: Numeric column added to the base (a duration)
+            offset_unit: Unit of ``offset_column`` values: "s", "ms" or "us"
+            offset: Constant seconds added to the base
+            precision: Fractional second digits of the text values
+            null_probability: Probability of a null value
+            rng: Object exposing the ``random`` module API, for nulls only
+            fallback: Generator used when the table has no ``base`` column
+        """
+        if offset_unit not in OFFSET_UNITS:
+            raise ValueError(f"Unsupported timestamp offset unit: {offset_unit}")
+        self.name = name
+        self.base = base
+        self.offset_column = offset_column
+        self.unit = OFFSET_UNITS[offset_unit]
+        self.offset = float(offset)
+        self.null_probability = null_probability
+        self.rng = rng
+        self.fallback = fallback
+        self.formatter = TimestampFormatter(precision)
+
+    @property
+    def depends_on(self) -> Tuple[str, ...]:
+        return (self.base, self.offset_column) if self.offset_column else (self.base,)
+
+    def resolve(self, column_names) -> object:
+        """The generator to use in a table with ``column_names``"""
+        if self.base not in column_names:
+            return self.fallback
+        if self.offset_column and self.offset_column not in column_names:
+            self.offset_column = None
+        return self
+
+    def __call__(self, count: int, context: Dict, rng=None) -> List[Optional[str]]:
+        base = context.get(('epoch', self.base))
+        if base is None:
+            # The base column is not a timestamp generated in this batch
+            return self.fallback(count, context, rng)
+        offset = self.offset
+        unit = self.unit
+        durations = context.get(self.offset_column) if self.offset_column else None
+        if durations is None:
+            epochs = [None if value is None else value + offset for value in base]
+        else:
+            epochs = [None if value is None else value + offset + (float(duration) * unit if duration is not None else 0.0)
+                      for value, duration in zip(base, durations)]
+        epochs = _with_nulls(epochs, self.null_probability, self.rng, rng)
+        context[('epoch', self.name)] = epochs
+        return self.formatter.format_many(epochs)
+
+
+def _with_nulls(values: List, null_prob: float, random_module, rng=None) -> List:
+    """Replace each value by None with probability ``null_prob``, in place"""
+    if null_prob <= 0:
+        return values
+    if rng is not None:
+        for index in np.flatnonzero(rng.random(len(values)) < null_prob).tolist():
+            values[index] = None
+        return values
+    random_value = random_module.random
+    for index in range(len(values)):
+        if random_value() < null_prob:
+            values[index] = None
+    return values
@@ -0,0 +1,153 @@
+import random
+from itertools import accumulate
+from threading import Lock
+from typing import Callable, Dict, Hashable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # only needed for vectorized sampling
+    np = None
+
+
+class ValuePool:
+    """
+    Fixed set of pre-generated values sampled by index.
+
+    With ``skew`` > 0 value ``i`` is drawn with weight ``1 / (i + 1) ** skew``
+    (Zipf-like), so a few values are frequent and the rest form a long tail.
+    """
+
+    def __init__(self, values: List, skew: float = 0.0):
+        self.values = values
+        self.skew = skew
+        if skew:
+            weights = [1.0 / (rank + 1) ** skew for rank in range(len(values))]
+            total = sum(weights)
+            self.probabilities = [weight / total for weight in weights]
+            self.cum_weights = list(accumulate(weights))
+        else:
+            self.probabilities = None
+            self.cum_weights = None
+        self._np_probabilities = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def sampler(self, rng=random) -> Callable:
+        """Zero-argument callable drawing one value"""
+        values = self.values
+        if self.cum_weights is None:
+            choice = rng.choice
+            return lambda: choice(values)
+        choices = rng.choices
+        cum_weights = self.cum_weights
+        return lambda: choices(values, cum_weights=cum_weights, k=1)[0]
+
+    def sample(self, count: int, rng) -> List:
+        """Draw ``count`` values with a ``numpy.random.Generator``"""
+        if self.probabilities is None:
+            indices = rng.integers(0, len(self.values), count)
+        else:
+            if self._np_probabilities is None:
+                self._np_probabilities = np.asarray(self.probabilities)
+            indices = rng.choice(len(self.values), size=count, p=self._np_probabilities)
+        values = self.values
+        return [values[i] for i in indices.tolist()]
+
+
+class ValuePoolRegistry:
+    """
+    Per-process registry of value pools, shared by every column with the same
+    (provider, method, params) spec.
+
+    Hundreds of columns in ``columns.yaml`` use the same Faker spec, so each
+    pool is generated once and reused by all of them.
+    """
+
+    def __init__(self, size: int = 1000, skew: float = 0.0, types: Optional[List[str]] = None):
+        """
+        Args:
+            size: Default number of values generated per pool
+            skew: Default sampling skew (0 samples uniformly)
+            types: Column types (e.g. ``varchar(50)``) that always use pools
+        """
+        self.size = size
+        self.skew = skew
+        self.types = set(types or [])
+        self._pools: Dict[Hashable, ValuePool] = {}
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ValuePoolRegistry":
+        pool_config = config.get('value_pools', {})
+        return cls(
+            size=pool_config.get('size', 1000),
+            skew=pool_config.get('skew', 0.0),
+            types=pool_config.get('types')
+        )
+
+    def spec_for(self, col_config: dict) -> Optional[dict]:
+        """
+        Pool settings for a column, or None if it is generated per value.
+
+        A column opts in with ``simulation.strategy: pool`` (optionally with
+        ``pool_size`` / ``pool_skew``), or by having a type listed in
+        ``value_pools.types``.
+        """
+        sim_config = col_config.get('simulation', {})
+        strategy = sim_config.get('strategy')
+        if strategy != 'pool' and not (strategy is None and col_config.get('type') in self.types):
+            return None
+        return {
+            'size': sim_config.get('pool_size', self.size),
+            'skew': sim_config.get('pool_skew', self.skew)
+        }
+
+    def settings(self) -> dict:
+        """Constructor arguments, used to build an equivalent registry in worker processes"""
+        return {'size': self.size, 'skew': self.skew, 'types': sorted(self.types)}
+
+    def get(self, key: Hashable, generate: Callable, size: int, skew: float = 0.0) -> ValuePool:
+        """Return the pool for ``key``, generating ``size`` values with ``generate`` on first use"""
+        pool_key = (key, size, skew)
+        pool = self._pools.get(pool_key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(pool_key)
+                if pool is None:
+                    pool = self._pools[pool_key] = ValuePool(_distinct_values(generate, size), skew)
+        return pool
+
+    def clear(self):
+        with self._lock:
+            self._pools.clear()
+
+    def stats(self) -> dict:
+        return {'pools': len(self._pools), 'values': sum(len(pool) for pool in self._pools.values())}
+
+
+def _distinct_values(generate: Callable, size: int, max_attempts_factor: int = 3) -> List:
+    """Generate up to ``size`` distinct values, giving up on distinctness after a bounded number of calls"""
+    values = []
+    seen = set()
+    for _ in range(size * max_attempts_factor):
+        value = generate()
+        try:
+            if value in seen:
+                continue
+            seen.add(value)
+        except TypeError:  # unhashable values are kept as they come
+            pass
+        values.append(value)
+        if len(values) >= size:
+            break
+    return values
+
+
+def freeze(value) -> Hashable:
+    """Hashable form of a params structure, used to key pools"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(freeze(item) for item in value)
+    return value
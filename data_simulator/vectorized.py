@@ -0,0 +1,224 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required by the vectorized engine
+    np = None
+
+from data_simulator.schema_plan import TablePlan
+from data_simulator.timestamps import TIME_TOTAL_ROWS, TIME_WINDOW
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('python', 'numpy')
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The 'numpy' generation engine requires numpy: pip install numpy")
+
+
+class VectorizedTablePlan:
+    """
+    Column-at-a-time counterpart of ``TablePlan``.
+
+    ``random``, ``enum``, ``constant``, ``reference`` and pooled columns are
+    drawn for a whole batch with one NumPy call each, and timestamp columns
+    draw their epochs from the batch's Generator. Every other simulation type falls
+    back to the column's compiled per-cell generator, so the output has the
+    same shape and value distributions as the python engine.
+    """
+
+    def __init__(self, plan: TablePlan, reference_cache: Dict, profiler=None):
+        _require_numpy()
+        self.plan = plan
+        self.reference_cache = reference_cache
+        self.profiler = profiler
+        self.table_name = plan.table_name
+        self.columns = plan.columns
+        self.column_names = plan.column_names
+        self.order = plan.order
+        self._builders = [self._build_column(column) for column in plan.columns]
+        self.vectorized_columns = [
+            column.name for column, (vectorized, _) in zip(plan.columns, self._builders) if vectorized
+        ]
+
+    def generate_columns(self, count: int, rng, window: Optional[Tuple[float, float]] = None,
+                         total_rows: Optional[int] = None) -> List[List]:
+        """
+        Generate ``count`` values for every column.
+
+        Args:
+            count: Number of rows in the batch
+            rng: ``numpy.random.Generator`` owned by the calling thread
+            window: Fixed window of the timestamp columns, see ``TablePlan.generate_columns``
+            total_rows: Rows planned for the whole tick, see ``TablePlan.generate_columns``
+
+        Returns:
+            list: One list of Python values per column, in plan order
+        """
+        if not self.plan.batch_columns:
+            return [draw(count, rng) for _, draw in self._builders]
+        context = {TIME_WINDOW: window, TIME_TOTAL_ROWS: total_rows}
+        columns = [None] * len(self.columns)
+        for index in self.order:
+            columns[index] = self.generate_column(index, count, rng, context)
+        return columns
+
+    def generate_column(self, index: int, count: int, rng, context: Optional[Dict] = None) -> List:
+        """Generate ``count`` values of the column at ``index``, see ``TablePlan.generate_column``"""
+        generate_batch = self.columns[index].generate_batch
+        if generate_batch is not None:
+            values = generate_batch(count, {} if context is None else context, rng)
+        else:
+            values = self._builders[index][1](count, rng)
+        if context is not None:
+            context[self.column_names[index]] = values
+        return values
+
+    def generate_records(self, count: int, rng) -> List[Dict]:
+        columns = self.generate_columns(count, rng)
+        names = self.column_names
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def _build_column(self, column):
+        sim_config = column.config.get('simulation') or {}
+        sim_type = column.sim_type
+        draw = None
+        if column.generate_batch is not None:
+            # Batch timestamp generators take the Generator and apply their own nulls
+            return True, None
+        try:
+            if column.pool is not None:
+                pool = column.pool
+                draw = lambda count, rng: pool.sample(count, rng)
+            elif sim_type == 'random':
+                stats = self.profiler.stats_for(self.table_name, column.name, sim_type) if self.profiler else None
+                draw = self._random_column(sim_config, stats)
+            elif sim_type == 'enum':
+                draw = self._enum_column(sim_config)
+            elif sim_type == 'constant':
+                value = sim_config.get('value')
+                draw = lambda count, rng: [value] * count
+            elif sim_type == 'reference':
+                draw = self._reference_column(sim_config)
+        except Exception as e:
+            logger.warning(f"Falling back to per-row generation for {self.table_name}.{column.name}: {str(e)}")
+            draw = None
+
+        if draw is None:
+            # Compiled per-cell generator already applies the null threshold
+            generate = column.generate
+            return False, lambda count, rng: [generate() for _ in range(count)]
+
+        if sim_type != 'reference' and column.null_probability > 0:
+            draw = _with_null_mask(draw, column.null_probability)
+        return True, draw
+
+    def _random_column(self, sim_config, stats=None):
+        distribution = sim_config.get('distribution')
+        params = sim_config.get('params', {})
+        precision = params.get('precision')
+
+        if distribution == 'normal':
+            mean = params.get('mean', 0)
+            std_dev = params.get('std_dev', 1)
+            min_val = params.get('min', float('-inf'))
+            max_val = params.get('max', float('inf'))
+            fallback = max(min_val, min(max_val, mean))
+
+            def normal_column(count, rng):
+                values = _truncated_normal(rng, mean, std_dev, min_val, max_val, fallback, count, stats=stats)
+                return _to_list(values, precision)
+            return normal_column
+
+        elif distribution == 'uniform':
+            min_val = params.get('min', 0)
+            max_val = params.get('max', 1)
+            return lambda count, rng: _to_list(rng.uniform(min_val, max_val, count), precision)
+
+        elif distribution == 'choice':
+            choices = params.get('choices', [])
+            if not choices:
+                return None
+            return _index_column(choices)
+
+        return None
+
+    def _enum_column(self, sim_config):
+        values = sim_config.get('values')
+        weights = sim_config.get('weights')
+        if not values:
+            return None
+        if weights is None:
+            return _index_column(values)
+        if len(weights) != len(values):
+            return None
+
+        probabilities = np.asarray(weights, dtype=float)
+        probabilities = probabilities / probabilities.sum()
+        size = len(values)
+
+        def enum_column(count, rng):
+            return [values[i] for i in rng.choice(size, size=count, p=probabilities).tolist()]
+        return enum_column
+
+    def _reference_column(self, sim_config):
+        cache = self.reference_cache
+        key = (sim_config['table'], sim_config['column'])
+
+        def reference_column(count, rng):
+            ref_data = cache[key]
+            return [ref_data[i] for i in rng.integers(0, len(ref_data), count).tolist()]
+        return reference_column
+
+
+def _truncated_normal(rng, mean, std_dev, min_val, max_val, fallback, count, max_attempts=100, stats=None):
+    """
+    Rejection-sample a truncated normal for a whole batch.
+
+    Equivalent to the per-value retry loop of ``SchemaCompiler._random_generator``: only
+    out-of-range draws are redrawn, and values still out of range after
+    ``max_attempts`` rounds fall back to the clipped mean. Redrawn values are
+    added to ``stats.retries`` when a profiler's column stats are given.
+    """
+    values = rng.normal(mean, std_dev, count)
+    invalid = np.flatnonzero((values < min_val) | (values > max_val))
+    attempts = 1
+    while invalid.size and attempts < max_attempts:
+        if stats is not None:
+            stats.retries += int(invalid.size)
+        redraw = rng.normal(mean, std_dev, invalid.size)
+        values[invalid] = redraw
+        invalid = invalid[(redraw < min_val) | (redraw > max_val)]
+        attempts += 1
+    if invalid.size:
+        values[invalid] = fallback
+    return values
+
+
+def _to_list(values, precision):
+    if precision is not None:
+        values = np.round(values, precision)
+    return values.tolist()
+
+
+def _index_column(choices):
+    size = len(choices)
+    return lambda count, rng: [choices[i] for i in rng.integers(0, size, count).tolist()]
+
+
+def _with_null_mask(draw, null_prob):
+    def nullable(count, rng):
+        values = draw(count, rng)
+        for i in np.flatnonzero(rng.random(count) < null_prob).tolist():
+            values[i] = None
+        return values
+    return nullable
+
+
+def make_rng(seed=None):
+    """Create an independent ``numpy.random.Generator``"""
+    _require_numpy()
+    return np.random.default_rng(seed)
@@ -0,0 +1,154 @@
+import os
+import time
+import random
+import multiprocessing
+from itertools import count as counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from faker import Faker
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required by the numpy engine
+    np = None
+
+from data_simulator.schema_plan import SchemaCompiler
+from data_simulator.vectorized import VectorizedTablePlan, make_rng
+from data_simulator.value_pools import ValuePoolRegistry
+
+MODES = ('thread', 'process')
+
+# Per-process generation state, created by _init_worker
+_context = None
+
+
+class WorkerContext:
+    """
+    Generation state owned by one worker process.
+
+    Each worker holds its own Faker instance, RNG streams and compiled plans, so
+    a task only needs to carry the table name, the row count and the sequence
+    ranges reserved for it by the parent.
+    """
+
+    def __init__(self, schemas: Dict[str, Dict], reference_cache: Dict, seed: Optional[int] = None,
+                 value_pools: Optional[Dict] = None, fast_timestamps: bool = True, entities=None, ordinal: int = 0):
+        seed = seed if seed is not None else int.from_bytes(os.urandom(8), 'little')
+        # Workers never share a stream, and a seeded run gives every worker the same stream again
+        worker_seed = spawn_seed(seed, ordinal)
+
+        self.faker = Faker()
+        self.faker.seed_instance(worker_seed)
+        self.rng = random.Random(worker_seed)
+        self.numpy_rng = None
+        self.seed = worker_seed
+
+        self.schemas = schemas
+        self.reference_cache = reference_cache
+        self.sequence_cursors = {}
+        self.compiler = SchemaCompiler(
+            self.faker,
+            rng=self.rng,
+            reference_cache=self.reference_cache,
+            sequence_factory=self._sequence_generator,
+            value_pools=ValuePoolRegistry(**value_pools) if value_pools else None,
+            fast_timestamps=fast_timestamps,
+            entities=entities
+        )
+        self.plans = {}
+        self.vector_plans = {}
+
+    def _sequence_generator(self, table_name, column_name, col_config):
+        cursors = self.sequence_cursors
+        key = (table_name, column_name)
+        return lambda: next(cursors[key])
+
+    def get_plan(self, table_name):
+        plan = self.plans.get(table_name)
+        if plan is None:
+            plan = self.plans[table_name] = self.compiler.compile(table_name, self.schemas[table_name])
+        return plan
+
+    def get_vectorized_plan(self, table_name):
+        vector_plan = self.vector_plans.get(table_name)
+        if vector_plan is None:
+            vector_plan = VectorizedTablePlan(self.get_plan(table_name), self.reference_cache)
+            self.vector_plans[table_name] = vector_plan
+            if self.numpy_rng is None:
+                self.numpy_rng = make_rng(self.seed)
+        return vector_plan
+
+    def generate(self, table_name: str, batch_size: int, sequence_starts: Dict[str, Tuple[int, int]],
+                 engine: str = 'python', window: Optional[Tuple[float, float]] = None,
+                 total_rows: Optional[int] = None) -> Tuple[List[str], List[List]]:
+        for column_name, (start, step) in sequence_starts.items():
+            self.sequence_cursors[(table_name, column_name)] = counter(start, step)
+
+        if engine == 'numpy':
+            vector_plan = self.get_vectorized_plan(table_name)
+            return vector_plan.column_names, vector_plan.generate_columns(batch_size, self.numpy_rng, window, total_rows)
+
+        # Ship columns rather than rows of dicts: column names are pickled once per batch
+        plan = self.get_plan(table_name)
+        return plan.column_names, plan.generate_columns(batch_size, window, total_rows)
+
+
+def spawn_seed(seed: int, ordinal: int) -> int:
+    """64-bit seed of the ``ordinal``-th stream of ``seed``, the child ``SeedSequence(seed).spawn()`` makes"""
+    if np is None:
+        return hash((seed, ordinal)) & 0xFFFFFFFFFFFFFFFF
+    return int(np.random.SeedSequence(seed, spawn_key=(ordinal,)).generate_state(1, np.uint64)[0])
+
+
+def _init_worker(ordinals, schemas, reference_cache, seed, value_pools, fast_timestamps, entities):
+    global _context
+    with ordinals.get_lock():
+        ordinal = ordinals.value
+        ordinals.value += 1
+    _context = WorkerContext(schemas, reference_cache, seed, value_pools, fast_timestamps, entities, ordinal)
+
+
+def _generate_batch(table_name, batch_size, sequence_starts, engine, window=None, total_rows=None):
+    # Generation time is measured in the worker, so queueing and pickling are not counted
+    started = time.perf_counter()
+    column_names, columns = _context.generate(table_name, batch_size, sequence_starts, engine, window, total_rows)
+    return column_names, columns, time.perf_counter() - started
+
+
+class ProcessGenerationPool:
+    """
+    Process pool that runs batch generation outside the GIL.
+
+    The pool is initialised with the schemas and reference data it may need;
+    ``covers`` tells the caller whether a table can be served without
+    restarting the workers. Workers keep the reference data they started
+    with, so the pool records the version of the cache it was copied from.
+    """
+
+    def __init__(self, max_workers: int, schemas: Dict[str, Dict], reference_cache: Dict,
+                 seed: Optional[int] = None, value_pools: Optional[Dict] = None, fast_timestamps: bool = True,
+                 entities=None, reference_version: int = 0):
+        self.max_workers = max_workers
+        self.schemas = schemas
+        self.reference_keys = set(reference_cache)
+        self.reference_version = reference_version
+        # Workers number themselves in start order, so their streams depend on the seed alone
+        ordinals = multiprocessing.Value('i', 0)
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(ordinals, schemas, dict(reference_cache), seed, value_pools, fast_timestamps, entities)
+        )
+
+    def covers(self, table_name: str, reference_keys, reference_version: int = 0) -> bool:
+        return (table_name in self.schemas and set(reference_keys) <= self.reference_keys
+                and reference_version == self.reference_version)
+
+    def submit(self, table_name: str, batch_size: int, sequence_starts: Dict[str, Tuple[int, int]],
+               engine: str = 'python', window: Optional[Tuple[float, float]] = None, total_rows: Optional[int] = None):
+        """Generate a batch in a worker; the future's result is (column names, columns, seconds)"""
+        return self.executor.submit(_generate_batch, table_name, batch_size, sequence_starts, engine, window, total_rows)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
@@ -1,9 +1,23 @@
 import yaml
+import json
+import time
+import hashlib
 from pathlib import Path
 import xml.etree.ElementTree as ET
 import logging
 import copy
 
+NAMESPACES = {
+    'ns': 'http://radcom.com/OmniQCdrs.xsd',
+    'xt': 'http://radcom.com/XSDTypes.xsd'
+}
+
+# Digests of the generated YAMLs, kept next to the table configs
+STATE_FILE = '.generated.json'
+
+# libyaml's emitter is much faster on the large columns YAML
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 class ConfigGenerator:
     def __init__(self, config_path):
         """
@@ -13,6 +27,7 @@ class ConfigGenerator:
         self.config_path = self.script_dir / config_path
         self.config = self._load_config()
         self._setup_logging()
+        self._index = None
 
     def _load_config(self):
         """
@@ -41,64 +56,62 @@ class ConfigGenerator:
             for k, v in self.config[key].items()
         }
 
-    def _extract_table_fields(self, cdr_template_path, tables_to_process):
+    def _scan_cdr_template(self, cdr_template_path, tables_to_process):
         """
-        Extracts field names for each table where include_in_db="true".
+        Streams the CDR template once, collecting for each requested table its
+        field names where include_in_db="true" and its unique-field.
         """
-        # Define namespaces
-        namespaces = {
-            'ns': 'http://radcom.com/OmniQCdrs.xsd',
-            'xt': 'http://radcom.com/XSDTypes.xsd'
-        }
-
-        # Parse XML with namespaces
-        tree = ET.parse(cdr_template_path)
-        root = tree.getroot()
-
-        # Extract all tables (cdr elements)
-        all_tables = root.findall('.//ns:cdr', namespaces)
-
-        # Map table names to their field names
-        table_fields = {}
-        for table_element in all_tables:
-            table_name = table_element.attrib.get('table-name', '')
-            if table_name not in tables_to_process:
-                continue  # Skip tables not in the config list
-
-            # Extract field names where include_in_db="true"
-            fields = [
-                field.attrib['name']
-                for field in table_element.findall('.//xt:field', namespaces)
-                if field.attrib.get('include_in_db') == 'true'
-            ]
-            table_fields[table_name] = fields
+        cdr_tag = f"{{{NAMESPACES['ns']}}}cdr"
+        field_tag = f"{{{NAMESPACES['xt']}}}field"
+        tables_to_process = set(tables_to_process)
+
+        table_definitions = {}
+        for _, element in ET.iterparse(cdr_template_path, events=('end',)):
+            if element.tag != cdr_tag:
+                continue
+            table_name = element.attrib.get('table-name', '')
+            if table_name in tables_to_process:
+                table_definitions[table_name] = {
+                    'fields': [
+                        field.attrib['name']
+                        for field in element.iter(field_tag)
+                        if field.attrib.get('include_in_db') == 'true'
+                    ],
+                    'unique_field': element.attrib.get('unique-field', '').strip()
+                }
+            element.clear()  # Keep memory flat on large templates
 
-        return table_fields
+        return table_definitions
 
-    def _extract_column_names(self, fields_xml_path):
+    def _scan_fields_xml(self, fields_xml_path):
         """
-        Extracts column names from fields.xml.
+        Streams fields.xml once, indexing every field by name with its column
+        name, type and length.
         """
-        tree = ET.parse(fields_xml_path)
-        root = tree.getroot()
-
-        # Map field names to column names
-        field_to_column = {}
-        for field in root.findall('.//field'):
-            field_name = field.attrib.get('name', '')
-            column_name = field.find('.//database/column-name')
-            if column_name is not None and column_name.text:
-                field_to_column[field_name] = column_name.text
+        field_index = {}
+        for _, element in ET.iterparse(fields_xml_path, events=('end',)):
+            if element.tag != 'field':
+                continue
+            column_name = element.find('.//database/column-name')
+            length_tag = element.find('length')
+            field_index[element.attrib.get('name', '')] = {
+                'column_name': column_name.text if column_name is not None else None,
+                'type': element.attrib.get('type', ''),
+                'length': length_tag.text if length_tag is not None else None
+            }
+            element.clear()
 
-        return field_to_column
+        return field_index
 
-    def generate_table_configs(self):
+    def _scan(self):
         """
-        Generates YAML configurations for tables from the CDR template XML.
-        Uses column names from fields.xml.
+        Parses both XMLs once per generator and builds the indexes shared by
+        table and column generation.
         """
+        if self._index is not None:
+            return self._index
+
         xml_paths = self._resolve_paths('xml_path')
-        yaml_paths = self._resolve_paths('yaml_path')
         tables_to_process = self.config['tables']
 
         # Process CDR template XML
@@ -111,98 +124,137 @@ class ConfigGenerator:
         if not fields_xml_path.exists():
             raise FileNotFoundError(f"Fields XML not found: {fields_xml_path}")
 
-        # Extract table fields and column names
-        table_fields = self._extract_table_fields(cdr_template_path, tables_to_process)
-        field_to_column = self._extract_column_names(fields_xml_path)
+        table_definitions = self._scan_cdr_template(cdr_template_path, tables_to_process)
+        field_index = self._scan_fields_xml(fields_xml_path)
+        self._index = {
+            'table_definitions': table_definitions,
+            'field_index': field_index,
+            'field_to_column': {
+                name: details['column_name'] for name, details in field_index.items() if details['column_name']
+            },
+            # Every field used by at least one table, for constant-time membership tests
+            'table_field_names': {
+                field for definition in table_definitions.values() for field in definition['fields']
+            }
+        }
+        return self._index
+
+    def _state_path(self):
+        yaml_paths = self._resolve_paths('yaml_path')
+        return yaml_paths['tables'] / STATE_FILE
+
+    def _load_state(self):
+        state_path = self._state_path()
+        if not state_path.exists():
+            return {}
+        try:
+            with open(state_path) as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def _save_state(self, state):
+        state_path = self._state_path()
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(state_path, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+
+    def _write_if_changed(self, output_path, content, state, state_key):
+        """
+        Writes a YAML document unless the previous run wrote the same content
+        and the file is still there. Returns True if the file was written.
+        """
+        digest = hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+        if state.get(state_key) == digest and output_path.exists():
+            return False
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w') as f:
+            yaml.dump(content, f, Dumper=YamlDumper, default_style=None, default_flow_style=False)
+        state[state_key] = digest
+        return True
+
+    def generate_table_configs(self):
+        """
+        Generates YAML configurations for tables from the CDR template XML.
+        Uses column names from fields.xml. Only tables whose definition changed
+        since the last run are rewritten.
+
+        Returns:
+            list: Names of the tables whose YAML was (re)generated
+        """
+        yaml_paths = self._resolve_paths('yaml_path')
+        index = self._scan()
+        field_to_column = index['field_to_column']
+        state = self._load_state()
+        regenerated = []
 
         # Generate YAML for each table
-        for table_name, fields in table_fields.items():
+        for table_name, definition in index['table_definitions'].items():
             # Map field names to column names
             columns = [
                 field_to_column.get(field, field)  # Use field name as fallback
-                for field in fields
+                for field in definition['fields']
             ]
 
-            # Extract primary key from the table element
-            tree = ET.parse(cdr_template_path)
-            root = tree.getroot()
-            namespaces = {
-                'ns': 'http://radcom.com/OmniQCdrs.xsd',
-                'xt': 'http://radcom.com/XSDTypes.xsd'
-            }
-            table_element = root.find(f'.//ns:cdr[@table-name="{table_name}"]', namespaces)
-
             # Initialize YAML config with required fields
             yaml_config = {
                 'table_name': table_name,
                 'columns': columns
             }
 
-            # Only add primary_key if unique-field exists and has value
-            if table_element is not None:
-                unique_field = table_element.attrib.get('unique-field', '').strip()
-                if unique_field:  # Only proceed if unique-field has a value
-                    primary_key_field = unique_field.replace(' ', '_')
-                    primary_key = field_to_column.get(primary_key_field, primary_key_field)
-                    yaml_config['primary_key'] = primary_key
+            # Only add primary_key if unique-field has a value
+            unique_field = definition['unique_field']
+            if unique_field:
+                primary_key_field = unique_field.replace(' ', '_')
+                primary_key = field_to_column.get(primary_key_field, primary_key_field)
+                yaml_config['primary_key'] = primary_key
 
             # Write to YAML file
             output_path = yaml_paths['tables'] / f"{table_name}.yaml"
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, 'w') as f:
-                yaml.dump(yaml_config, f, default_style=None, default_flow_style=False)
+            if self._write_if_changed(output_path, yaml_config, state, f"table:{table_name}"):
+                regenerated.append(table_name)
+
+        self._save_state(state)
+        return regenerated
 
     def generate_columns_config(self):
         """
         Generates YAML configurations for columns from the fields XML.
         Only includes fields that belong to the specified tables and have include_in_db="true".
+        A column listed in column_overrides gets that simulation spec instead
+        of the default of its type.
+
+        Returns:
+            bool: True if the columns YAML was (re)generated
         """
-        xml_paths = self._resolve_paths('xml_path')
         yaml_paths = self._resolve_paths('yaml_path')
-        tables_to_process = self.config['tables']
+        index = self._scan()
+        table_field_names = index['table_field_names']
 
-        # Extract table fields from CDR template
-        cdr_template_path = xml_paths['cdr_template']
-        if not cdr_template_path.exists():
-            raise FileNotFoundError(f"CDR template XML not found: {cdr_template_path}")
-        table_fields = self._extract_table_fields(cdr_template_path, tables_to_process)
-
-        # Load type mapping and simulation config
+        # Load type mapping, simulation config and per-column overrides
         type_mapping = self.config.get('type_mapping', {})
         simulation_config = self.config.get('simulation_config', {})
+        column_overrides = self.config.get('column_overrides') or {}
 
-        # Parse the fields XML
-        fields_xml_path = xml_paths['fields_template']
-        if not fields_xml_path.exists():
-            raise FileNotFoundError(f"Fields XML not found: {fields_xml_path}")
-
-        tree = ET.parse(fields_xml_path)
-        root = tree.getroot()
-
-        # Extract fields and their details
+        # Build column details from the field index
         columns = {}
-        for field in root.findall('.//field'):
-            field_name = field.attrib.get('name', '')
-            column_name = field.find('.//database/column-name')
-            field_type = field.attrib.get('type', '')
-            length_tag = field.find('length')
-
-            if column_name is not None and column_name.text and field_type:
-                # Check if the field belongs to any of the specified tables
-                belongs_to_table = any(
-                    field_name in fields
-                    for fields in table_fields.values()
-                )
-                if not belongs_to_table:
-                    continue  # Skip fields not belonging to any table
+        for field_name, details in index['field_index'].items():
+            column_name = details['column_name']
+            field_type = details['type']
+
+            if column_name and field_type:
+                # Skip fields not belonging to any table
+                if field_name not in table_field_names:
+                    continue
 
                 # Get base type from mapping
                 db_type = type_mapping.get(field_type, "varchar(200)")
 
                 # Apply length tag for String and IP types
-                if length_tag is not None and length_tag.text and field_type in ['String', 'IP']:
+                length = details['length']
+                if length and field_type in ['String', 'IP']:
                     try:
-                        length = int(length_tag.text)
+                        length = int(length)
                         if field_type == 'String':
                             db_type = f"varchar({length})"
                         elif field_type == 'IP':
@@ -214,26 +266,29 @@ class ConfigGenerator:
                     self.logger.warning(f"Missing type mapping for field: {field_name}, type: {field_type}. Defaulting to varchar(200).")
 
                 # Create a deep copy of the simulation config to avoid YAML anchors
-                simulation = copy.deepcopy(simulation_config.get(db_type, {}))
+                simulation = copy.deepcopy(column_overrides.get(column_name) or simulation_config.get(db_type, {}))
 
-                columns[column_name.text] = {
+                columns[column_name] = {
                     "type": db_type,
                     "field_name": field_name,
                     "simulation": simulation
                 }
 
         # Write to YAML file (without YAML anchors)
-        output_path = yaml_paths['columns']
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w') as f:
-            yaml.dump({"columns": columns}, f, default_style=None, default_flow_style=False)
+        state = self._load_state()
+        written = self._write_if_changed(yaml_paths['columns'], {"columns": columns}, state, 'columns')
+        self._save_state(state)
+        return written
 
     def run(self):
         """
         Runs the configuration generation process.
         """
-        self.generate_table_configs()
-        self.generate_columns_config()
+        started = time.monotonic()
+        regenerated_tables = self.generate_table_configs()
+        columns_written = self.generate_columns_config()
+        self.logger.info(f"Generated {len(regenerated_tables)} of {len(self._index['table_definitions'])} table configs"
+                         f"{' and the columns config' if columns_written else ''} in {time.monotonic() - started:.2f}s")
 
 # Main execution
 if __name__ == "__main__":
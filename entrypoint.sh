@@ -1,5 +1,20 @@
 #!/bin/bash
 
+# RUN_MODE=cron (the default) starts a fresh cron_job.py on every tick through crond.
+# RUN_MODE=daemon keeps one resident process that schedules itself from cron_schedule,
+# so connections, compiled schemas and caches stay warm between ticks.
+# RUN_MODE=continuous streams every table at the target rates under "continuous" in config.yaml.
+RUN_MODE=${RUN_MODE:-cron}
+
+# exec so SIGTERM reaches Python and the current run can finish
+if [ "$RUN_MODE" = "daemon" ]; then
+    exec /usr/local/bin/python /app/cron_job.py --daemon
+fi
+
+if [ "$RUN_MODE" = "continuous" ]; then
+    exec /usr/local/bin/python /app/cron_job.py --continuous
+fi
+
 # Extract cron schedule from config.yaml
 CRON_SCHEDULE=$(python -c "
 import yaml
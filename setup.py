@@ -46,6 +46,9 @@ setup(
         'Jinja2',
         'tqdm'
     ],
+    extras_require={
+        'numpy': ['numpy'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License'
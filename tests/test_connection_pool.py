@@ -0,0 +1,181 @@
+import threading
+import time
+
+import pytest
+
+from data_simulator.connection_pool import ConnectionPool, PoolClosed, PoolTimeout
+
+
+class Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, data=None):
+        if self.conn.broken:
+            raise OSError('connection reset')
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class Connection:
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+
+    def cursor(self):
+        return Cursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class Factory:
+    def __init__(self, fail_after=None):
+        self.opened = []
+        self.fail_after = fail_after
+
+    def __call__(self):
+        if self.fail_after is not None and len(self.opened) >= self.fail_after:
+            raise ConnectionError('database unavailable')
+        conn = Connection()
+        self.opened.append(conn)
+        return conn
+
+
+def test_acquire_times_out_when_every_connection_is_in_use():
+    pool = ConnectionPool(Factory(), max_size=2, acquire_timeout=0.05)
+    held = [pool.acquire(), pool.acquire()]
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()['timeouts'] == 1
+
+    pool.release(held[0])
+    assert pool.acquire() is held[0]
+
+
+def test_waiting_acquire_gets_a_released_connection():
+    pool = ConnectionPool(Factory(), max_size=1, acquire_timeout=5)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(conn,)).start()
+    assert pool.acquire() is conn
+    assert pool.stats()['max_wait_seconds'] > 0
+
+
+def test_connection_is_released_when_the_block_raises():
+    pool = ConnectionPool(Factory(), max_size=1)
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError('query failed')
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['idle'] == 1
+
+
+def test_failed_open_frees_its_slot():
+    factory = Factory(fail_after=0)
+    pool = ConnectionPool(factory, max_size=1, acquire_timeout=0.05)
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    factory.fail_after = None
+    assert pool.acquire() is factory.opened[0]
+    assert pool.stats()['creation_failures'] == 1
+
+
+def test_acquire_many_takes_only_what_is_free():
+    pool = ConnectionPool(Factory(), max_size=4, acquire_timeout=0.05)
+    held = [pool.acquire(), pool.acquire(), pool.acquire()]
+
+    conns = pool.acquire_many(3)
+    assert len(conns) == 1
+    assert pool.stats()['timeouts'] == 0
+
+    for conn in held + conns:
+        pool.release(conn)
+    assert len(pool.acquire_many(3)) == 3
+
+
+def test_acquire_many_keeps_what_it_got_when_opening_more_fails():
+    pool = ConnectionPool(Factory(fail_after=2), max_size=4)
+    conns = pool.acquire_many(4)
+    assert len(conns) == 2
+    assert pool.stats()['total'] == 2
+
+
+def test_acquire_many_holds_nothing_when_the_first_connection_times_out():
+    pool = ConnectionPool(Factory(), max_size=1, acquire_timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire_many(2)
+    pool.release(held)
+    assert pool.stats()['in_use'] == 0
+
+
+def test_broken_and_closed_connections_are_evicted():
+    factory = Factory()
+    pool = ConnectionPool(factory, max_size=2)
+    conn = pool.acquire()
+    pool.release(conn, broken=True)
+    assert conn.closed
+
+    conn = pool.acquire()
+    conn.closed = True
+    pool.release(conn)
+    assert pool.stats()['evicted'] == 2
+    assert pool.stats()['total'] == 0
+
+
+def test_idle_connections_are_validated_before_reuse():
+    now = [0.0]
+    factory = Factory()
+    pool = ConnectionPool(factory, max_size=1, validation_interval=30, clock=lambda: now[0])
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.broken = True
+
+    now[0] = 10
+    assert pool.acquire() is conn  # Recently used, not validated
+    pool.release(conn)
+
+    now[0] = 50
+    replacement = pool.acquire()
+    assert replacement is not conn and conn.closed
+    assert pool.stats()['validation_failures'] == 1
+
+
+def test_expired_connections_are_replaced():
+    now = [0.0]
+    pool = ConnectionPool(Factory(), max_size=1, max_lifetime=60, clock=lambda: now[0])
+    conn = pool.acquire()
+    pool.release(conn)
+    now[0] = 61
+    assert pool.acquire() is not conn
+
+
+def test_warmup_opens_idle_connections_in_the_background():
+    pool = ConnectionPool(Factory(), max_size=3, warmup=2)
+    deadline = time.monotonic() + 2
+    while pool.stats()['idle'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.stats()['idle'] == 2 and pool.stats()['created'] == 2
+
+
+def test_stats_and_close():
+    pool = ConnectionPool(Factory(), max_size=3)
+    conns = [pool.acquire(), pool.acquire()]
+    pool.release(conns[0])
+
+    stats = pool.stats()
+    assert (stats['total'], stats['in_use'], stats['idle'], stats['created'], stats['acquisitions']) == (2, 1, 1, 2, 2)
+
+    pool.close()
+    assert conns[0].closed and not conns[1].closed
+    pool.release(conns[1])
+    assert conns[1].closed
+    with pytest.raises(PoolClosed):
+        pool.acquire()
@@ -0,0 +1,74 @@
+import csv
+import gzip
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from data_simulator.batch import ColumnarBatch
+from data_simulator.copy_encoder import CopyStream, encode_column, encode_rows
+
+
+def csv_encode(batch):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(batch.rows())
+    return buffer.getvalue().encode('utf-8')
+
+
+def sample_batch(rows=10):
+    return ColumnarBatch(
+        ['ID', 'NAME', 'AMOUNT', 'CREATED', 'NOTE'],
+        [
+            list(range(rows)),
+            [f'name {i}' for i in range(rows)],
+            [Decimal(i) / 4 if i % 3 else None for i in range(rows)],
+            [datetime(2026, 10, 16, 12, i % 60) for i in range(rows)],
+            ['a,b' if i % 2 else 'say "hi"\nthere' for i in range(rows)]
+        ]
+    )
+
+
+def test_rows_match_the_csv_module():
+    batch = sample_batch()
+    assert encode_rows(batch) == csv_encode(batch)
+    assert encode_rows(batch, 3, 7) == csv_encode(ColumnarBatch(batch.columns, [v[3:7] for v in batch.values]))
+
+
+def test_null_and_empty_string_are_distinct():
+    assert encode_column(['x', None, '']) == ['x', '', '""']
+    assert encode_column([None, None]) == ['', '']
+    assert encode_column([1, None, 2.5]) == ['1', '', '2.5']
+
+
+def test_plain_text_columns_are_passed_through():
+    values = ['a', 'b', 'c']
+    assert encode_column(values) is values
+
+
+def test_mixed_columns_fall_back_to_per_value_encoding():
+    assert encode_column(['a,b', 3, b'x"y']) == ['"a,b"', '3', '"x""y"']
+    assert encode_column([3, 'a,b', 'x"y']) == ['3', '"a,b"', '"x""y"']
+    assert encode_column([3, '', None]) == ['3', '""', '']
+
+
+@pytest.mark.parametrize('size', [-1, 1, 7, 4096])
+def test_stream_reads_the_whole_payload_in_any_read_size(size):
+    batch = sample_batch(1000)
+    stream = CopyStream(batch, chunk_rows=64)
+    chunks = iter(lambda: stream.read(size), b'')
+    assert b''.join(chunks) == encode_rows(batch)
+    assert stream.raw_bytes == stream.bytes_sent == len(encode_rows(batch))
+
+
+def test_gzip_stream_decompresses_to_the_plain_payload():
+    batch = sample_batch(1000)
+    stream = CopyStream(batch, chunk_rows=64, compression='gzip')
+    payload = b''.join(iter(lambda: stream.read(8192), b''))
+    assert gzip.decompress(payload) == encode_rows(batch)
+    assert stream.bytes_sent == len(payload) < stream.raw_bytes
+
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        CopyStream(sample_batch(), compression='bzip2')
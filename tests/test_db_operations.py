@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import pytest
+
+from data_simulator.batch import ColumnarBatch
+from data_simulator.db_operations import VerticaDB
+
+CONFIG_PATH = Path(__file__).parent.parent / 'data_simulator' / 'config' / 'config.yaml'
+
+
+class Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, data=None):
+        pass
+
+    def fetchone(self):
+        return (0,)
+
+    def copy(self, query, stream, **options):
+        while stream.read(65536):
+            pass
+        if self.conn.fail_copy:
+            raise OSError('COPY failed')
+        self.conn.copies += 1
+
+    def close(self):
+        pass
+
+
+class Connection:
+    fail_copy = False
+
+    def __init__(self):
+        self.closed = False
+        self.autocommit = True
+        self.copies = 0
+        self.commits = 0
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def db():
+    db = VerticaDB(str(CONFIG_PATH), connection_factory=Connection)
+    yield db
+    db.close()
+
+
+def batches(count, rows=10):
+    return iter([ColumnarBatch(['ID'], [list(range(rows))]) for _ in range(count)])
+
+
+def test_parallel_copy_continues_on_the_connections_that_are_free(db):
+    held = [db.get_connection() for _ in range(db.pool.max_size - 1)]
+
+    result = db.parallel_batch_insert('T', batches(4), connections=db.pool.max_size)
+
+    assert result['rows'] == 40
+    assert len(result['connections']) == 1
+    assert db.pool_stats()['in_use'] == len(held)
+    for conn in held:
+        db.release_connection(conn)
+    assert db.pool_stats()['in_use'] == 0
+
+
+def test_parallel_copy_releases_every_connection_when_a_batch_fails(db, monkeypatch):
+    monkeypatch.setattr(Connection, 'fail_copy', True)
+
+    with pytest.raises(OSError):
+        db.parallel_batch_insert('T', batches(4), connections=3, commit_mode='atomic')
+
+    assert db.pool_stats()['in_use'] == 0
+    conn = db.get_connection()
+    assert conn.autocommit
+    db.release_connection(conn)
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from data_simulator.rate_control import ContinuousRunner, RateController, RateProfile
+from data_simulator.sharding import LeaseLost
+
+
+class Shard:
+    count = 1
+
+    def __init__(self, renewals=None):
+        self.renewals = 0
+        self.lost_after = renewals
+
+    def renew(self):
+        self.renewals += 1
+        if self.lost_after is not None and self.renewals > self.lost_after:
+            raise LeaseLost("Lost the lease on shard 0 of 1")
+
+
+class Simulator:
+    def __init__(self, shard):
+        self.shard = shard
+        self.saved = 0
+
+    def save_state(self):
+        self.saved += 1
+
+
+def runner(simulator, renew_interval):
+    return ContinuousRunner(simulator, [], {}, {}, {}, report_interval=60, renew_interval=renew_interval)
+
+
+def test_flat_and_diurnal_profiles():
+    assert RateProfile(100)() == 100
+    diurnal = RateProfile(100, profile='diurnal', peak_hour=14, trough_ratio=0.2)
+    assert diurnal.multiplier(datetime(2026, 10, 16, 14)) == pytest.approx(1.0)
+    assert diurnal.multiplier(datetime(2026, 10, 16, 2)) == pytest.approx(0.2)
+
+
+def test_controller_releases_batches_as_credit_builds_up():
+    now = [0.0]
+    controller = RateController(lambda: 100.0, min_batch=10, clock=lambda: now[0])
+    now[0] = 0.5
+    assert controller.next_batch() == 50  # Catches up on the 50 rows owed
+    controller.observe(50, latency=0.25)
+    assert controller.batch_size == 20    # Loads at a quarter of the target latency: doubles at most
+
+
+def test_continuous_mode_renews_the_shard_lease():
+    simulator = Simulator(Shard())
+    runner(simulator, renew_interval=0.01).run(duration=0.1)
+    assert simulator.shard.renewals >= 3
+    assert simulator.saved >= 1
+
+
+def test_continuous_mode_stops_when_the_lease_is_lost():
+    simulator = Simulator(Shard(renewals=1))
+    with pytest.raises(LeaseLost):
+        runner(simulator, renew_interval=0.01).run(duration=5)
+    assert simulator.shard.renewals == 2
+    assert simulator.saved == 1
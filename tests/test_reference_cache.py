@@ -0,0 +1,142 @@
+import random
+
+from data_simulator.reference_cache import ReferenceCache
+from data_simulator.reference_loader import ReferenceLoader, reservoir_sample
+
+
+class KeyTable:
+    """In-memory stand-in for VerticaDB.read_keys over sorted key columns"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.queries = []
+
+    def read_keys(self, table_name, column, after=None, limit=None, stream=False):
+        self.queries.append((table_name, column, after, limit, stream))
+        keys = [key for key in sorted(self.columns[(table_name, column)]) if after is None or key > after]
+        return [(key,) for key in keys[:limit]]
+
+
+def cache_over(columns, page_size=10, sample_size=None, **options):
+    db = KeyTable(columns)
+    loader = ReferenceLoader(db, page_size=page_size, sample_size=sample_size, rng=random.Random(7))
+    return db, ReferenceCache(loader, **options)
+
+
+def test_keyset_pages_start_after_the_last_key():
+    db = KeyTable({('T', 'ID'): range(25)})
+    assert ReferenceLoader(db, page_size=10).load('T', 'ID') == list(range(25))
+    assert [query[2] for query in db.queries] == [None, 9, 19]
+
+
+def test_reservoir_sample_is_bounded_and_drawn_from_the_stream():
+    sample = reservoir_sample(range(1000), 50, random.Random(7))
+    assert len(sample) == 50 and len(set(sample)) == 50
+    assert all(0 <= key < 1000 for key in sample)
+    assert max(sample) >= 50  # Not just the head of the stream
+
+
+def test_lookups_are_counted_and_served_from_memory():
+    db, cache = cache_over({('T', 'ID'): range(5)})
+    assert cache.get_keys('T', 'ID') == [0, 1, 2, 3, 4]
+    assert cache.get_keys('T', 'ID') == [0, 1, 2, 3, 4]
+    assert cache[('T', 'ID')] == [0, 1, 2, 3, 4]
+    assert len(db.queries) == 1
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+
+def test_refresh_fetches_only_keys_after_the_high_water_mark():
+    columns = {('T', 'ID'): list(range(5))}
+    db, cache = cache_over(columns)
+    cache.get_keys('T', 'ID')
+    columns[('T', 'ID')].extend([5, 6])
+
+    assert cache.refresh('T', 'ID') == list(range(7))
+    assert db.queries[-1][2] == 4
+
+
+def test_expired_entries_are_refreshed_on_lookup(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('data_simulator.reference_cache.time.time', lambda: now[0])
+    columns = {('T', 'ID'): [1, 2]}
+    db, cache = cache_over(columns, ttl=60)
+    cache.get_keys('T', 'ID')
+    columns[('T', 'ID')].append(3)
+
+    now[0] += 30
+    assert cache.get_keys('T', 'ID') == [1, 2]
+    now[0] += 31
+    assert cache.get_keys('T', 'ID') == [1, 2, 3]
+    assert cache.stats()['refreshes'] == 1
+
+
+def test_least_recently_used_entries_are_evicted_over_budget():
+    columns = {('T', name): range(1000) for name in 'ABC'}
+    db, cache = cache_over(columns, page_size=1000)
+    cache.get_keys('T', 'A')
+    cache.max_bytes = cache.stats()['bytes'] * 2 + 1000
+
+    cache.get_keys('T', 'B')
+    cache.get_keys('T', 'A')
+    cache.get_keys('T', 'C')
+
+    assert ('T', 'B') not in cache
+    assert ('T', 'A') in cache and ('T', 'C') in cache
+    assert cache.stats()['evictions'] == 1
+    assert cache[('T', 'B')] == list(range(1000))  # Evicted keys are loaded again on access
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / 'cache' / 'references.pkl'
+    db, cache = cache_over({('T', 'ID'): range(5)}, snapshot_path=str(path))
+    cache.get_keys('T', 'ID')
+    cache.save_snapshot()
+
+    db, restored = cache_over({('T', 'ID'): range(5)}, snapshot_path=str(path))
+    assert restored.load_snapshot() == 1
+    assert restored.get_keys('T', 'ID') == [0, 1, 2, 3, 4]
+    assert db.queries == []
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / 'references.pkl'
+    path.write_bytes(b'not a pickle')
+    db, cache = cache_over({}, snapshot_path=str(path))
+    assert cache.load_snapshot() == 0
+    assert len(cache) == 0
+
+
+def test_version_changes_only_when_keys_may_have_changed():
+    columns = {('T', 'ID'): [1, 2]}
+    db, cache = cache_over(columns)
+    cache.get_keys('T', 'ID')
+    loaded = cache.version
+
+    cache.refresh('T', 'ID')
+    assert cache.version == loaded
+    columns[('T', 'ID')].append(3)
+    cache.refresh('T', 'ID')
+    assert cache.version == loaded + 1
+    cache.invalidate('T')
+    assert cache.version == loaded + 2
+
+
+def test_empty_columns_are_not_cached_or_saved(tmp_path):
+    path = tmp_path / 'references.pkl'
+    columns = {('T', 'ID'): [], ('U', 'ID'): [1]}
+    db, cache = cache_over(columns, ttl=3600, snapshot_path=str(path))
+    assert cache.get_keys('T', 'ID') == []
+    assert ('T', 'ID') not in cache
+
+    columns[('T', 'ID')].extend([1, 2])
+    assert cache.get_keys('T', 'ID') == [1, 2]
+    assert cache.stats()['misses'] == 2
+
+    cache.get_keys('U', 'ID')
+    columns[('U', 'ID')].clear()
+    cache.invalidate('U')
+    cache.get_keys('U', 'ID')
+    cache.save_snapshot()
+    db, restored = cache_over({}, snapshot_path=str(path))
+    assert restored.load_snapshot() == 1
+    assert list(restored) == [('T', 'ID')]
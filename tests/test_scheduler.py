@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from data_simulator.scheduler import CronSchedule, Scheduler
+
+
+class FakeClock:
+    """Clock advanced by the scheduler's waits and by the job's run time"""
+
+    def __init__(self, start: datetime):
+        self.current = start
+
+    def __call__(self) -> datetime:
+        return self.current
+
+    def advance(self, seconds: float):
+        self.current += timedelta(seconds=seconds)
+
+
+def scheduler_with(clock, job, expression='*/5 * * * *', **options):
+    scheduler = Scheduler(job, CronSchedule(expression), now=clock, **options)
+
+    def wait(timeout=None):
+        clock.advance(timeout)
+        return scheduler._stop.is_set()
+    scheduler._stop.wait = wait
+    return scheduler
+
+
+def test_next_after_steps_and_ranges():
+    schedule = CronSchedule('*/15 9-17 * * mon-fri')
+    friday_evening = datetime(2026, 10, 16, 17, 50)
+    assert schedule.next_after(friday_evening) == datetime(2026, 10, 19, 9, 0)
+    assert schedule.next_after(datetime(2026, 10, 19, 9, 0)) == datetime(2026, 10, 19, 9, 15)
+
+
+def test_day_of_month_or_day_of_week():
+    schedule = CronSchedule('0 0 1 * sun')
+    assert schedule.matches(datetime(2026, 10, 1))   # the 1st, a Thursday
+    assert schedule.matches(datetime(2026, 10, 18))  # a Sunday
+    assert not schedule.matches(datetime(2026, 10, 19))
+
+
+@pytest.mark.parametrize('expression', ['* * * *', '61 * * * *', '*/0 * * * *'])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_run_on_start_runs_once_then_waits_for_the_next_tick():
+    clock = FakeClock(datetime(2026, 10, 16, 12, 1, 30))
+    runs = []
+
+    def job(scheduled):
+        runs.append(scheduled)
+        if len(runs) == 3:
+            scheduler.stop()
+
+    scheduler = scheduler_with(clock, job, run_on_start=True)
+    scheduler.run_forever()
+
+    assert runs == [datetime(2026, 10, 16, 12, 1, 30), datetime(2026, 10, 16, 12, 5), datetime(2026, 10, 16, 12, 10)]
+
+
+def test_overlapping_ticks_are_skipped():
+    clock = FakeClock(datetime(2026, 10, 16, 12, 0, 30))
+    runs = []
+
+    def job(scheduled):
+        runs.append(scheduled)
+        clock.advance(11 * 60)  # Runs past the next two ticks
+        if len(runs) == 2:
+            scheduler.stop()
+
+    scheduler = scheduler_with(clock, job)
+    scheduler.run_forever()
+
+    assert runs == [datetime(2026, 10, 16, 12, 5), datetime(2026, 10, 16, 12, 20)]
+    assert scheduler.stats()['skipped'] == 4
+
+
+def test_overlapping_ticks_are_coalesced():
+    clock = FakeClock(datetime(2026, 10, 16, 12, 0, 30))
+    runs = []
+
+    def job(scheduled):
+        runs.append(scheduled)
+        if len(runs) == 1:
+            clock.advance(11 * 60)
+        elif len(runs) == 2:
+            scheduler.stop()
+
+    scheduler = scheduler_with(clock, job, overlap='coalesce')
+    scheduler.run_forever()
+
+    assert runs == [datetime(2026, 10, 16, 12, 5), datetime(2026, 10, 16, 12, 15)]
+    assert scheduler.stats()['coalesced'] == 1
+
+
+def test_failed_runs_are_counted_and_do_not_stop_the_scheduler():
+    clock = FakeClock(datetime(2026, 10, 16, 12, 0))
+    runs = []
+
+    def job(scheduled):
+        runs.append(scheduled)
+        if len(runs) == 2:
+            scheduler.stop()
+        raise RuntimeError('boom')
+
+    scheduler = scheduler_with(clock, job)
+    scheduler.run_forever()
+
+    assert scheduler.stats() == {'runs': 2, 'failures': 2, 'skipped': 0, 'coalesced': 0}
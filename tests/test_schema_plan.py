@@ -0,0 +1,42 @@
+import random
+
+from faker import Faker
+
+from data_simulator.schema_plan import SchemaCompiler
+from data_simulator.vectorized import VectorizedTablePlan, make_rng
+
+SCHEMA = {
+    'ID': {'type': 'INT', 'simulation': {'type': 'sequence', 'start': 1, 'step': 1}},
+    'STATUS': {'type': 'varchar(10)', 'simulation': {'type': 'enum', 'values': ['ok', 'failed'], 'weights': [9, 1]}},
+    'AMOUNT': {'type': 'numeric(10,2)', 'simulation': {'type': 'random', 'distribution': 'uniform',
+                                                       'params': {'min': 1, 'max': 2, 'precision': 2}}},
+    'EMPTY_CHOICE': {'type': 'varchar(10)', 'simulation': {'type': 'random', 'distribution': 'choice',
+                                                           'params': {'choices': []}}},
+    'BAD_NORMAL': {'type': 'numeric(10,2)', 'simulation': {'type': 'random', 'distribution': 'normal',
+                                                           'params': {'mean': 'high', 'std_dev': 1}}},
+}
+
+
+def compiler():
+    faker = Faker()
+    faker.seed_instance(7)
+    return SchemaCompiler(faker, rng=random.Random(7))
+
+
+def test_columns_follow_their_specs():
+    batch = dict(zip(SCHEMA, compiler().compile('T', SCHEMA).generate_columns(50)))
+    assert batch['ID'] == list(range(1, 51))
+    assert set(batch['STATUS']) <= {'ok', 'failed'}
+    assert all(1 <= value <= 2 for value in batch['AMOUNT'])
+
+
+def test_bad_specs_write_null_without_failing_the_batch():
+    plan = compiler().compile('T', SCHEMA)
+    batch = dict(zip(SCHEMA, plan.generate_columns(10)))
+    assert batch['EMPTY_CHOICE'] == [None] * 10
+    assert batch['BAD_NORMAL'] == [None] * 10
+
+    columns = VectorizedTablePlan(plan, {}).generate_columns(10, make_rng(7))
+    vector_batch = dict(zip(SCHEMA, columns))
+    assert vector_batch['EMPTY_CHOICE'] == [None] * 10
+    assert vector_batch['BAD_NORMAL'] == [None] * 10
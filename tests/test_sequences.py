@@ -0,0 +1,116 @@
+import json
+import threading
+
+from data_simulator.sequences import SequenceService, _align
+
+
+def test_align_rounds_up_to_the_sequence_grid():
+    assert _align(5, 10, 3) == 10
+    assert _align(10, 10, 3) == 10
+    assert _align(11, 10, 3) == 13
+    assert _align(13, 10, 3) == 13
+
+
+def test_blocks_are_consecutive_and_do_not_overlap_across_threads():
+    service = SequenceService(block_size=10)
+    values = []
+    lock = threading.Lock()
+
+    def draw():
+        next_value = service.generator('T', 'ID', start=1, step=1)
+        drawn = [next_value() for _ in range(25)]
+        with lock:
+            values.extend(drawn)
+
+    threads = [threading.Thread(target=draw) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(values)) == 100
+    assert min(values) == 1
+    assert service.high_water_marks() == {'T.ID': 1 + 4 * 3 * 10}
+
+
+def test_shards_stride_over_disjoint_values():
+    drawn = []
+    for index in range(3):
+        service = SequenceService(block_size=4, shard_index=index, shard_count=3)
+        next_value = service.generator('T', 'ID', start=100, step=2)
+        drawn.append([next_value() for _ in range(6)])
+
+    assert drawn[0][:3] == [100, 106, 112]
+    assert drawn[1][:3] == [102, 108, 114]
+    assert drawn[2][:3] == [104, 110, 116]
+    assert not set(drawn[0]) & set(drawn[1]) | set(drawn[0]) & set(drawn[2]) | set(drawn[1]) & set(drawn[2])
+
+
+def test_saved_mark_is_aligned_to_the_shard_grid(tmp_path):
+    state_path = tmp_path / 'sequences.json'
+    state_path.write_text(json.dumps({'T.ID@1/2': 107}))
+    service = SequenceService(state_path=str(state_path), shard_index=1, shard_count=2)
+
+    # Shard 1 of 2 with start 0, step 5 hands out 5, 15, 25, ...
+    assert service.reserve('T', 'ID', 1, start=0, step=5) == 115
+
+
+def test_state_file_is_written_once_per_reserve_ahead_blocks(tmp_path, monkeypatch):
+    state_path = tmp_path / 'sequences.json'
+    service = SequenceService(block_size=10, state_path=str(state_path), reserve_ahead=5)
+    writes = []
+    write_state = service._write_state
+    monkeypatch.setattr(service, '_write_state', lambda marks: (writes.append(marks), write_state(marks)))
+
+    for _ in range(12):
+        service.reserve('T', 'ID', 10, start=1)
+
+    # Blocks 1 and 7 each persist a mark 5 blocks past their own end
+    assert writes == [{'T.ID': 61}, {'T.ID': 121}]
+    # The file always covers every value handed out so far
+    assert json.loads(state_path.read_text())['T.ID'] >= service.high_water_marks()['T.ID']
+
+
+def test_save_writes_exact_marks_atomically_and_a_new_service_resumes(tmp_path):
+    state_path = tmp_path / 'sequences.json'
+    service = SequenceService(block_size=10, state_path=str(state_path))
+    next_value = service.generator('T', 'ID', start=1)
+    for _ in range(15):
+        next_value()
+    service.save()
+
+    assert json.loads(state_path.read_text()) == {'T.ID': 21}
+    assert list(tmp_path.iterdir()) == [state_path]
+    resumed = SequenceService(block_size=10, state_path=str(state_path))
+    assert resumed.generator('T', 'ID', start=1)() == 21
+
+
+def test_seed_source_is_used_without_saved_state():
+    service = SequenceService(seed_source=lambda table, column: 41)
+    assert service.reserve('T', 'ID', 1, start=1, step=1) == 42
+
+
+def test_gap_free_values_are_covered_by_the_state_file(tmp_path):
+    state_path = tmp_path / 'sequences.json'
+    service = SequenceService(block_size=10, gap_free=True, state_path=str(state_path), reserve_ahead=2)
+    next_value = service.generator('T', 'ID', start=1)
+    drawn = [next_value() for _ in range(25)]
+
+    assert drawn == list(range(1, 26))
+    # No save(): a crashed process leaves this mark, and the next one resumes above every value handed out
+    resumed = SequenceService(gap_free=True, state_path=str(state_path))
+    assert resumed.generator('T', 'ID', start=1)() > drawn[-1]
+
+
+def test_marks_of_another_shard_layout_are_resumed_from(tmp_path):
+    def service(**shard):
+        state_path = tmp_path / 'sequences.json'
+        state_path.write_text(json.dumps({'T.ID@0/2': 120, 'T.ID@1/2': 131, 'U.ID': 7}))
+        return SequenceService(state_path=str(state_path), **shard)
+
+    # Shard 2 of 3 with start 0, step 1 hands out 2, 5, 8, ...
+    assert service(shard_index=2, shard_count=3).reserve('T', 'ID', 1, start=0) == 131
+    assert service(shard_index=0, shard_count=3).reserve('T', 'ID', 1, start=0) == 132
+    assert service().reserve('T', 'ID', 1, start=0) == 131
+    assert service(shard_index=1, shard_count=2).reserve('U', 'ID', 1) == 7
+    assert service(shard_index=0, shard_count=2).reserve('T', 'ID', 1) == 120
@@ -0,0 +1,117 @@
+import pytest
+
+from data_simulator.sharding import FileLeaseCoordinator, LeaseLost, ShardInfo, VerticaLeaseCoordinator, resolve_shard
+
+
+class LeaseTable:
+    """In-memory stand-in for the lease table, answering UPDATEs with -1 as vertica_python does before a fetch"""
+
+    schema = 'public'
+
+    def __init__(self):
+        self.now = 0
+        self.leases = {}
+
+    def execute_query(self, template_name, params=None, data=None):
+        index = params.get('shard_index')
+        if template_name == 'lease_insert':
+            self.leases.setdefault(index, [None, None])
+        elif template_name == 'lease_claim':
+            owner, expires_at = self.leases[index]
+            mine = owner == data['owner']
+            free = owner is None or expires_at < self.now
+            if mine or (free and not params['owned_only']):
+                self.leases[index] = [data['owner'], self.now + params['ttl']]
+        elif template_name == 'lease_release':
+            if self.leases[index][0] == data['owner']:
+                self.leases[index] = [None, None]
+        elif template_name == 'read_lease':
+            owner, expires_at = self.leases[index]
+            return [(owner,)] if owner is not None and expires_at > self.now else []
+        return -1
+
+
+def coordinator(db, owner, count=2, ttl=10):
+    lease = VerticaLeaseCoordinator(db, count, ttl=ttl)
+    lease.owner = owner
+    return lease
+
+
+def test_rows_for_splits_the_total_over_shards():
+    shares = [ShardInfo(index, 3).rows_for(10) for index in range(3)]
+    assert shares == [4, 3, 3]
+
+
+def test_seed_differs_per_shard_and_keeps_none():
+    assert ShardInfo(0, 2).seed(7) != ShardInfo(1, 2).seed(7)
+    assert ShardInfo(0, 2).seed(None) is None
+
+
+def test_vertica_leases_are_not_claimed_twice_despite_rowcount():
+    db = LeaseTable()
+    first, second, third = coordinator(db, 'pod-0'), coordinator(db, 'pod-1'), coordinator(db, 'pod-2')
+
+    assert first.claim() == 0
+    assert second.claim() == 1
+    assert third.claim() is None
+
+
+def test_vertica_lease_is_taken_back_by_its_owner_and_over_once_expired():
+    db = LeaseTable()
+    first = coordinator(db, 'pod-0')
+    assert first.claim() == 0
+    assert coordinator(db, 'pod-0').claim() == 0
+
+    db.now = 11
+    other = coordinator(db, 'pod-1', count=1)
+    assert other.claim() == 0
+    assert first.renew() is False
+    assert first.index is None
+
+
+def test_renewal_extends_the_lease():
+    db = LeaseTable()
+    lease = coordinator(db, 'pod-0', count=1)
+    lease.claim()
+    db.now = 8
+    assert lease.renew() is True
+    db.now = 15
+    assert coordinator(db, 'pod-1', count=1).claim() is None
+
+
+def test_shard_renew_raises_once_the_lease_is_lost():
+    db = LeaseTable()
+    lease = coordinator(db, 'pod-0', count=1)
+    shard = ShardInfo(lease.claim(), 1, source='vertica', coordinator=lease)
+    db.now = 11
+    coordinator(db, 'pod-1', count=1).claim()
+
+    with pytest.raises(LeaseLost):
+        shard.renew()
+
+
+def test_file_leases_are_exclusive(tmp_path):
+    first = FileLeaseCoordinator(str(tmp_path), 2)
+    second = FileLeaseCoordinator(str(tmp_path), 2)
+    third = FileLeaseCoordinator(str(tmp_path), 2)
+    assert (first.claim(), second.claim(), third.claim()) == (0, 1, None)
+    first.release()
+    assert third.claim() == 0
+    assert first.renew() is False and third.renew() is True
+
+
+def test_resolve_shard_from_environment_and_pod_ordinal():
+    config = {'sharding': {'enabled': True, 'count': 4}}
+    assert resolve_shard({}).count == 1
+    assert resolve_shard(config, env={'SHARD_INDEX': '2'}).index == 2
+    shard = resolve_shard(config, env={'POD_NAME': 'simulator-6'})
+    assert (shard.index, shard.count, shard.source) == (2, 4, 'ordinal')
+    with pytest.raises(ValueError):
+        resolve_shard(config, env={'POD_NAME': 'simulator'})
+
+
+def test_shard_coordination_from_the_environment(tmp_path):
+    config = {'sharding': {'enabled': True, 'count': 2, 'lease_dir': str(tmp_path)}}
+    env = {'SHARD_COORDINATION': 'file', 'POD_NAME': 'simulator-5d8f7b9c4-x7k2p'}
+    first, second = resolve_shard(config, env=env), resolve_shard(config, env=env)
+    assert (first.source, first.index, second.index) == ('file', 0, 1)
@@ -0,0 +1,39 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from data_simulator.batch import ColumnarBatch, split_batches
+from data_simulator.sinks import FileSink, JsonlSink, Sink
+
+
+def test_incomplete_sinks_fail_on_construction(tmp_path):
+    class NoWrite(Sink):
+        pass
+
+    class NoParts(FileSink):
+        pass
+
+    with pytest.raises(TypeError):
+        NoWrite()
+    with pytest.raises(TypeError):
+        NoParts(str(tmp_path))
+
+
+def test_file_sink_writes_complete_partitioned_parts(tmp_path):
+    sink = JsonlSink(str(tmp_path), compression='none', partition_by='hour', writers=2)
+    batch = ColumnarBatch(['ID', 'NAME'], [list(range(25)), [f'n{i}' for i in range(25)]])
+
+    assert sink.write('T', batch, batch_size=10, partition_time=datetime(2026, 10, 16, 9)) == 25
+
+    parts = sorted((tmp_path / 'T' / 'date=2026-10-16' / 'hour=09').iterdir())
+    assert parts and not any(part.name.endswith('.inprogress') for part in parts)
+    records = [json.loads(line) for part in parts for line in part.read_text().splitlines()]
+    assert sorted(record['ID'] for record in records) == list(range(25))
+
+
+def test_split_batches_slices_records_and_passes_batches_through():
+    records = [{'ID': i} for i in range(25)]
+    assert [len(batch) for batch in split_batches(records, 10)] == [10, 10, 5]
+    batches = iter([ColumnarBatch(['ID'], [[1]])])
+    assert split_batches(batches, 10) is batches
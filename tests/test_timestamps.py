@@ -0,0 +1,94 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from data_simulator.timestamps import (TIME_TOTAL_ROWS, TIME_WINDOW, DerivedTimestampGenerator, TimestampFormatter,
+                                       TimestampGenerator, parse_bound)
+
+NOW = datetime(2026, 10, 16, 12, 0).timestamp()
+
+
+def event_times(**options):
+    return TimestampGenerator('START_TIME', start='-5m', end='now', mode='event_time', jitter=0,
+                              rng=random.Random(7), now=lambda: NOW, **options)
+
+
+def test_parse_bound():
+    assert parse_bound('now') == (True, 0.0)
+    assert parse_bound('-1d12h') == (True, -129600.0)
+    assert parse_bound('+30s') == (True, 30.0)
+    assert parse_bound('2026-10-16 12:00:00') == (False, NOW)
+    with pytest.raises(ValueError):
+        parse_bound('yesterday')
+
+
+@pytest.mark.parametrize('precision', [0, 3, 6])
+def test_formatter_matches_str_of_datetime(precision):
+    epoch = NOW + 61.123456
+    expected = str(datetime.fromtimestamp(epoch))[:19 + (precision and precision + 1)]
+    assert TimestampFormatter(precision).format(epoch) == expected
+    assert TimestampFormatter(precision).format(None) is None
+
+
+def test_random_values_stay_in_the_window():
+    generator = TimestampGenerator('T', rng=random.Random(7), now=lambda: NOW)
+    assert all(NOW - 300 <= epoch <= NOW for epoch in generator.epochs(1000))
+
+
+def test_tick_split_into_batches_spreads_over_the_whole_window():
+    generator = event_times()
+    batches = [generator.epochs(100, total_rows=1000) for _ in range(10)]
+
+    assert batches[0][-1] == pytest.approx(NOW - 270)  # A tenth of the window, not all of it
+    epochs = [epoch for batch in batches for epoch in batch]
+    assert epochs == sorted(epochs)
+    assert epochs[-1] == pytest.approx(NOW)
+    gaps = {round(b - a, 6) for a, b in zip(epochs, epochs[1:])}
+    assert gaps == {0.3}
+
+
+def test_late_clock_never_runs_past_the_window_end():
+    generator = event_times()
+    generator.clock.last = NOW - 30
+    epochs = generator.epochs(100, total_rows=100)
+    assert epochs[0] > NOW - 30
+    assert epochs[-1] == pytest.approx(NOW)
+
+
+def test_batches_without_a_total_fill_the_rest_of_the_window():
+    generator = event_times()
+    assert generator.epochs(10)[-1] == pytest.approx(NOW)
+
+
+def test_fixed_interval():
+    generator = event_times(interval=2)
+    assert generator.epochs(3, total_rows=1000) == pytest.approx([NOW - 298, NOW - 296, NOW - 294])
+
+
+def test_fixed_window_leaves_the_clock_alone():
+    generator = event_times()
+    window = (NOW - 7200, NOW - 3600)
+    epochs = generator.epochs(50, window=window)
+    assert window[0] < epochs[0] and epochs[-1] < window[1]
+    assert generator.clock.last is None
+
+
+def test_derived_column_adds_the_duration():
+    start = event_times()
+    end = DerivedTimestampGenerator('END_TIME', 'START_TIME', offset_column='DURATION', offset_unit='ms')
+    context = {TIME_WINDOW: None, TIME_TOTAL_ROWS: 3, 'DURATION': [1000, None, 1500]}
+
+    start(3, context)
+    end(3, context)
+
+    starts, ends = context[('epoch', 'START_TIME')], context[('epoch', 'END_TIME')]
+    assert [b - a for a, b in zip(starts, ends)] == pytest.approx([1.0, 0.0, 1.5])
+    assert starts[-1] == pytest.approx(NOW)
+
+
+def test_derived_column_falls_back_without_its_base():
+    fallback = TimestampGenerator('END_TIME', now=lambda: NOW)
+    derived = DerivedTimestampGenerator('END_TIME', 'START_TIME', fallback=fallback)
+    assert derived.resolve(['END_TIME']) is fallback
+    assert derived.resolve(['START_TIME', 'END_TIME']) is derived
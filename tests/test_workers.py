@@ -0,0 +1,33 @@
+import multiprocessing
+
+from data_simulator import workers
+from data_simulator.workers import spawn_seed
+
+SCHEMAS = {'T': {'ID': {'type': 'INT', 'simulation': {'type': 'sequence', 'start': 1}}}}
+
+
+def test_spawned_seeds_depend_on_the_seed_and_ordinal_only():
+    assert spawn_seed(7, 0) == spawn_seed(7, 0)
+    assert len({spawn_seed(7, 0), spawn_seed(7, 1), spawn_seed(8, 0)}) == 3
+
+
+def test_workers_take_consecutive_ordinals(monkeypatch):
+    monkeypatch.setattr(workers, '_context', None)
+    ordinals = multiprocessing.Value('i', 0)
+    seeds = []
+    for _ in range(3):
+        workers._init_worker(ordinals, SCHEMAS, {}, 7, None, True, None)
+        seeds.append(workers._context.seed)
+
+    assert seeds == [spawn_seed(7, ordinal) for ordinal in range(3)]
+
+
+def test_pool_does_not_cover_a_newer_reference_cache():
+    pool = workers.ProcessGenerationPool(1, SCHEMAS, {('P', 'ID'): [1]}, reference_version=3)
+    try:
+        assert pool.covers('T', [('P', 'ID')], 3)
+        assert not pool.covers('T', [('P', 'ID')], 4)
+        assert not pool.covers('T', [('Q', 'ID')], 3)
+        assert not pool.covers('U', [], 3)
+    finally:
+        pool.shutdown()
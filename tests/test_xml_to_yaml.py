@@ -0,0 +1,72 @@
+import yaml
+
+from data_simulator.xml_to_yaml import ConfigGenerator
+
+CDR_TEMPLATE = """<cdrs xmlns:ns="http://radcom.com/OmniQCdrs.xsd" xmlns:xt="http://radcom.com/XSDTypes.xsd">
+  <ns:cdr table-name="CDR_TEST">
+    <xt:field name="Start Time" include_in_db="true"/>
+    <xt:field name="End Time" include_in_db="true"/>
+    <xt:field name="Setup Time" include_in_db="true"/>
+    <xt:field name="Debug" include_in_db="false"/>
+  </ns:cdr>
+</cdrs>
+"""
+
+FIELDS = """<fields>
+  <field name="Start Time" type="Time Stamp"><database><column-name>START_TIME</column-name></database></field>
+  <field name="End Time" type="Time Stamp"><database><column-name>END_TIME</column-name></database></field>
+  <field name="Setup Time" type="Time Stamp"><database><column-name>SETUP_TIME</column-name></database></field>
+  <field name="Debug" type="String"><database><column-name>DEBUG</column-name></database></field>
+</fields>
+"""
+
+DEFAULT = {'type': 'faker', 'method': 'date_time_between', 'params': {'start_date': '-5m', 'end_date': 'now'}}
+EVENT_TIME = {'type': 'timestamp', 'params': {'mode': 'event_time', 'precision': 3}}
+
+
+def write_config(tmp_path, overrides):
+    (tmp_path / 'cdrs.xml').write_text(CDR_TEMPLATE)
+    (tmp_path / 'fields.xml').write_text(FIELDS)
+    config = {
+        'tables': ['CDR_TEST'],
+        'type_mapping': {'Time Stamp': 'TIMESTAMP', 'String': 'varchar(50)'},
+        'simulation_config': {'TIMESTAMP': DEFAULT},
+        'column_overrides': overrides,
+        'xml_path': {'cdr_template': str(tmp_path / 'cdrs.xml'), 'fields_template': str(tmp_path / 'fields.xml')},
+        'yaml_path': {'columns': str(tmp_path / 'columns' / 'columns.yaml'), 'tables': str(tmp_path / 'tables')}
+    }
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(yaml.safe_dump(config))
+    return config_path
+
+
+def generated_columns(tmp_path):
+    return yaml.safe_load((tmp_path / 'columns' / 'columns.yaml').read_text())['columns']
+
+
+def test_column_overrides_replace_the_type_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ConfigGenerator(str(write_config(tmp_path, {'START_TIME': EVENT_TIME}))).run()
+
+    columns = generated_columns(tmp_path)
+    assert set(columns) == {'START_TIME', 'END_TIME', 'SETUP_TIME'}
+    assert columns['START_TIME']['simulation'] == EVENT_TIME
+    assert columns['END_TIME']['simulation'] == columns['SETUP_TIME']['simulation'] == DEFAULT
+    table = yaml.safe_load((tmp_path / 'tables' / 'CDR_TEST.yaml').read_text())
+    assert table == {'table_name': 'CDR_TEST', 'columns': ['START_TIME', 'END_TIME', 'SETUP_TIME']}
+
+
+def test_changed_overrides_regenerate_the_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert ConfigGenerator(str(write_config(tmp_path, None))).generate_columns_config()
+    assert not ConfigGenerator(str(write_config(tmp_path, None))).generate_columns_config()
+
+    assert ConfigGenerator(str(write_config(tmp_path, {'END_TIME': EVENT_TIME}))).generate_columns_config()
+    assert generated_columns(tmp_path)['END_TIME']['simulation'] == EVENT_TIME
+
+
+def test_shipped_overrides_match_the_generated_columns():
+    generator = ConfigGenerator('config/config.yaml')
+    columns = yaml.safe_load(generator._resolve_paths('yaml_path')['columns'].read_text())['columns']
+    for column_name, simulation in generator.config['column_overrides'].items():
+        assert columns[column_name]['simulation'] == simulation